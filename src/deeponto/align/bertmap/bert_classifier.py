@@ -13,14 +13,285 @@
 # limitations under the License.
 
 from typing import Tuple, List, Optional, Union
+from collections import OrderedDict
+import os
+import threading
+import time
+import weakref
 import torch
-from transformers import TrainingArguments, AutoModelForSequenceClassification, Trainer
+from transformers import TrainingArguments, AutoModelForSequenceClassification, BatchEncoding
 from datasets import Dataset
 from sklearn.metrics import accuracy_score
 import numpy as np
 import random
 
-from deeponto.utils import Tokenizer
+from deeponto.utils import Tokenizer, load_file, save_file
+from deeponto.utils.cache_utils import fingerprint_checkpoint
+from deeponto.utils.inference_utils import SequenceClassifierBackend
+from deeponto.utils.training_utils import (
+    tokenize_pair_dataset,
+    get_token_length_stats,
+    get_num_training_batches,
+    get_longest_first_lengths,
+    split_by_token_budget,
+    LengthGroupedTrainer,
+)
+
+
+# locks of the (fast) tokenizers shared by the threads preparing inputs, as a Rust tokenizer cannot be borrowed
+# concurrently ("Already borrowed")
+_TOKENIZER_LOCKS = weakref.WeakKeyDictionary()
+_TOKENIZER_LOCKS_LOCK = threading.Lock()
+
+
+def get_tokenizer_lock(tokenizer) -> threading.Lock:
+    """Get the lock guarding the calls of a tokenizer shared by multiple threads (one lock per tokenizer object)."""
+    with _TOKENIZER_LOCKS_LOCK:
+        if tokenizer not in _TOKENIZER_LOCKS:
+            _TOKENIZER_LOCKS[tokenizer] = threading.Lock()
+        return _TOKENIZER_LOCKS[tokenizer]
+
+
+class SynonymScoreCache:
+    r"""Class for caching the synonym scores of annotation pairs.
+
+    Common class annotations recur across many candidate class pairs, so the same annotation pair
+    is often scored more than once in the global matching and mapping extension stages. This cache
+    is consulted by [`BERTSynonymClassifier.predict`][deeponto.align.bertmap.bert_classifier.BERTSynonymClassifier.predict]
+    such that every annotation pair is passed through the BERT model at most once.
+
+    Attributes:
+        max_size (int, optional): The maximum number of cached annotation pairs; the least recently used
+            pairs are evicted first. Defaults to `None` which means unbounded.
+        symmetric (bool): Whether to treat `(a, b)` and `(b, a)` as the same annotation pair. Defaults to `False`.
+        model_id (str, optional): The identifier of the model that produced the cached scores (see
+            [`get_model_id`][deeponto.align.bertmap.bert_classifier.SynonymScoreCache.get_model_id]); a persisted
+            cache will not be loaded if its `model_id` does not match. Defaults to `None`.
+        num_hits (int): The number of annotation pairs found in the cache.
+        num_misses (int): The number of annotation pairs not found in the cache.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, symmetric: bool = False, model_id: Optional[str] = None):
+        self.max_size = max_size
+        self.symmetric = symmetric
+        self.model_id = model_id
+        self.num_hits = 0
+        self.num_misses = 0
+        self._scores = OrderedDict()
+        # the cache may be looked up in a thread preparing inputs while being updated in the model thread
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_model_id(checkpoint_path: Optional[str]) -> Optional[str]:
+        """Get the model identifier of a checkpoint as its path together with the fingerprint of its weights, such that
+        the scores of a different model fine-tuned into the same path are never reused."""
+        if checkpoint_path is None or not os.path.isdir(checkpoint_path):
+            return checkpoint_path
+        return f"{checkpoint_path}@{fingerprint_checkpoint(checkpoint_path)}"
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, annotation_pair: Tuple[str, str]):
+        return self.get_key(annotation_pair) in self._scores
+
+    def get_key(self, annotation_pair: Tuple[str, str]):
+        """Get the cache key of an annotation pair (sorted if `symmetric` is `True`)."""
+        left, right = annotation_pair
+        if self.symmetric and right < left:
+            return (right, left)
+        return (left, right)
+
+    def lookup(self, annotation_pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Look up the cached scores of the input annotation pairs; `None` is returned for a missing pair."""
+        scores = []
+        with self._lock:
+            for pair in annotation_pairs:
+                key = self.get_key(pair)
+                score = self._scores.get(key)
+                if score is None:
+                    self.num_misses += 1
+                else:
+                    self.num_hits += 1
+                    self._scores.move_to_end(key)  # mark as recently used
+                scores.append(score)
+        return scores
+
+    def lookup_pending(self, annotation_pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """Look up again the annotation pairs that were missing at an earlier lookup, e.g., scored since then by another
+        batch in flight; the pairs found now are counted as hits instead of misses."""
+        with self._lock:
+            scores = [self._scores.get(self.get_key(pair)) for pair in annotation_pairs]
+            num_found = sum(score is not None for score in scores)
+            self.num_misses -= num_found
+            self.num_hits += num_found
+        return scores
+
+    def update(self, annotation_pairs: List[Tuple[str, str]], scores: List[float]):
+        """Add the scores of the input annotation pairs into the cache."""
+        with self._lock:
+            for pair, score in zip(annotation_pairs, scores):
+                key = self.get_key(pair)
+                self._scores[key] = float(score)
+                self._scores.move_to_end(key)
+            # evict the least recently used pairs
+            if self.max_size is not None:
+                while len(self._scores) > self.max_size:
+                    self._scores.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        """The ratio of annotation pairs found in the cache so far."""
+        num_lookups = self.num_hits + self.num_misses
+        return self.num_hits / num_lookups if num_lookups > 0 else 0.0
+
+    def save(self, cache_file: str):
+        """Save the cached scores into a `.pkl` file."""
+        save_file(
+            {
+                "model_id": self.model_id,
+                "symmetric": self.symmetric,
+                "scores": list(self._scores.items()),
+            },
+            cache_file,
+        )
+
+    def load(self, cache_file: str):
+        """Load the cached scores from a `.pkl` file if it exists and is produced by the same model.
+
+        Returns:
+            (bool): Whether the cached scores are loaded.
+        """
+        if not os.path.exists(cache_file):
+            return False
+        saved = load_file(cache_file)
+        if saved["model_id"] != self.model_id or saved["symmetric"] != self.symmetric:
+            return False
+        self.update([key for key, _ in saved["scores"]], [score for _, score in saved["scores"]])
+        return True
+
+
+class LabelTokenStore:
+    r"""Class for storing the token ids of class labels (annotations) and assembling input pairs from them.
+
+    The same class labels are paired up again and again in the global matching and mapping extension stages,
+    so instead of tokenising every `(label1, label2)` pair, each unique label is tokenised only once and the
+    model inputs (e.g., `[CLS] label1 [SEP] label2 [SEP]` for BERT) are assembled directly from the stored
+    token ids. Truncation follows the `longest_first` strategy of the (fast) tokenizer such that the assembled
+    inputs are the same as those produced by tokenising the pairs.
+
+    Attributes:
+        tokenizer (PreTrainedTokenizerBase): The (Hugging Face) tokenizer of the BERT model.
+        max_length (int): The maximum length of an assembled input sequence (including special tokens).
+    """
+
+    def __init__(self, tokenizer, max_length: int):
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self._tokenizer_lock = get_tokenizer_lock(self.tokenizer)
+        self.return_token_type_ids = "token_type_ids" in self.tokenizer.model_input_names
+        self._token_ids = dict()
+        self._template = self.get_pair_template(self.tokenizer)
+        self.num_special_tokens = sum(len(self._template[k]) for k in ["prefix", "middle", "suffix"])
+
+    @staticmethod
+    def get_pair_template(tokenizer):
+        r"""Get the special tokens (and token type ids) placed before, between, and after the two sequences of an input pair
+        (e.g., `[CLS] a [SEP] b [SEP]` for BERT) by tokenising a probe pair.
+        """
+        probe1 = tokenizer("a", add_special_tokens=False)["input_ids"]
+        probe2 = tokenizer("b", add_special_tokens=False)["input_ids"]
+        encoding = tokenizer("a", "b", return_token_type_ids=True)
+        input_ids, token_type_ids = encoding["input_ids"], encoding["token_type_ids"]
+        start1 = next(i for i in range(len(input_ids)) if input_ids[i : i + len(probe1)] == probe1)
+        end1 = start1 + len(probe1)
+        start2 = next(i for i in range(end1, len(input_ids)) if input_ids[i : i + len(probe2)] == probe2)
+        end2 = start2 + len(probe2)
+        return {
+            "prefix": input_ids[:start1],
+            "middle": input_ids[end1:start2],
+            "suffix": input_ids[end2:],
+            "token_type_ids": (
+                token_type_ids[:start1],
+                token_type_ids[start1],
+                token_type_ids[end1:start2],
+                token_type_ids[start2],
+                token_type_ids[end2:],
+            ),
+        }
+
+    def __len__(self):
+        return len(self._token_ids)
+
+    def __contains__(self, label: str):
+        return label in self._token_ids
+
+    def add(self, labels: List[str], batch_size: int = 10000):
+        """Tokenise the input labels that have not been stored yet (in batches) and store their token ids.
+
+        It is thread-safe as labels can be added by the threads preparing inputs.
+        """
+        new_labels = list(dict.fromkeys(label for label in labels if label not in self._token_ids))
+        if not new_labels:
+            return
+        with self._tokenizer_lock:
+            # labels may have been stored by another thread meanwhile
+            new_labels = [label for label in new_labels if label not in self._token_ids]
+            for i in range(0, len(new_labels), batch_size):
+                batch_labels = new_labels[i : i + batch_size]
+                batch_token_ids = self.tokenizer(batch_labels, add_special_tokens=False)["input_ids"]
+                self._token_ids.update(zip(batch_labels, batch_token_ids))
+
+    def truncate(self, token_ids1: List[int], token_ids2: List[int]):
+        """Truncate a pair of token id lists following the `longest_first` strategy of the fast tokenizer
+        (see [`get_longest_first_lengths`][deeponto.utils.training_utils.get_longest_first_lengths])."""
+        max_num_tokens = max(self.max_length - self.num_special_tokens, 0)
+        if len(token_ids1) + len(token_ids2) <= max_num_tokens:
+            return token_ids1, token_ids2
+        n1, n2 = get_longest_first_lengths(len(token_ids1), len(token_ids2), max_num_tokens)
+        return token_ids1[:n1], token_ids2[:n2]
+
+    def encode(self, sent_pairs: List[Tuple[str, str]]) -> List[dict]:
+        """Assemble the (unpadded) model inputs of label pairs from the stored token ids.
+
+        Labels that have not been stored are tokenised and stored first.
+        """
+        self.add([label for pair in sent_pairs for label in pair])
+        prefix, middle, suffix = self._template["prefix"], self._template["middle"], self._template["suffix"]
+        prefix_types, type1, middle_types, type2, suffix_types = self._template["token_type_ids"]
+        features = []
+        for left, right in sent_pairs:
+            token_ids1, token_ids2 = self.truncate(self._token_ids[left], self._token_ids[right])
+            feature = {"input_ids": prefix + token_ids1 + middle + token_ids2 + suffix}
+            if self.return_token_type_ids:
+                feature["token_type_ids"] = (
+                    prefix_types + [type1] * len(token_ids1) + middle_types + [type2] * len(token_ids2) + suffix_types
+                )
+            features.append(feature)
+        return features
+
+    def pad(self, features: List[dict]):
+        """Pad the assembled model inputs into tensors (with the attention mask)."""
+        max_length = max(len(feature["input_ids"]) for feature in features)
+        input_ids = np.full((len(features), max_length), self.tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(features), max_length), dtype=np.int64)
+        token_type_ids = np.zeros((len(features), max_length), dtype=np.int64)
+        for i, feature in enumerate(features):
+            length = len(feature["input_ids"])
+            input_ids[i, :length] = feature["input_ids"]
+            attention_mask[i, :length] = 1
+            if self.return_token_type_ids:
+                token_type_ids[i, :length] = feature["token_type_ids"]
+        inputs = {"input_ids": torch.from_numpy(input_ids)}
+        if self.return_token_type_ids:
+            inputs["token_type_ids"] = torch.from_numpy(token_type_ids)
+        inputs["attention_mask"] = torch.from_numpy(attention_mask)
+        return BatchEncoding(inputs)
+
+    def collate(self, sent_pairs: List[Tuple[str, str]]):
+        """Assemble the padded model inputs of label pairs from the stored token ids."""
+        return self.pad(self.encode(sent_pairs))
+
 
 # @paper(
 #     "BERTMap: A BERT-based Ontology Alignment System (AAAI-2022)",
@@ -39,11 +310,29 @@ class BERTSynonymClassifier:
         num_epochs_for_training (int): The number of epochs for training a BERT model.
         batch_size_for_training (int): The batch size for training a BERT model.
         batch_size_for_prediction (int): The batch size for making predictions.
+        max_tokens_for_prediction (int, optional): The maximum number of (padded) tokens in a forward pass for making predictions;
+            if set, input pairs are bucketed by their tokenised lengths to minimise padding. Defaults to `None`.
+        num_workers_for_tokenization (int): The number of processes for tokenising the training and validation data. Defaults to `1`.
+        tokenized_data_path (str, optional): The directory for caching the tokenised training and validation data. Defaults to `None`
+            which means the directory of the data files (if the data are memory-mapped) or `~/.cache/deeponto/tokenised-data`.
+        group_by_length (bool): Whether to group training inputs of similar lengths into batches to reduce padding. Defaults to `False`.
+        max_tokens_for_training (int, optional): The maximum number of (padded) tokens in a training batch; if set, training batches
+            are length-grouped under this token budget and `batch_size_for_training` is only an upper bound. Defaults to `None`.
         training_data (Dataset, optional): Data for training the model if `for_training` is set to `True`. Defaults to `None`.
+            The input data can be a list of `(annotation1, annotation2, label)` samples or a (memory-mapped) `datasets.Dataset`
+            with the columns `annotation1`, `annotation2` and `labels`.
         validation_data (Dataset, optional): Data for validating the model if `for_training` is set to `True`. Defaults to `None`.
         training_args (TrainingArguments, optional): Training arguments for training the model if `for_training` is set to `True`. Defaults to `None`.
-        trainer (Trainer, optional): The model trainer fed with `training_args` and data samples. Defaults to `None`.
+        trainer (LengthGroupedTrainer, optional): The model trainer fed with `training_args` and data samples. Defaults to `None`.
+        training_throughput (dict): The training throughput (samples and tokens per second) and padding ratio of the last training.
         softmax (torch.nn.SoftMax, optional): The softmax layer used for normalising synonym scores. Defaults to `None`.
+        score_cache (SynonymScoreCache, optional): The cache of already computed synonym scores consulted in prediction. Defaults to `None`.
+        inference_backend (SequenceClassifierBackend, optional): The (CPU-optimised) inference backend used in prediction. Defaults to `None`
+            which means running the eager PyTorch model.
+        label_token_store (LabelTokenStore, optional): The store of pre-tokenised labels for assembling input pairs in prediction.
+            Defaults to `None` which means tokenising every input pair.
+        inference_stats (dict): The accumulated number of pairs passed through the BERT model, the number of forward passes,
+            and the time (in seconds) spent on preparing inputs and on running the model in prediction.
     """
 
     def __init__(
@@ -55,8 +344,14 @@ class BERTSynonymClassifier:
         num_epochs_for_training: Optional[float] = None,
         batch_size_for_training: Optional[int] = None,
         batch_size_for_prediction: Optional[int] = None,
-        training_data: Optional[List[Tuple[str, str, int]]] = None,  # (sentence1, sentence2, label)
-        validation_data: Optional[List[Tuple[str, str, int]]] = None,
+        training_data: Optional[Union[List[Tuple[str, str, int]], Dataset]] = None,  # (sentence1, sentence2, label)
+        validation_data: Optional[Union[List[Tuple[str, str, int]], Dataset]] = None,
+        score_cache: Optional[SynonymScoreCache] = None,
+        max_tokens_for_prediction: Optional[int] = None,
+        num_workers_for_tokenization: int = 1,
+        tokenized_data_path: Optional[str] = None,
+        group_by_length: bool = False,
+        max_tokens_for_training: Optional[int] = None,
     ):
         # Load the pretrained BERT model from the given path
         self.loaded_path = loaded_path
@@ -72,12 +367,23 @@ class BERTSynonymClassifier:
         self.num_epochs_for_training = num_epochs_for_training
         self.batch_size_for_training = batch_size_for_training
         self.batch_size_for_prediction = batch_size_for_prediction
+        self.max_tokens_for_prediction = max_tokens_for_prediction
+        self.num_workers_for_tokenization = num_workers_for_tokenization
+        self.tokenized_data_path = tokenized_data_path
+        self.group_by_length = group_by_length
+        self.max_tokens_for_training = max_tokens_for_training
         self.training_data = None
         self.validation_data = None
         self.data_stat = {}
         self.training_args = None
         self.trainer = None
+        self.training_throughput = {}
         self.softmax = None
+        self.score_cache = score_cache
+        self.inference_backend = None
+        self.label_token_store = None
+        self.inference_stats = {"num_scored_pairs": 0, "num_forward_passes": 0, "preparation_time": 0.0, "inference_time": 0.0}
+        self._inference_stats_lock = threading.Lock()
 
         # load the pre-trained BERT model and set it to eval mode (static)
         if self.eval_mode:
@@ -94,10 +400,15 @@ class BERTSynonymClassifier:
             self.data_stat = {
                 "num_training": len(self.training_data),
                 "num_validation": len(self.validation_data),
+                "training_token_lengths": get_token_length_stats(self.training_data, self.max_length_for_input),
+                "validation_token_lengths": get_token_length_stats(self.validation_data, self.max_length_for_input),
             }
 
             # generate training arguments
-            epoch_steps = len(self.training_data) // self.batch_size_for_training  # total steps of an epoch
+            # total steps of an epoch (estimated with a token budget)
+            epoch_steps = get_num_training_batches(
+                self.training_data, self.batch_size_for_training, self.max_tokens_for_training
+            )
             if torch.cuda.device_count() > 0:
                 epoch_steps = epoch_steps // torch.cuda.device_count()  # to deal with multi-gpus case
             # keep logging steps consisitent even for small batch size
@@ -124,13 +435,15 @@ class BERTSynonymClassifier:
                 load_best_model_at_end=True,
             )
             # build the trainer
-            self.trainer = Trainer(
+            self.trainer = LengthGroupedTrainer(
                 model=self.model,
                 args=self.training_args,
                 train_dataset=self.training_data,
                 eval_dataset=self.validation_data,
                 compute_metrics=self.compute_metrics,
                 tokenizer=self.tokenizer._tokenizer,
+                group_by_length=self.group_by_length,
+                max_tokens_per_batch=self.max_tokens_for_training,
             )
 
     def train(self, resume_from_checkpoint: Optional[Union[bool, str]] = None):
@@ -138,6 +451,7 @@ class BERTSynonymClassifier:
         if self.eval_mode:
             raise RuntimeError("Training cannot be started in `eval` mode.")
         self.trainer.train(resume_from_checkpoint=resume_from_checkpoint)
+        self.training_throughput = self.trainer.get_throughput_report()
 
     def eval(self):
         """To eval mode."""
@@ -148,46 +462,212 @@ class BERTSynonymClassifier:
         self.model.to(self.device)
         self.softmax = torch.nn.Softmax(dim=1).to(self.device)
 
+    def set_inference_backend(self, backend: str = "eager", quantize: bool = False, export_path: Optional[str] = None):
+        """Set the inference backend for making predictions.
+
+        See [`SequenceClassifierBackend`][deeponto.utils.inference_utils.SequenceClassifierBackend].
+
+        Args:
+            backend (str, optional): The inference backend. Options are `["eager", "torchscript", "onnx"]`. Defaults to `"eager"`.
+            quantize (bool, optional): Whether to apply dynamic `int8` quantisation. Defaults to `False`.
+            export_path (str, optional): The directory for the exported ONNX model. Defaults to `None`.
+        """
+        if not self.eval_mode:
+            raise RuntimeError("Inference backend can only be set in `eval` mode.")
+        self.inference_backend = SequenceClassifierBackend(self.model, backend, quantize, export_path)
+
+    def get_logits(self, inputs):
+        """Compute the classification logits of the processed inputs with the inference backend if set."""
+        if self.inference_backend:
+            return self.inference_backend(inputs)
+        return self.model(**inputs).logits
+
     def predict(self, sent_pairs: List[Tuple[str, str]]):
         r"""Run prediction pipeline for synonym classification.
 
-        Return the `softmax` probailities of predicting pairs as synonyms (`index=1`).
+        Return the `softmax` probailities of predicting pairs as synonyms (`index=1`). If `score_cache` is set,
+        only the pairs that have not been scored before will be passed through the BERT model.
         """
-        inputs = self.process_inputs(sent_pairs)
-        with torch.no_grad():
-            return self.softmax(self.model(**inputs).logits)[:, 1]
-
-    def load_dataset(self, data: List[Tuple[str, str, int]], split: str) -> Dataset:
-        r"""Load the list of `(annotation1, annotation2, label)` samples into a `datasets.Dataset`."""
-
-        def iterate():
-            for sample in data:
-                yield {"annotation1": sample[0], "annotation2": sample[1], "labels": sample[2]}
-
-        dataset = Dataset.from_generator(iterate)
-        # NOTE: no padding here because the Trainer class supports dynamic padding
-        dataset = dataset.map(
-            lambda examples: self.tokenizer._tokenizer(
-                examples["annotation1"], examples["annotation2"], max_length=self.max_length_for_input, truncation=True
-            ),
-            batched=True,
+        return self.predict_prepared(self.prepare_inputs(sent_pairs))
+
+    def prepare_inputs(self, sent_pairs: List[Tuple[str, str]]) -> dict:
+        r"""Prepare the input pairs for prediction (score cache lookup and tokenisation) without running the BERT model.
+
+        This is separated from [`predict_prepared`][deeponto.align.bertmap.bert_classifier.BERTSynonymClassifier.predict_prepared]
+        such that the inputs of the next batch can be prepared (e.g., in a background thread) while the BERT model
+        is running on the current batch.
+
+        If `max_tokens_for_prediction` is set, the pairs are sorted by their tokenised lengths and split
+        into sub-batches of at most `max_tokens_for_prediction` padded tokens.
+        """
+        start_time = time.perf_counter()
+        cached_scores, uncached_pairs = None, sent_pairs
+        if self.score_cache is not None:
+            cached_scores = self.score_cache.lookup(sent_pairs)
+            # collect the unique annotation pairs that have not been scored before
+            uncached_pairs = dict()
+            for pair, score in zip(sent_pairs, cached_scores):
+                if score is None:
+                    uncached_pairs.setdefault(self.score_cache.get_key(pair), pair)
+            uncached_pairs = list(uncached_pairs.values())
+
+        batches = []
+        if uncached_pairs and not self.max_tokens_for_prediction:
+            batches.append((None, self.process_inputs(uncached_pairs)))
+        elif uncached_pairs:
+            # tokenise without padding to obtain the length of each input
+            features = self.encode_inputs(uncached_pairs)
+            lengths = [len(feature["input_ids"]) for feature in features]
+            for batch_idxs in self.get_length_bucketed_batches(lengths, self.max_tokens_for_prediction):
+                inputs = self.pad_inputs([features[i] for i in batch_idxs])
+                batches.append((torch.from_numpy(batch_idxs).to(self.device), inputs))
+        self.update_inference_stats(preparation_time=time.perf_counter() - start_time)
+        return {
+            "sent_pairs": sent_pairs,
+            "cached_scores": cached_scores,
+            "uncached_pairs": uncached_pairs,
+            "batches": batches,
+        }
+
+    def predict_prepared(self, prepared_inputs: dict):
+        r"""Compute the synonym scores of the input pairs prepared by
+        [`prepare_inputs`][deeponto.align.bertmap.bert_classifier.BERTSynonymClassifier.prepare_inputs] with the BERT model.
+
+        The output scores follow the original order of the input pairs.
+        """
+        start_time = time.perf_counter()
+        uncached_pairs, batches = prepared_inputs["uncached_pairs"], prepared_inputs["batches"]
+        new_scores = dict()
+        if self.score_cache is not None and uncached_pairs:
+            # NOTE: the previous batches (e.g., sharing pairs with this one) may have been scored after this batch was
+            # prepared; as batches are scored in order, looking up again ensures that no pair is scored twice
+            late_scores = self.score_cache.lookup_pending(uncached_pairs)
+            unscored = np.array([score is None for score in late_scores])
+            if not unscored.all():
+                new_scores = {
+                    self.score_cache.get_key(pair): score
+                    for pair, score in zip(uncached_pairs, late_scores)
+                    if score is not None
+                }
+                batches = self.select_prepared_inputs(batches, unscored)
+                uncached_pairs = [pair for pair, u in zip(uncached_pairs, unscored) if u]
+        if len(batches) == 1 and batches[0][0] is None:
+            with torch.no_grad():
+                uncached_scores = self.softmax(self.get_logits(batches[0][1]))[:, 1]
+        else:
+            uncached_scores = torch.empty(len(uncached_pairs), dtype=torch.float, device=self.device)
+            for batch_idxs, inputs in batches:
+                with torch.no_grad():
+                    uncached_scores[batch_idxs] = self.softmax(self.get_logits(inputs))[:, 1]
+        if self.device.type == "cuda":
+            # wait for the kernels to finish such that the inference time is measured
+            torch.cuda.synchronize(self.device)
+        self.update_inference_stats(
+            num_scored_pairs=len(uncached_pairs),
+            num_forward_passes=len(batches),
+            inference_time=time.perf_counter() - start_time,
+        )
+
+        cached_scores = prepared_inputs["cached_scores"]
+        if cached_scores is None:
+            return uncached_scores
+        if uncached_pairs:
+            uncached_scores = uncached_scores.tolist()
+            self.score_cache.update(uncached_pairs, uncached_scores)
+            new_scores.update(zip([self.score_cache.get_key(p) for p in uncached_pairs], uncached_scores))
+        if new_scores:
+            cached_scores = [
+                new_scores[self.score_cache.get_key(pair)] if score is None else score
+                for pair, score in zip(prepared_inputs["sent_pairs"], cached_scores)
+            ]
+        return torch.tensor(cached_scores, dtype=torch.float, device=self.device)
+
+    def select_prepared_inputs(self, batches: List[tuple], keep: np.ndarray) -> List[tuple]:
+        r"""Select the kept inputs of the prepared batches, where `keep` is the boolean mask of the (uncached) input pairs;
+        the batch indices are re-numbered among the kept input pairs."""
+        new_idxs = np.cumsum(keep) - 1
+        selected_batches = []
+        for batch_idxs, inputs in batches:
+            idxs = np.arange(len(keep)) if batch_idxs is None else batch_idxs.cpu().numpy()
+            rows = np.flatnonzero(keep[idxs])
+            if len(rows) == 0:
+                continue
+            rows_tensor = torch.from_numpy(rows).to(self.device)
+            selected_inputs = BatchEncoding({k: v[rows_tensor] for k, v in inputs.items()})
+            selected_batches.append((torch.from_numpy(new_idxs[idxs[rows]]).to(self.device), selected_inputs))
+        return selected_batches
+
+    def update_inference_stats(self, **increments):
+        """Accumulate the inference statistics (thread-safe as inputs can be prepared in background threads)."""
+        with self._inference_stats_lock:
+            for k, v in increments.items():
+                self.inference_stats[k] += v
+
+    @staticmethod
+    def get_length_bucketed_batches(lengths: List[int], max_tokens: int) -> List[np.ndarray]:
+        r"""Group input indices into batches of similar lengths such that each batch has at most `max_tokens`
+        tokens after padding (a single input longer than `max_tokens` forms a batch on its own; see
+        [`split_by_token_budget`][deeponto.utils.training_utils.split_by_token_budget]).
+
+        Args:
+            lengths (List[int]): The tokenised length of each input.
+            max_tokens (int): The maximum number of padded tokens in a batch, i.e., $\max(lengths) \times |batch|$.
+
+        Returns:
+            (List[np.ndarray]): A list of batches of input indices.
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        return split_by_token_budget(np.argsort(-lengths, kind="stable"), lengths, max_tokens)
+
+    def load_dataset(self, data: Union[List[Tuple[str, str, int]], Dataset], split: str) -> Dataset:
+        r"""Load the list of `(annotation1, annotation2, label)` samples (or a `datasets.Dataset` with these columns,
+        e.g., memory-mapped from an Arrow file) into a tokenised `datasets.Dataset`.
+
+        The tokenised dataset is cached on disk and fingerprinted by the data, the tokenizer and `max_length_for_input`
+        (see [`tokenize_pair_dataset`][deeponto.utils.training_utils.tokenize_pair_dataset]).
+        """
+        return tokenize_pair_dataset(
+            data,
+            self.tokenizer._tokenizer,
+            self.max_length_for_input,
+            text_columns=("annotation1", "annotation2"),
+            cache_path=self.tokenized_data_path,
+            num_proc=self.num_workers_for_tokenization,
             desc=f"Load {split} data:",
         )
-        return dataset
 
     def process_inputs(self, sent_pairs: List[Tuple[str, str]]):
         r"""Process input sentence pairs for the BERT model.
 
         Transform the sentences into BERT input embeddings and load them into the device.
         This function is called only when the BERT model is about to make predictions (`eval` mode).
+        If `label_token_store` is set, the inputs are assembled from the pre-tokenised labels.
         """
-        return self.tokenizer._tokenizer(
-            sent_pairs,
-            return_tensors="pt",
-            max_length=self.max_length_for_input,
-            padding=True,
-            truncation=True,
-        ).to(self.device)
+        if self.label_token_store is not None:
+            return self.label_token_store.collate(sent_pairs).to(self.device)
+        with get_tokenizer_lock(self.tokenizer._tokenizer):
+            inputs = self.tokenizer._tokenizer(
+                sent_pairs,
+                return_tensors="pt",
+                max_length=self.max_length_for_input,
+                padding=True,
+                truncation=True,
+            )
+        return inputs.to(self.device)
+
+    def encode_inputs(self, sent_pairs: List[Tuple[str, str]]) -> List[dict]:
+        r"""Process input sentence pairs into unpadded BERT inputs (from the pre-tokenised labels if `label_token_store` is set)."""
+        if self.label_token_store is not None:
+            return self.label_token_store.encode(sent_pairs)
+        with get_tokenizer_lock(self.tokenizer._tokenizer):
+            encodings = self.tokenizer._tokenizer(sent_pairs, max_length=self.max_length_for_input, truncation=True)
+        return [{k: encodings[k][i] for k in encodings.keys()} for i in range(len(sent_pairs))]
+
+    def pad_inputs(self, features: List[dict]):
+        r"""Pad the unpadded BERT inputs into tensors and load them into the device."""
+        if self.label_token_store is not None:
+            return self.label_token_store.pad(features).to(self.device)
+        return self.tokenizer._tokenizer.pad(features, return_tensors="pt").to(self.device)
 
     @staticmethod
     def compute_metrics(pred):
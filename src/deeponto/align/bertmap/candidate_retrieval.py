@@ -0,0 +1,188 @@
+# Copyright 2021 Yuan He. All rights reserved.
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import defaultdict
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from deeponto.utils import create_path, load_file, save_file
+
+
+class DenseCandidateRetriever:
+    r"""Class for the dense (bi-encoder) candidate retrieval stage of $\textsf{BERTMap}$.
+
+    The sub-word inverted index misses target classes that are synonymous but share no sub-word tokens with
+    a source class. This retriever embeds all the target class annotations once with a sentence encoder
+    (mean pooling over the last hidden states), caches the normalised embeddings as a memory-mapped
+    `float16` matrix, and retrieves the top $k$ target classes for source classes by batched matrix products,
+    where a class pair is scored by the **maximum** cosine similarity of their annotations.
+
+    Attributes:
+        encoder_path (str): The path to the (sentence) encoder model.
+        cache_path (str): The directory for caching the target annotation embeddings.
+        batch_size (int): The batch size for encoding annotations.
+        max_length (int): The maximum length of an encoded annotation.
+        chunk_size (int): The (approximate) number of target annotations scored in a matrix product.
+        tgt_class_iris (List[str]): The target class IRIs in the index.
+        tgt_embeddings (np.memmap): The normalised `float16` embeddings of target annotations (grouped by class).
+        tgt_class_offsets (np.ndarray): The offset of each target class's annotations in `tgt_embeddings`.
+    """
+
+    def __init__(
+        self,
+        encoder_path: str,
+        cache_path: str,
+        batch_size: int = 256,
+        max_length: int = 64,
+        chunk_size: int = 65536,
+        device: torch.device | None = None,
+    ):
+        self.encoder_path = encoder_path
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.chunk_size = chunk_size
+        self.device = device or (torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu"))
+        self.tokenizer = AutoTokenizer.from_pretrained(self.encoder_path)
+        self.encoder = AutoModel.from_pretrained(self.encoder_path).to(self.device)
+        self.encoder.eval()
+
+        self.tgt_class_iris = []
+        self.tgt_embeddings = None
+        self.tgt_class_offsets = None
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Encode texts into normalised `float32` embeddings by mean pooling over the last hidden states."""
+        embeddings = []
+        for i in range(0, len(texts), self.batch_size):
+            inputs = self.tokenizer(
+                texts[i : i + self.batch_size],
+                max_length=self.max_length,
+                truncation=True,
+                padding=True,
+                return_tensors="pt",
+            ).to(self.device)
+            with torch.no_grad():
+                hidden_states = self.encoder(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden_states.dtype)
+            batch_embeddings = (hidden_states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            batch_embeddings = torch.nn.functional.normalize(batch_embeddings, dim=-1)
+            embeddings.append(batch_embeddings.float().cpu().numpy())
+        if not embeddings:
+            return np.zeros((0, self.encoder.config.hidden_size), dtype=np.float32)
+        return np.concatenate(embeddings)
+
+    def build_index(self, tgt_annotation_index: dict):
+        r"""Embed the target class annotations, or load their cached embeddings if built from the same
+        annotations and encoder before.
+
+        Args:
+            tgt_annotation_index (dict): A dictionary that stores the `(class_iri, class_annotations)` pairs of the target ontology.
+        """
+        self.tgt_class_iris = [iri for iri, annotations in tgt_annotation_index.items() if annotations]
+        # NOTE: sort the annotations because the iteration order of a set of strings varies across processes
+        tgt_annotations = [sorted(tgt_annotation_index[iri]) for iri in self.tgt_class_iris]
+        self.tgt_class_offsets = np.cumsum([0] + [len(a) for a in tgt_annotations[:-1]]).astype(np.int64)
+        flat_annotations = [a for class_annotations in tgt_annotations for a in class_annotations]
+
+        fingerprint = hashlib.sha256()
+        fingerprint.update(self.encoder_path.encode())
+        for iri, class_annotations in zip(self.tgt_class_iris, tgt_annotations):
+            fingerprint.update("\t".join([iri] + class_annotations).encode() + b"\n")
+        meta = {
+            "encoder_path": self.encoder_path,
+            "fingerprint": fingerprint.hexdigest(),
+            "shape": [len(flat_annotations), self.encoder.config.hidden_size],
+        }
+
+        meta_file = os.path.join(self.cache_path, "meta.json")
+        embeddings_file = os.path.join(self.cache_path, "tgt_embeddings.f16")
+        if not (os.path.exists(meta_file) and os.path.exists(embeddings_file) and load_file(meta_file) == meta):
+            create_path(self.cache_path)
+            embeddings = np.memmap(embeddings_file, dtype=np.float16, mode="w+", shape=tuple(meta["shape"]))
+            # encode in chunks to keep the memory usage bounded
+            for i in range(0, len(flat_annotations), self.chunk_size):
+                embeddings[i : i + self.chunk_size] = self.encode(flat_annotations[i : i + self.chunk_size])
+            embeddings.flush()
+            del embeddings
+            save_file(meta, meta_file)
+        self.tgt_embeddings = np.memmap(embeddings_file, dtype=np.float16, mode="r", shape=tuple(meta["shape"]))
+
+    def retrieve(self, src_classes_annotations: list[set[str]], k: int) -> list[list[tuple[str, float]]]:
+        r"""Retrieve the top $k$ target classes for each of the input source classes.
+
+        Args:
+            src_classes_annotations (List[Set[str]]): The annotations of each source class.
+            k (int): The number of target classes retrieved for each source class.
+
+        Returns:
+            (List[List[Tuple[str, float]]]): The `(tgt_class_iri, similarity)` pairs in descending order of similarity for each source class.
+        """
+        if self.tgt_embeddings is None:
+            raise RuntimeError("The target index has not been built; call `build_index` first.")
+        results = [[] for _ in src_classes_annotations]
+        src_idxs = [i for i, annotations in enumerate(src_classes_annotations) if annotations]
+        src_annotations = [sorted(src_classes_annotations[i]) for i in src_idxs]
+        src_offsets = np.cumsum([0] + [len(a) for a in src_annotations[:-1]]).astype(np.int64)
+        flat_src_annotations = [a for annotations in src_annotations for a in annotations]
+        num_tgt_classes = len(self.tgt_class_iris)
+        if not flat_src_annotations or num_tgt_classes == 0:
+            return results
+
+        src_embeddings = self.encode(flat_src_annotations)
+        class_scores = np.empty((len(src_annotations), num_tgt_classes), dtype=np.float32)
+        tgt_class_ends = np.append(self.tgt_class_offsets[1:], len(self.tgt_embeddings))
+        start_class = 0
+        while start_class < num_tgt_classes:
+            # chunks are aligned with class boundaries so that each class is reduced within a chunk
+            end_class = max(
+                start_class + 1,
+                int(np.searchsorted(tgt_class_ends, self.tgt_class_offsets[start_class] + self.chunk_size, side="right")),
+            )
+            start, end = self.tgt_class_offsets[start_class], tgt_class_ends[end_class - 1]
+            sim_matrix = src_embeddings @ np.asarray(self.tgt_embeddings[start:end], dtype=np.float32).T
+            # maximum over the annotations of each target class and then of each source class
+            sim_matrix = np.maximum.reduceat(sim_matrix, self.tgt_class_offsets[start_class:end_class] - start, axis=1)
+            class_scores[:, start_class:end_class] = np.maximum.reduceat(sim_matrix, src_offsets, axis=0)
+            start_class = end_class
+
+        k = min(k, num_tgt_classes)
+        for row, i in enumerate(src_idxs):
+            top_idxs = np.argpartition(-class_scores[row], k - 1)[:k]
+            top_idxs = top_idxs[np.argsort(-class_scores[row][top_idxs], kind="stable")]
+            results[i] = [(self.tgt_class_iris[j], float(class_scores[row][j])) for j in top_idxs]
+        return results
+
+    @staticmethod
+    def reciprocal_rank_fusion(*candidate_lists: list[tuple[str, float]], rrf_k: int = 60) -> list[tuple[str, float]]:
+        r"""Fuse ranked candidate lists by the reciprocal rank fusion score $\sum_{l} \frac{1}{k + rank_l(c)}$.
+
+        Args:
+            *candidate_lists (List[Tuple[str, float]]): Ranked lists of `(candidate, score)` pairs.
+            rrf_k (int, optional): The rank offset $k$ that dampens the impact of top ranks. Defaults to `60`.
+
+        Returns:
+            (List[Tuple[str, float]]): The fused list of `(candidate, fused_score)` pairs in descending order of fused scores.
+        """
+        fused_scores = defaultdict(float)
+        for candidate_list in candidate_lists:
+            for rank, (candidate, _) in enumerate(candidate_list, start=1):
+                fused_scores[candidate] += 1.0 / (rrf_k + rank)
+        return sorted(fused_scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,256 @@
+# Copyright 2021 Yuan He. All rights reserved.
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import copy
+import tempfile
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, TrainingArguments
+
+from deeponto.utils.training_utils import LengthGroupedTrainer, get_num_training_batches, tokenize_pair_dataset
+
+from .bert_classifier import BERTSynonymClassifier
+
+
+class DistillationTrainer(LengthGroupedTrainer):
+    r"""Trainer of a student synonym classifier with the soft targets given by the synonym scores of a teacher.
+
+    The loss is $\alpha \cdot T^2 \cdot \mathrm{BCE}(\sigma(z_s / T), \sigma(z_t / T)) + (1 - \alpha) \cdot \mathrm{CE}(s, y)$
+    where $z_s$ and $z_t$ are the synonym logit margins (i.e., $\mathrm{logit}_1 - \mathrm{logit}_0$) of the student and the
+    teacher, $T$ is the temperature, and the hard loss is only computed on the labelled pairs (with `labels` other than `-100`).
+    For two classes, the soft loss is the (temperature-scaled) cross-entropy between the softmax distributions of both models.
+
+    Attributes:
+        temperature (float): The temperature for softening the student and the teacher distributions.
+        alpha (float): The weight of the soft loss against the hard loss.
+    """
+
+    def __init__(self, *args, temperature: float = 2.0, alpha: float = 0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.temperature = temperature
+        self.alpha = alpha
+
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        labels = inputs.pop("labels")
+        teacher_scores = inputs.pop("teacher_scores")
+        outputs = model(**inputs)
+        loss = self.distillation_loss(outputs.logits, teacher_scores, labels, self.temperature, self.alpha)
+        return (loss, outputs) if return_outputs else loss
+
+    @staticmethod
+    def distillation_loss(
+        logits: torch.Tensor, teacher_scores: torch.Tensor, labels: torch.Tensor, temperature: float, alpha: float
+    ) -> torch.Tensor:
+        """Compute the distillation loss from the student logits, the teacher synonym scores and the (partial) labels."""
+        margins = logits[:, 1] - logits[:, 0]
+        teacher_margins = torch.logit(teacher_scores.float(), eps=1e-6)
+        loss = F.binary_cross_entropy_with_logits(
+            margins / temperature, torch.sigmoid(teacher_margins / temperature)
+        ) * (temperature**2)
+        labelled = labels >= 0
+        if alpha < 1.0 and labelled.any():
+            loss = alpha * loss + (1 - alpha) * F.cross_entropy(logits[labelled], labels[labelled])
+        return loss
+
+
+class SynonymClassifierDistiller:
+    r"""Class for distilling the fine-tuned BERT synonym classifier (the **teacher**) of $\textsf{BERTMap}$ into a compact
+    **student** classifier for faster (CPU) inference in global matching and mapping extension.
+
+    The student is either a compact pre-trained model (e.g., a small BERT sharing nothing but the task with the teacher),
+    or initialised from the teacher by keeping `num_student_layers` evenly spaced transformer layers (the first and the
+    last included). It is trained on the text semantics samples and the annotation pairs of target class candidates, both
+    scored by the teacher (see [`DistillationTrainer`][deeponto.align.bertmap.distillation.DistillationTrainer]), and saved
+    as an ordinary checkpoint that can be loaded by [`BERTSynonymClassifier`][deeponto.align.bertmap.bert_classifier.BERTSynonymClassifier].
+
+    Attributes:
+        teacher (BERTSynonymClassifier): The fine-tuned BERT synonym classifier in `eval` mode.
+        student_path (str): The output directory of the student checkpoint.
+        max_length_for_input (int): The maximum length of an input sequence.
+        student_pretrained_path (str, optional): The path to a compact pre-trained model as the student. Defaults to `None`
+            which means initialising the student from the teacher's layers.
+        num_student_layers (int): The number of transformer layers kept from the teacher. Defaults to `4`.
+        temperature (float): The distillation temperature. Defaults to `2.0`.
+        alpha (float): The weight of the soft (teacher) loss against the hard (label) loss. Defaults to `0.5`.
+        num_epochs_for_training (float): The number of training epochs. Defaults to `3.0`.
+        batch_size_for_training (int): The training batch size. Defaults to `32`.
+        learning_rate (float): The learning rate. Defaults to `1e-4`.
+        group_by_length (bool): Whether to group training inputs of similar lengths into batches. Defaults to `True`.
+        seed (int): The random seed of training. Defaults to `42`.
+        training_throughput (dict): The training throughput and padding ratio of the last distillation.
+    """
+
+    def __init__(
+        self,
+        teacher: BERTSynonymClassifier,
+        student_path: str,
+        max_length_for_input: int,
+        student_pretrained_path: str | None = None,
+        num_student_layers: int = 4,
+        temperature: float = 2.0,
+        alpha: float = 0.5,
+        num_epochs_for_training: float = 3.0,
+        batch_size_for_training: int = 32,
+        learning_rate: float = 1e-4,
+        group_by_length: bool = True,
+        seed: int = 42,
+    ):
+        self.teacher = teacher
+        self.student_path = student_path
+        self.max_length_for_input = max_length_for_input
+        self.student_pretrained_path = student_pretrained_path
+        self.num_student_layers = num_student_layers
+        self.temperature = temperature
+        self.alpha = alpha
+        self.num_epochs_for_training = num_epochs_for_training
+        self.batch_size_for_training = batch_size_for_training
+        self.learning_rate = learning_rate
+        self.group_by_length = group_by_length
+        self.seed = seed
+        self.training_throughput = {}
+
+    def load_student(self):
+        """Load the (untrained) student model and its tokenizer."""
+        if self.student_pretrained_path:
+            print(f"Loading a compact student model from: {self.student_pretrained_path}.")
+            model = AutoModelForSequenceClassification.from_pretrained(self.student_pretrained_path, num_labels=2)
+            tokenizer = AutoTokenizer.from_pretrained(self.student_pretrained_path)
+        else:
+            print(f"Initialising a student model with {self.num_student_layers} layers of the teacher model.")
+            model = self.build_student_model(self.teacher.model, self.num_student_layers)
+            tokenizer = self.teacher.tokenizer._tokenizer
+        return model, tokenizer
+
+    @staticmethod
+    def build_student_model(teacher_model, num_layers: int):
+        r"""Build a student model by copying the teacher model (e.g., BERT) with `num_layers` evenly spaced encoder layers."""
+        student_model = copy.deepcopy(teacher_model).cpu()
+        student_model.config.output_hidden_states = False
+        encoder = getattr(student_model.base_model, "encoder", None)
+        layers = getattr(encoder, "layer", None)
+        if layers is None:
+            raise ValueError(
+                f"Cannot find the encoder layers of {type(teacher_model).__name__}; specify a pre-trained student model instead."
+            )
+        if not 0 < num_layers <= len(layers):
+            raise ValueError(f"The number of student layers should be between 1 and {len(layers)}, got {num_layers}.")
+        kept_layers = np.unique(np.linspace(0, len(layers) - 1, num_layers).round().astype(int))
+        encoder.layer = torch.nn.ModuleList([layers[i] for i in kept_layers])
+        student_model.config.num_hidden_layers = len(kept_layers)
+        return student_model
+
+    def distill(
+        self,
+        annotation_pairs: list[tuple[str, str]],
+        teacher_scores: np.ndarray,
+        labels: list[int | None] | None = None,
+    ):
+        r"""Train the student on the annotation pairs scored by the teacher and save it at `student_path`.
+
+        Args:
+            annotation_pairs (List[Tuple[str, str]]): The annotation pairs for distillation.
+            teacher_scores (np.ndarray): The synonym scores of the annotation pairs given by the teacher.
+            labels (List[Optional[int]], optional): The synonym labels of the annotation pairs, where `None` stands for
+                an unlabelled pair (e.g., a target class candidate). Defaults to `None` which means no labels at all.
+        """
+        if labels is None:
+            labels = [None] * len(annotation_pairs)
+        model, tokenizer = self.load_student()
+        samples = [(left, right, -100 if label is None else int(label)) for (left, right), label in zip(annotation_pairs, labels)]
+        # the tokenised distillation data are temporary such that only the student checkpoint is saved
+        with tempfile.TemporaryDirectory() as data_path:
+            training_data = tokenize_pair_dataset(
+                samples, tokenizer, self.max_length_for_input, cache_path=data_path, desc="Load distillation data:"
+            )
+            training_data = training_data.add_column(
+                "teacher_scores", np.asarray(teacher_scores, dtype=np.float32).tolist()
+            )
+            # report logging on every 0.02 epoch as the fine-tuning does
+            epoch_steps = get_num_training_batches(training_data, self.batch_size_for_training)
+            training_args = TrainingArguments(
+                output_dir=self.student_path,
+                num_train_epochs=self.num_epochs_for_training,
+                per_device_train_batch_size=self.batch_size_for_training,
+                learning_rate=self.learning_rate,
+                warmup_ratio=0.0,
+                weight_decay=0.01,
+                logging_steps=max(1, int(epoch_steps * 0.02)),
+                logging_dir=f"{self.student_path}/tensorboard",
+                save_strategy="no",
+                label_names=["labels", "teacher_scores"],
+                seed=self.seed,
+            )
+            trainer = DistillationTrainer(
+                model=model,
+                args=training_args,
+                train_dataset=training_data,
+                tokenizer=tokenizer,
+                group_by_length=self.group_by_length,
+                temperature=self.temperature,
+                alpha=self.alpha,
+            )
+            trainer.train()
+        self.training_throughput = trainer.get_throughput_report()
+        trainer.save_model(self.student_path)
+        tokenizer.save_pretrained(self.student_path)
+
+    @staticmethod
+    def speed_accuracy_report(
+        teacher: BERTSynonymClassifier,
+        student: BERTSynonymClassifier,
+        annotation_pairs: list[tuple[str, str]],
+        labels: list[int],
+        batch_size: int = 128,
+    ) -> dict:
+        r"""Compare the accuracy and the inference throughput of the teacher and the student on labelled annotation pairs.
+
+        The throughput is measured on the forward passes of the eager PyTorch models (i.e., excluding tokenisation,
+        the score cache and the inference backends) in batches of `batch_size`.
+
+        Returns:
+            (dict): The accuracy, throughput and number of parameters of both models, the agreement of their predictions,
+                the mean absolute difference of their synonym scores, and the speedup of the student.
+        """
+        labels = np.asarray(labels)
+        results, scores = dict(), dict()
+        for name, classifier in [("teacher", teacher), ("student", student)]:
+            batch_scores, inference_time = [], 0.0
+            for i in range(0, len(annotation_pairs), batch_size):
+                inputs = classifier.tokenizer._tokenizer(
+                    annotation_pairs[i : i + batch_size],
+                    return_tensors="pt",
+                    max_length=classifier.max_length_for_input,
+                    padding=True,
+                    truncation=True,
+                ).to(classifier.device)
+                start_time = time.perf_counter()
+                with torch.no_grad():
+                    batch_scores.append(classifier.softmax(classifier.model(**inputs).logits)[:, 1].cpu().numpy())
+                inference_time += time.perf_counter() - start_time
+            scores[name] = np.concatenate(batch_scores) if batch_scores else np.zeros(0, dtype=np.float32)
+            results[name] = {
+                "accuracy": round(float(((scores[name] > 0.5) == labels).mean()), 4) if len(labels) else None,
+                "pairs_per_second": round(len(annotation_pairs) / max(inference_time, 1e-9), 2),
+                "num_parameters": sum(p.numel() for p in classifier.model.parameters()),
+            }
+        results["num_pairs"] = len(annotation_pairs)
+        if len(annotation_pairs):
+            results["agreement"] = round(float(((scores["teacher"] > 0.5) == (scores["student"] > 0.5)).mean()), 4)
+            results["mean_absolute_score_difference"] = round(float(np.abs(scores["teacher"] - scores["student"]).mean()), 4)
+        results["speedup"] = round(results["student"]["pairs_per_second"] / max(results["teacher"]["pairs_per_second"], 1e-9), 2)
+        return results
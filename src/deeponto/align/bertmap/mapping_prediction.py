@@ -14,12 +14,17 @@
 
 from __future__ import annotations
 
-from typing import Optional, List, Set
+from typing import Optional, List, Set, Iterator, AsyncIterator
 from yacs.config import CfgNode
 import os
-from textdistance import levenshtein
+import asyncio
+import math
+import random
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import JaroWinkler, Levenshtein
 from logging import Logger
 import itertools
+import numpy as np
 import torch
 import pandas as pd
 import enlighten
@@ -28,8 +33,16 @@ import warnings
 
 from deeponto.align.mapping import EntityMapping
 from deeponto.onto import Ontology
-from deeponto.utils import Tokenizer, create_path, load_file, save_file
+from deeponto.utils import Tokenizer, create_path, load_file, save_file, print_dict, prefetch_map
 from .bert_classifier import BERTSynonymClassifier
+from .candidate_retrieval import DenseCandidateRetriever
+
+# lexical scorers of `rapidfuzz` and the factors for normalising their scores into [0, 1]
+LEXICAL_SCORERS = {
+    "levenshtein": (Levenshtein.normalized_similarity, 1.0),
+    "jaro_winkler": (JaroWinkler.normalized_similarity, 1.0),
+    "token_set_ratio": (fuzz.token_set_ratio, 100.0),
+}
 
 
 # @paper(
@@ -48,7 +61,25 @@ class MappingPredictor:
         num_raw_candidates (int): The maximum number of selected target class candidates for a source class.
         num_best_predictions (int): The maximum number of best scored mappings presevred for a source class.
         batch_size_for_prediction (int): The batch size of class annotation pairs for computing synonym scores.
+        num_prefetch_workers (int): The number of threads that build and tokenise the next batches of class annotation pairs while
+            the BERT model is running on the current batch; `0` means no pipelining. Defaults to `1`.
+        max_prefetched_batches (int): The maximum number of batches prepared ahead of the BERT model. Defaults to `2`.
         ignored_class_index (dict): OAEI arguemnt, a dictionary that stores the `(class_iri, used_in_alignment)` pairs.
+        lexical_scorer (str, optional): The lexical scorer for ranking target class candidates when there is no BERT synonym classifier
+            (as in $\textsf{BERTMapLt}$). Options are `["levenshtein", "jaro_winkler", "token_set_ratio"]`. Defaults to `None` which
+            means only string-matched mappings are predicted.
+        num_workers_for_lexical_scoring (int): The number of threads for computing lexical scores (`-1` means all CPU cores). Defaults to `1`.
+        dense_candidate_retriever (DenseCandidateRetriever, optional): The dense retriever whose target class candidates are fused with
+            those selected by the inverted index. Defaults to `None`.
+        num_dense_candidates (int): The number of target class candidates retrieved by `dense_candidate_retriever`. Defaults to `50`.
+        num_src_classes_per_dense_query (int): The number of source classes whose dense candidates are retrieved together in
+            batched matrix products (one pass over the target embeddings). Defaults to `256`.
+        rrf_k (int): The rank offset of the reciprocal rank fusion of candidate lists. Defaults to `60`.
+        cascade_config (CfgNode, optional): The configuration of cascaded early-exit BERT matching (see
+            [`cascade_bert_match`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.cascade_bert_match]). Defaults to `None` which
+            means every annotation pair of every candidate is scored by the BERT synonym classifier.
+        cascade_stats (dict): The statistics of cascaded BERT matching, including the ratio of scored annotation pairs and the recall
+            against full scoring measured on sampled source classes.
     """
 
     def __init__(
@@ -65,6 +96,15 @@ class MappingPredictor:
         enlighten_manager: enlighten.Manager,
         enlighten_status: enlighten.StatusBar,
         ignored_class_index: Optional[dict] = None,
+        lexical_scorer: str | None = None,
+        num_workers_for_lexical_scoring: int = 1,
+        dense_candidate_retriever: DenseCandidateRetriever | None = None,
+        num_dense_candidates: int = 50,
+        rrf_k: int = 60,
+        cascade_config: CfgNode | None = None,
+        num_prefetch_workers: int = 1,
+        max_prefetched_batches: int = 2,
+        num_src_classes_per_dense_query: int = 256,
     ):
         self.logger = logger
         self.enlighten_manager = enlighten_manager
@@ -83,11 +123,38 @@ class MappingPredictor:
         self.num_raw_candidates = num_raw_candidates
         self.num_best_predictions = num_best_predictions
         self.batch_size_for_prediction = batch_size_for_prediction
+        self.num_prefetch_workers = num_prefetch_workers
+        self.max_prefetched_batches = max_prefetched_batches
         self.output_path = output_path
         
         # for the OAEI, adding in check for classes that are not used in alignment
         self.ignored_class_index = ignored_class_index
 
+        if lexical_scorer is not None and lexical_scorer not in LEXICAL_SCORERS:
+            raise ValueError(f"Unknown lexical scorer {lexical_scorer}; options are {list(LEXICAL_SCORERS.keys())}.")
+        self.lexical_scorer = lexical_scorer
+        self.num_workers_for_lexical_scoring = num_workers_for_lexical_scoring
+
+        self.dense_candidate_retriever = dense_candidate_retriever
+        self.num_dense_candidates = num_dense_candidates
+        self.rrf_k = rrf_k
+        self.num_src_classes_per_dense_query = num_src_classes_per_dense_query
+        # the dense candidates of the source classes being matched, retrieved in batches
+        self.dense_candidates = dict()
+        if self.dense_candidate_retriever:
+            self.logger.info("Build dense annotation index for candidate retrieval.")
+            self.dense_candidate_retriever.build_index(self.tgt_annotation_index)
+
+        self.cascade_config = cascade_config if (cascade_config and cascade_config.enabled) else None
+        self.cascade_stats = {
+            "num_scored_pairs": 0,
+            "num_total_pairs": 0,
+            "num_checked_classes": 0,
+            "num_full_mappings": 0,
+            "num_recalled_mappings": 0,
+        }
+        self._cascade_rng = random.Random(cascade_config.seed if self.cascade_config else 0)
+
         self.init_class_mapping = lambda head, tail, score: EntityMapping(head, tail, "<EquivalentTo>", score)
 
     def bert_mapping_score(
@@ -102,24 +169,38 @@ class MappingPredictor:
         the **average** score as the mapping score. Apply string matching before applying the
         BERT module to filter easy mappings (with scores $1.0$).
         """
-        
-        if not src_class_annotations or not tgt_class_annotations:
-            warnings.warn("Return zero score due to empty input class annotations...")
-            return 0.0
-        
-        # apply string matching before applying the bert module
-        prelim_score = self.edit_similarity_mapping_score(
-            src_class_annotations,
-            tgt_class_annotations,
-            string_match_only=True,
-        )
-        if prelim_score == 1.0:
-            return prelim_score
-        # apply BERT classifier and define mapping score := Average(SynonymScores)
-        class_annotation_pairs = list(itertools.product(src_class_annotations, tgt_class_annotations))
-        synonym_scores = self.bert_synonym_classifier.predict(class_annotation_pairs)
-        # only one element tensor is able to be extracted as a scalar by .item()
-        return float(torch.mean(synonym_scores).item())
+        return self.bert_mapping_scores([(src_class_annotations, tgt_class_annotations)])[0]
+
+    def bert_mapping_scores(self, class_annotation_pairs: list[tuple[set[str], set[str]]]) -> list[float]:
+        r"""The batched version of [`bert_mapping_score`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.bert_mapping_score].
+
+        Class pairs with an exact string match get scores $1.0$; the annotation pairs of all the other
+        class pairs are packed into batches of `batch_size_for_prediction` for the BERT synonym classifier,
+        and the synonym scores are then **averaged** per class pair.
+        """
+        mapping_scores = np.zeros(len(class_annotation_pairs))
+        bert_idxs, annotation_pairs, nums = [], [], []
+        num_empty = 0
+        for i, (src_class_annotations, tgt_class_annotations) in enumerate(class_annotation_pairs):
+            if not src_class_annotations or not tgt_class_annotations:
+                num_empty += 1
+                continue
+            # apply string matching before applying the bert module
+            if self.edit_similarity_mapping_score(src_class_annotations, tgt_class_annotations, string_match_only=True) == 1.0:
+                mapping_scores[i] = 1.0
+                continue
+            pairs = list(itertools.product(src_class_annotations, tgt_class_annotations))
+            bert_idxs.append(i)
+            annotation_pairs += pairs
+            nums.append(len(pairs))
+        if num_empty > 0:
+            warnings.warn(f"Return zero scores for {num_empty} class pairs due to empty input class annotations...")
+        if bert_idxs:
+            # apply BERT classifier and define mapping score := Average(SynonymScores)
+            synonym_scores = self.bert_synonym_scores(annotation_pairs)
+            offsets = np.cumsum([0] + nums[:-1])
+            mapping_scores[bert_idxs] = np.add.reduceat(synonym_scores.astype(np.float64), offsets) / np.array(nums)
+        return mapping_scores.tolist()
 
     @staticmethod
     def edit_similarity_mapping_score(
@@ -143,9 +224,231 @@ class MappingPredictor:
         # a shortcut to save time for $\textsf{BERTMap}$
         if string_match_only:
             return 0.0
-        annotation_pairs = itertools.product(src_class_annotations, tgt_class_annotations)
-        sim_scores = [levenshtein.normalized_similarity(src, tgt) for src, tgt in annotation_pairs]
-        return max(sim_scores)
+        # NOTE: score in double precision such that the mapping scores are the same as the exact Python floats
+        return float(
+            MappingPredictor.lexical_mapping_scores(
+                [src_class_annotations], [tgt_class_annotations], "levenshtein", dtype=np.float64
+            )[0, 0]
+        )
+
+    @staticmethod
+    def lexical_mapping_scores(
+        src_classes_annotations: list[set[str]],
+        tgt_classes_annotations: list[set[str]],
+        scorer: str = "levenshtein",
+        num_workers: int = 1,
+        dtype: type = np.float32,
+    ) -> np.ndarray:
+        r"""Compute the lexical mapping scores between a batch of source classes and a batch of target classes
+        (e.g., the candidates of a source class).
+
+        The normalised similarity matrix of all (source annotations $\times$ target annotations) is computed at once
+        by `rapidfuzz.process.cdist` with `num_workers` threads, and then reduced to the **maximum** score of each
+        src-tgt class pair. Classes with no annotations have zero scores.
+
+        Args:
+            src_classes_annotations (List[Set[str]]): The annotations of each source class.
+            tgt_classes_annotations (List[Set[str]]): The annotations of each target class.
+            scorer (str, optional): The lexical scorer. Options are `["levenshtein", "jaro_winkler", "token_set_ratio"]`.
+                Defaults to `"levenshtein"`.
+            num_workers (int, optional): The number of threads (`-1` means all CPU cores). Defaults to `1`.
+            dtype (type, optional): The data type of the scores. Defaults to `np.float32`.
+
+        Returns:
+            (np.ndarray): The mapping score matrix of shape `(len(src_classes_annotations), len(tgt_classes_annotations))`.
+        """
+        scorer_func, scale = LEXICAL_SCORERS[scorer]
+        scores = np.zeros((len(src_classes_annotations), len(tgt_classes_annotations)), dtype=dtype)
+
+        def flatten(classes_annotations: list[set[str]]):
+            """Concatenate the annotations of non-empty classes and record the offset of each class."""
+            class_idxs = [i for i, annotations in enumerate(classes_annotations) if annotations]
+            annotations = [list(classes_annotations[i]) for i in class_idxs]
+            offsets = np.cumsum([0] + [len(a) for a in annotations[:-1]])
+            return np.array(class_idxs, dtype=int), list(itertools.chain.from_iterable(annotations)), offsets
+
+        src_idxs, src_annotations, src_offsets = flatten(src_classes_annotations)
+        tgt_idxs, tgt_annotations, tgt_offsets = flatten(tgt_classes_annotations)
+        if len(src_idxs) == 0 or len(tgt_idxs) == 0:
+            return scores
+        sim_matrix = process.cdist(
+            src_annotations, tgt_annotations, scorer=scorer_func, dtype=dtype, workers=num_workers
+        )
+        # maximum over the annotations of each source class and then of each target class
+        sim_matrix = np.maximum.reduceat(sim_matrix, src_offsets, axis=0)
+        sim_matrix = np.maximum.reduceat(sim_matrix, tgt_offsets, axis=1)
+        scores[np.ix_(src_idxs, tgt_idxs)] = sim_matrix / scale
+        return scores
+
+    def bert_synonym_scores(self, annotation_pairs: list[tuple]) -> np.ndarray:
+        """Compute the synonym scores of annotation pairs in batches of `batch_size_for_prediction`."""
+        prepared_batches = prefetch_map(
+            lambda i: self.bert_synonym_classifier.prepare_inputs(annotation_pairs[i : i + self.batch_size_for_prediction]),
+            range(0, len(annotation_pairs), self.batch_size_for_prediction),
+            num_workers=self.num_prefetch_workers,
+            max_prefetch=self.max_prefetched_batches,
+        )
+        scores = [
+            self.bert_synonym_classifier.predict_prepared(prepared_inputs).cpu().numpy()
+            for prepared_inputs in prepared_batches
+        ]
+        return np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+
+    def cascade_bert_match(
+        self, src_class_iri: str, src_class_annotations: set[str], tgt_class_candidates: list[tuple]
+    ) -> list[EntityMapping]:
+        r"""Predict $N$ best scored mappings for a source ontology class with cascaded early-exit BERT matching.
+
+        1. Rank the target class candidates by a cheap score (`"idf"`, i.e., the candidate selection score, or `"lexical"`)
+        and keep the top `keep_ratio` of them (at least `min_candidates`).
+        2. Score the first `probe_size` annotation pairs of each kept candidate; since synonym scores are in $[0, 1]$,
+        this gives lower and upper bounds of each candidate's (average) mapping score.
+        3. Drop the candidates whose upper bounds cannot reach the mapping score threshold ($0.9$) or the $N$-th best lower bound,
+        and score the remaining annotation pairs of the survivors.
+
+        Steps 2 and 3 are exact, i.e., any recall loss against scoring all the candidates comes from step 1.
+        """
+        config = self.cascade_config
+        # the threshold 0.9 is for mapping extension (as in full BERT matching)
+        mapping_score_threshold = 0.9
+        if not tgt_class_candidates:
+            return []
+
+        # 1. rank the candidates by a cheap score and keep the top fraction
+        if config.cheap_scorer == "lexical":
+            cheap_scores = self.lexical_mapping_scores(
+                [src_class_annotations],
+                [self.tgt_annotation_index[tgt_candidate_iri] for tgt_candidate_iri, _ in tgt_class_candidates],
+                scorer=self.lexical_scorer or "levenshtein",
+                num_workers=self.num_workers_for_lexical_scoring,
+            )[0]
+        elif config.cheap_scorer == "idf":
+            cheap_scores = np.array([score for _, score in tgt_class_candidates], dtype=np.float32)
+        else:
+            raise ValueError(f"Unknown cheap scorer {config.cheap_scorer}; options are ['idf', 'lexical'].")
+        num_kept = min(len(tgt_class_candidates), max(config.min_candidates, math.ceil(config.keep_ratio * len(tgt_class_candidates))))
+        kept_idxs = np.argsort(-cheap_scores, kind="stable")[:num_kept]
+        annotation_pairs = [
+            list(itertools.product(src_class_annotations, self.tgt_annotation_index[tgt_class_candidates[idx][0]]))
+            for idx in kept_idxs
+        ]
+        num_pairs = np.array([len(pairs) for pairs in annotation_pairs])
+        self.cascade_stats["num_total_pairs"] += len(src_class_annotations) * sum(
+            len(self.tgt_annotation_index[tgt_candidate_iri]) for tgt_candidate_iri, _ in tgt_class_candidates
+        )
+
+        # 2. probe the candidates to bound their mapping scores
+        probe_sizes = np.minimum(num_pairs, config.probe_size)
+        probe_scores = self.bert_synonym_scores(
+            [pair for pairs, size in zip(annotation_pairs, probe_sizes) for pair in pairs[:size]]
+        )
+        score_sums = np.bincount(
+            np.repeat(np.arange(num_kept), probe_sizes), weights=probe_scores, minlength=num_kept
+        )
+        lower_bounds = score_sums / num_pairs
+        upper_bounds = (score_sums + (num_pairs - probe_sizes)) / num_pairs
+
+        # 3. early exit for candidates that cannot make it and score the rest pairs of the survivors
+        bar = mapping_score_threshold
+        if num_kept >= self.num_best_predictions:
+            bar = max(bar, np.sort(lower_bounds)[-self.num_best_predictions])
+        survivors = np.where(upper_bounds >= bar)[0]
+        rest_sizes = num_pairs[survivors] - probe_sizes[survivors]
+        rest_scores = self.bert_synonym_scores(
+            [pair for idx in survivors for pair in annotation_pairs[idx][probe_sizes[idx] :]]
+        )
+        score_sums[survivors] += np.bincount(
+            np.repeat(np.arange(len(survivors)), rest_sizes), weights=rest_scores, minlength=len(survivors)
+        )
+        self.cascade_stats["num_scored_pairs"] += len(probe_scores) + len(rest_scores)
+
+        mapping_scores = score_sums[survivors] / num_pairs[survivors]
+        best_scored_mappings = []
+        for i in np.argsort(-mapping_scores, kind="stable")[: self.num_best_predictions]:
+            if mapping_scores[i] >= mapping_score_threshold:
+                tgt_candidate_iri = tgt_class_candidates[kept_idxs[survivors[i]]][0]
+                best_scored_mappings.append(
+                    self.init_class_mapping(src_class_iri, tgt_candidate_iri, float(mapping_scores[i]))
+                )
+        return best_scored_mappings
+
+    def retrieve_dense_candidates(self, src_class_iris: list[str]):
+        r"""Retrieve the dense candidates of the given source classes in batched matrix queries of `num_src_classes_per_dense_query`
+        classes, such that the target embeddings are scanned once per query rather than once per source class.
+
+        The retrieved candidates replace the previously kept ones in `dense_candidates` (keyed by source class IRIs).
+        """
+        self.dense_candidates = dict()
+        if not self.dense_candidate_retriever:
+            return
+        for i in range(0, len(src_class_iris), self.num_src_classes_per_dense_query):
+            batch_iris = src_class_iris[i : i + self.num_src_classes_per_dense_query]
+            batch_candidates = self.dense_candidate_retriever.retrieve(
+                [self.src_annotation_index[iri] for iri in batch_iris], self.num_dense_candidates
+            )
+            self.dense_candidates.update(zip(batch_iris, batch_candidates))
+
+    def select_tgt_class_candidates(
+        self, src_class_annotations: set[str], src_class_iri: str | None = None
+    ) -> list[tuple[str, float]]:
+        r"""Select at most `num_raw_candidates` target class candidates for the annotations of a source class by the
+        sub-word inverted index (fused with the dense retriever's candidates if any).
+
+        The dense candidates are looked up in those retrieved in batches by
+        [`retrieve_dense_candidates`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.retrieve_dense_candidates]
+        if `src_class_iri` is given and retrieved, or otherwise retrieved for this source class alone.
+
+        Returns:
+            (List[Tuple[str, float]]): The `(tgt_class_iri, candidate_score)` pairs in descending order of scores.
+        """
+        # previously wrongly put tokenizer again !!!
+        tgt_class_candidates = self.tgt_inverted_annotation_index.idf_select(
+            list(src_class_annotations), pool_size=len(self.tgt_annotation_index.keys())
+        )  # [(tgt_class_iri, idf_score)]
+        # fuse with the candidates retrieved by the dense retriever (if any)
+        if self.dense_candidate_retriever:
+            dense_candidates = self.dense_candidates.get(src_class_iri)
+            if dense_candidates is None:
+                dense_candidates = self.dense_candidate_retriever.retrieve([src_class_annotations], self.num_dense_candidates)[0]
+            tgt_class_candidates = DenseCandidateRetriever.reciprocal_rank_fusion(
+                tgt_class_candidates[: self.num_raw_candidates], dense_candidates, rrf_k=self.rrf_k
+            )  # [(tgt_class_iri, fused_score)]
+        # if some classes are set to be ignored, remove them from the candidates
+        if self.ignored_class_index:
+            tgt_class_candidates = [(iri, idf_score) for iri, idf_score in tgt_class_candidates if not self.ignored_class_index[iri]]
+        # select a truncated number of candidates
+        return tgt_class_candidates[: self.num_raw_candidates]
+
+    def sample_candidate_annotation_pairs(
+        self, num_src_classes: int, num_candidates_per_class: int, seed: int | None = None
+    ) -> list[tuple[str, str]]:
+        r"""Sample the annotation pairs of source classes and their best target class candidates, i.e., the kind of
+        (mostly hard) pairs scored in global matching, e.g., for distilling the BERT synonym classifier.
+
+        Args:
+            num_src_classes (int): The number of randomly sampled source classes.
+            num_candidates_per_class (int): The number of best target class candidates of each source class.
+            seed (int, optional): The random seed for sampling source classes. Defaults to `None`.
+
+        Returns:
+            (List[Tuple[str, str]]): The `(src_annotation, tgt_annotation)` pairs.
+        """
+        src_class_iris = sorted(
+            iri for iri in self.src_annotation_index if not (self.ignored_class_index and self.ignored_class_index[iri])
+        )
+        src_class_iris = random.Random(seed).sample(src_class_iris, min(num_src_classes, len(src_class_iris)))
+        self.retrieve_dense_candidates(src_class_iris)
+        annotation_pairs = []
+        for src_class_iri in src_class_iris:
+            src_class_annotations = self.src_annotation_index[src_class_iri]
+            tgt_class_candidates = self.select_tgt_class_candidates(src_class_annotations, src_class_iri)[
+                :num_candidates_per_class
+            ]
+            for tgt_class_iri, _ in tgt_class_candidates:
+                annotation_pairs += itertools.product(
+                    sorted(src_class_annotations), sorted(self.tgt_annotation_index[tgt_class_iri])
+                )
+        return annotation_pairs
 
     def mapping_prediction_for_src_class(self, src_class_iri: str) -> List[EntityMapping]:
         r"""Predict $N$ best scored mappings for a source ontology class, where
@@ -153,7 +456,7 @@ class MappingPredictor:
 
         1. Apply the **string matching** module to compute "easy" mappings.
         2. Return the mappings if found any, or if there is no BERT synonym classifier
-        as in $\textsf{BERTMapLt}$.
+        as in $\textsf{BERTMapLt}$ (where the `lexical_scorer`, if set, ranks the candidates when no string-matched mappings are found).
         3. If using the BERT synonym classifier module:
 
             - Generate batches for class annotation pairs. Each batch contains the combinations of the
@@ -166,15 +469,7 @@ class MappingPredictor:
         """
 
         src_class_annotations = self.src_annotation_index[src_class_iri]
-        # previously wrongly put tokenizer again !!!
-        tgt_class_candidates = self.tgt_inverted_annotation_index.idf_select(
-            list(src_class_annotations), pool_size=len(self.tgt_annotation_index.keys())
-        )  # [(tgt_class_iri, idf_score)]
-        # if some classes are set to be ignored, remove them from the candidates
-        if self.ignored_class_index:
-            tgt_class_candidates = [(iri, idf_score) for iri, idf_score in tgt_class_candidates if not self.ignored_class_index[iri]]
-        # select a truncated number of candidates
-        tgt_class_candidates = tgt_class_candidates[:self.num_raw_candidates]
+        tgt_class_candidates = self.select_tgt_class_candidates(src_class_annotations, src_class_iri)
         best_scored_mappings = []
 
         # for string matching: save time if already found string-matched candidates
@@ -196,35 +491,69 @@ class MappingPredictor:
 
             return string_matched_mappings
 
+        def lexical_match():
+            """Compute mappings with the lexical scorer."""
+            lexical_scores = self.lexical_mapping_scores(
+                [src_class_annotations],
+                [self.tgt_annotation_index[tgt_candidate_iri] for tgt_candidate_iri, _ in tgt_class_candidates],
+                scorer=self.lexical_scorer,
+                num_workers=self.num_workers_for_lexical_scoring,
+            )[0]
+            # stable sorting to break ties by the candidate ranking
+            best_idxs = np.argsort(-lexical_scores, kind="stable")[: self.num_best_predictions]
+            return [
+                self.init_class_mapping(src_class_iri, tgt_class_candidates[idx][0], float(lexical_scores[idx]))
+                for idx in best_idxs
+                if lexical_scores[idx] > 0.0
+            ]
+
         best_scored_mappings += string_match()
+        # apply the lexical scorer if no string-matched mappings found and there is no bert module (bertmaplt)
+        if not best_scored_mappings and not self.bert_synonym_classifier and self.lexical_scorer:
+            best_scored_mappings += lexical_match()
         # return string-matched mappings if found or if there is no bert module (bertmaplt)
         if best_scored_mappings or not self.bert_synonym_classifier:
             self.logger.info(f"The best scored class mappings for {src_class_iri} are\n{best_scored_mappings}")
             return best_scored_mappings
 
-        def generate_batched_annotations(batch_size: int):
-            """Generate batches of class annotations for the input source class and its
-            target candidates.
+        def group_tgt_candidates(batch_size: int):
+            """Group the target candidates such that the annotation pairs of each group make up a batch;
+            stop adding candidates into the current group once the batch size is exceeded.
             """
-            batches = []
-            # the `nums`` parameter determines how the annotations are grouped
-            current_batch = CfgNode({"annotations": [], "nums": []})
+            groups = []
+            current_group, current_num = [], 0
             for i, (tgt_candidate_iri, _) in enumerate(tgt_class_candidates):
+                current_group.append(tgt_candidate_iri)
+                current_num += len(src_class_annotations) * len(self.tgt_annotation_index[tgt_candidate_iri])
+                # collect when the batch is full or for the last target class candidate
+                if current_num > batch_size or i == len(tgt_class_candidates) - 1:
+                    groups.append(current_group)
+                    current_group, current_num = [], 0
+            return groups
+
+        def prepare_batched_annotations(tgt_candidate_iris: list[str]):
+            """Generate (and prepare the BERT inputs of) a batch of class annotations for the input source class and
+            a group of its target candidates.
+            """
+            # the `nums`` parameter determines how the annotations are grouped
+            annotation_batch = CfgNode({"annotations": [], "nums": []})
+            for tgt_candidate_iri in tgt_candidate_iris:
                 tgt_candidate_annotations = self.tgt_annotation_index[tgt_candidate_iri]
                 annotation_pairs = list(itertools.product(src_class_annotations, tgt_candidate_annotations))
-                current_batch.annotations += annotation_pairs
-                num_annotation_pairs = len(annotation_pairs)
-                current_batch.nums.append(num_annotation_pairs)
-                # collect when the batch is full or for the last target class candidate
-                if sum(current_batch.nums) > batch_size or i == len(tgt_class_candidates) - 1:
-                    batches.append(current_batch)
-                    current_batch = CfgNode({"annotations": [], "nums": []})
-            return batches
+                annotation_batch.annotations += annotation_pairs
+                annotation_batch.nums.append(len(annotation_pairs))
+            return annotation_batch, self.bert_synonym_classifier.prepare_inputs(annotation_batch.annotations)
 
         def bert_match():
             """Compute mappings with fine-tuned BERT synonym classifier."""
             bert_matched_mappings = []
-            class_annotation_batches = generate_batched_annotations(self.batch_size_for_prediction)
+            # build and tokenise the next batches in background threads while the BERT model is running
+            prepared_annotation_batches = prefetch_map(
+                prepare_batched_annotations,
+                group_tgt_candidates(self.batch_size_for_prediction),
+                num_workers=self.num_prefetch_workers,
+                max_prefetch=self.max_prefetched_batches,
+            )
             batch_base_candidate_idx = (
                 0  # after each batch, the base index will be increased by # of covered target candidates
             )
@@ -234,9 +563,9 @@ class MappingPredictor:
             final_best_scores = torch.tensor([-1] * self.num_best_predictions).to(device)
             final_best_idxs = torch.tensor([-1] * self.num_best_predictions).to(device)
 
-            for annotation_batch in class_annotation_batches:
+            for annotation_batch, prepared_inputs in prepared_annotation_batches:
 
-                synonym_scores = self.bert_synonym_classifier.predict(annotation_batch.annotations)
+                synonym_scores = self.bert_synonym_classifier.predict_prepared(prepared_inputs)
                 # aggregating to mappings cores
                 grouped_synonym_scores = torch.split(
                     synonym_scores,
@@ -278,7 +607,68 @@ class MappingPredictor:
             self.logger.info(f"The best scored class mappings for {src_class_iri} are\n{bert_matched_mappings}")
             return bert_matched_mappings
 
-        return bert_match()
+        if not self.cascade_config:
+            return bert_match()
+
+        cascade_matched_mappings = self.cascade_bert_match(src_class_iri, src_class_annotations, tgt_class_candidates)
+        self.logger.info(f"The best scored class mappings for {src_class_iri} are\n{cascade_matched_mappings}")
+        # measure the recall against full BERT matching on sampled source classes
+        if self._cascade_rng.random() < self.cascade_config.recall_check_rate:
+            full_matched_tails = set(m.tail for m in bert_match())
+            self.cascade_stats["num_checked_classes"] += 1
+            self.cascade_stats["num_full_mappings"] += len(full_matched_tails)
+            self.cascade_stats["num_recalled_mappings"] += len(
+                full_matched_tails.intersection(m.tail for m in cascade_matched_mappings)
+            )
+        return cascade_matched_mappings
+
+    def iter_mapping_predictions(
+        self, src_class_iris: list[str] | None = None, batch_size: int = 1
+    ) -> Iterator[list[EntityMapping]]:
+        r"""Apply global matching for the given source classes and yield the predicted mappings batch by batch
+        as soon as each batch of source classes is scored.
+
+        Unlike [`mapping_prediction`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.mapping_prediction],
+        nothing is saved; consumers can stream the mappings into, e.g., a database or a refinement stage while matching continues.
+
+        Args:
+            src_class_iris (List[str], optional): The IRIs of source classes to be matched. Defaults to `None` which means
+                all the source classes (except those ignored for OAEI).
+            batch_size (int, optional): The number of source classes per yielded batch. Defaults to `1`.
+
+        Yields:
+            (List[EntityMapping]): The predicted mappings of a batch of source classes.
+        """
+        if src_class_iris is None:
+            src_class_iris = list(self.src_annotation_index.keys())
+        if self.ignored_class_index:
+            src_class_iris = [iri for iri in src_class_iris if not self.ignored_class_index[iri]]
+        for i in range(0, len(src_class_iris), batch_size):
+            # retrieve the dense candidates of the next source classes together
+            if self.dense_candidate_retriever and src_class_iris[i] not in self.dense_candidates:
+                self.retrieve_dense_candidates(src_class_iris[i : i + max(batch_size, self.num_src_classes_per_dense_query)])
+            yield list(
+                itertools.chain.from_iterable(
+                    self.mapping_prediction_for_src_class(src_class_iri)
+                    for src_class_iri in src_class_iris[i : i + batch_size]
+                )
+            )
+
+    async def aiter_mapping_predictions(
+        self, src_class_iris: list[str] | None = None, batch_size: int = 1
+    ) -> AsyncIterator[list[EntityMapping]]:
+        r"""The asynchronous version of
+        [`iter_mapping_predictions`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.iter_mapping_predictions].
+
+        Each batch is scored in a worker thread so that the event loop is not blocked while matching.
+        """
+        loop = asyncio.get_running_loop()
+        mapping_batches = self.iter_mapping_predictions(src_class_iris, batch_size)
+        while True:
+            mappings = await loop.run_in_executor(None, next, mapping_batches, None)
+            if mappings is None:
+                break
+            yield mappings
 
     def mapping_prediction(self):
         r"""Apply global matching for each class in the source ontology.
@@ -286,7 +676,8 @@ class MappingPredictor:
         See [`mapping_prediction_for_src_class`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.mapping_prediction_for_src_class].
 
         If this process is accidentally stopped, it can be resumed from already saved predictions. The progress
-        bar keeps track of the number of source ontology classes that have been matched.
+        bar keeps track of the number of source ontology classes that have been matched. To consume the mappings
+        while matching continues, see [`iter_mapping_predictions`][deeponto.align.bertmap.mapping_prediction.MappingPredictor.iter_mapping_predictions].
         """
         self.logger.info("Start global matching for each class in the source ontology.")
 
@@ -303,6 +694,7 @@ class MappingPredictor:
         )
         self.enlighten_status.update(demo="Mapping Prediction")
 
+        pending_src_class_iris = []
         for i, src_class_iri in enumerate(self.src_annotation_index.keys()):
             # skip computed classes
             if src_class_iri in mapping_index.keys():
@@ -314,10 +706,14 @@ class MappingPredictor:
                 self.logger.info(f"[Class {i}] Skip matching {src_class_iri} as marked as not used in alignment.")
                 progress_bar.update()
                 continue
-            mappings = self.mapping_prediction_for_src_class(src_class_iri)
+            pending_src_class_iris.append(src_class_iri)
+
+        # one batch of mappings per pending source class
+        mapping_batches = self.iter_mapping_predictions(pending_src_class_iris, batch_size=1)
+        for i, (src_class_iri, mappings) in enumerate(zip(pending_src_class_iris, mapping_batches)):
             mapping_index[src_class_iri] = [m.to_tuple(with_score=True) for m in mappings]
 
-            if i % 100 == 0 or i == len(self.src_annotation_index) - 1:
+            if i % 100 == 0 or i == len(pending_src_class_iris) - 1:
                 save_file(mapping_index, os.path.join(match_dir, "raw_mappings.json"))
                 # also save a .tsv version
                 mapping_in_tuples = list(itertools.chain.from_iterable(mapping_index.values()))
@@ -329,3 +725,19 @@ class MappingPredictor:
 
         self.logger.info("Finished mapping prediction for each class in the source ontology.")
         progress_bar.close()
+
+        if self.cascade_config:
+            cascade_report = self.cascade_report()
+            self.logger.info(f"Cascaded BERT matching report:\n{print_dict(cascade_report)}")
+            save_file(cascade_report, os.path.join(match_dir, "cascade_report.json"))
+
+    def cascade_report(self):
+        """Summarise the saving (ratio of scored annotation pairs) and the measured recall of cascaded BERT matching."""
+        stats = self.cascade_stats
+        return {
+            **stats,
+            "scored_pair_ratio": stats["num_scored_pairs"] / stats["num_total_pairs"] if stats["num_total_pairs"] else None,
+            "recall_against_full_scoring": (
+                stats["num_recalled_mappings"] / stats["num_full_mappings"] if stats["num_full_mappings"] else None
+            ),
+        }
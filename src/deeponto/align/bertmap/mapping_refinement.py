@@ -14,8 +14,9 @@
 
 from __future__ import annotations
 
-from typing import List, Tuple
 import os
+import time
+import heapq
 from logging import Logger
 import itertools
 import random
@@ -26,7 +27,8 @@ import enlighten
 from deeponto.align.mapping import EntityMapping
 from deeponto.onto import Ontology
 from deeponto.utils import create_path
-from deeponto.align.logmap import run_logmap_repair
+from deeponto.align.logmap import run_logmap_repair, run_logmap_repair_in_process
+from deeponto.align.repair import MappingRepairer
 from .mapping_prediction import MappingPredictor
 
 
@@ -48,6 +50,11 @@ class MappingRefiner:
         raw_mappings (List[EntityMapping]): List of **raw class mappings** predicted in the **global matching** phase.
         mapping_score_dict (dict): A dynamic dictionary that keeps track of mappings (with scores) that have already been computed.
         mapping_filter_threshold (float): Mappings with scores $\geq$ this value will be preserved for the final mapping repairing. 
+        src_hierarchy_index (Tuple[dict, dict], optional): The `(parents_index, children_index)` of `src_onto` for one-hop extension; built on the first use.
+        tgt_hierarchy_index (Tuple[dict, dict], optional): The `(parents_index, children_index)` of `tgt_onto` for one-hop extension; built on the first use.
+        repair_method (str): The mapping repair method. Options are `["logmap", "logmap_in_process", "native"]`, where `"logmap"` (default)
+            runs LogMap's debugger in a subprocess, `"logmap_in_process"` (experimental) runs it inside the running JVM (falling back to
+            `"logmap"` on failure), and `"native"` uses the [`MappingRepairer`][deeponto.align.repair.MappingRepairer].
     """
     def __init__(
         self,
@@ -59,7 +66,8 @@ class MappingRefiner:
         mapping_filtered_threshold: float,
         logger: Logger,
         enlighten_manager: enlighten.Manager,
-        enlighten_status: enlighten.StatusBar
+        enlighten_status: enlighten.StatusBar,
+        repair_method: str = "logmap",
     ):
         self.output_path = output_path
         self.logger = logger
@@ -83,10 +91,17 @@ class MappingRefiner:
             src_class_iri, tgt_class_iri, score = m.to_tuple(with_score=True)
             self.mapping_score_dict[(src_class_iri, tgt_class_iri)] = score
 
+        # precomputed asserted parents and children for one-hop extension
+        self.src_hierarchy_index = None
+        self.tgt_hierarchy_index = None
+
         # the threshold for final filtering the extended mappings
         self.mapping_filtered_threshold = mapping_filtered_threshold  # \lambda
 
-        # logmap mapping repair folder
+        # mapping repair method and logmap mapping repair folder
+        if repair_method not in ["logmap_in_process", "logmap", "native"]:
+            raise ValueError(f"Unknown repair method {repair_method}; options are ['logmap_in_process', 'logmap', 'native'].")
+        self.repair_method = repair_method
         self.logmap_repair_path = os.path.join(self.output_path, "match", "logmap-repair")
         
         # paths for mapping extension and repair
@@ -94,7 +109,7 @@ class MappingRefiner:
         self.filtered_mapping_path = os.path.join(self.output_path, "match", "filtered_mappings.tsv")
         self.repaired_mapping_path = os.path.join(self.output_path, "match", "repaired_mappings.tsv")
 
-    def mapping_extension(self, max_iter: int = 10):
+    def mapping_extension(self, max_iter: int = 10, pool_size: int = 200, budget: int | None = None):
         r"""Iterative mapping extension based on the locality principle.
         
         For each class pair $(c, c')$ (scored in the global matching phase) with score 
@@ -113,8 +128,15 @@ class MappingRefiner:
         in the configuration file). The mapping filtering progress bar keeps track of the 
         total number of filtered mappings (this bar is purely for logging purpose).
 
+        Seed mappings of each iteration are expanded in descending order of their scores (by a priority queue),
+        and each seed contributes at most `pool_size` (not yet scored) candidate pairs. If a `budget` is set,
+        the extension stops once the number of scored candidate pairs reaches the budget, such that the
+        highest-scoring seeds are expanded first.
+
         Args:
             max_iter (int, optional): The maximum number of mapping extension iterations. Defaults to `10`.
+            pool_size (int, optional): The maximum number of candidate pairs extended from a seed mapping. Defaults to `200`.
+            budget (int, optional): The maximum number of candidate pairs scored in mapping extension. Defaults to `None` which means unlimited.
         """
         
         num_iter = 0
@@ -148,8 +170,10 @@ class MappingRefiner:
             return
         # intialise the frontier, explored, final expansion sets with the raw mappings
         # NOTE be careful of address pointers
-        frontier = [m.to_tuple() for m in self.raw_mappings]
         expansion = [m.to_tuple(with_score=True) for m in self.raw_mappings]
+        # the frontier is a priority queue of seed mappings (highest score first)
+        frontier = [(-score, src_class_iri, tgt_class_iri) for src_class_iri, tgt_class_iri, score in expansion]
+        heapq.heapify(frontier)
         # for animation purposes
         for _ in range(len(expansion)):
             extension_progress_bar.update()
@@ -157,19 +181,39 @@ class MappingRefiner:
         self.logger.info(
             f"Start mapping extension for each class pair with score >= {self.mapping_extension_threshold}."
         )
-        while frontier and num_iter < max_iter:
-            new_mappings = []
-            for src_class_iri, tgt_class_iri in frontier:
-                # one hop extension makes sure new mappings are really "new"
-                cur_new_mappings = self.one_hop_extend(src_class_iri, tgt_class_iri)
-                extension_progress_bar.update(len(cur_new_mappings))
-                new_mappings += cur_new_mappings
+        num_scored = 0
+        while frontier and num_iter < max_iter and (budget is None or num_scored < budget):
+            start_time = time.time()
+            num_seeds = len(frontier)
+            # collect the (not yet scored) one-hop candidate pairs from the highest-scoring seeds within the budget
+            candidate_pairs = dict()
+            while frontier and (budget is None or num_scored + len(candidate_pairs) < budget):
+                _, src_class_iri, tgt_class_iri = heapq.heappop(frontier)
+                candidate_pairs.update(
+                    dict.fromkeys(self.get_one_hop_candidate_pairs(src_class_iri, tgt_class_iri, pool_size))
+                )
+            num_expanded_seeds = num_seeds - len(frontier)
+            candidate_pairs = list(candidate_pairs)
+            if budget is not None:
+                candidate_pairs = candidate_pairs[: budget - num_scored]
+            # score all the candidate pairs in packed batches; the scored ones are not "new" in later iterations
+            new_mappings = self.score_candidate_pairs(candidate_pairs)
+            num_scored += len(candidate_pairs)
+            extension_progress_bar.update(len(new_mappings))
             # add new mappings to the expansion set
             expansion += new_mappings
             # renew frontier with the newly discovered mappings
-            frontier = [(x, y) for x, y, _ in new_mappings]
+            frontier = [(-score, x, y) for x, y, score in new_mappings]
+            heapq.heapify(frontier)
 
-            self.logger.info(f"Add {len(new_mappings)} mappings at iteration #{num_iter}.")
+            num_covered_src_classes = len(set(x for x, _, _ in expansion))
+            self.logger.info(
+                f"Add {len(new_mappings)} mappings at iteration #{num_iter} "
+                + f"({time.time() - start_time:.2f}s): expanded {num_expanded_seeds}/{num_seeds} seeds, "
+                + f"scored {len(candidate_pairs)} candidate pairs ({num_scored} in total"
+                + (f" of budget {budget})" if budget is not None else ")")
+                + f", covered {num_covered_src_classes}/{len(self.mapping_predictor.src_annotation_index)} source classes."
+            )
             num_iter += 1
             extension_progress_bar.desc = f"Mapping Extension [Iteration #{num_iter}]"
 
@@ -201,15 +245,16 @@ class MappingRefiner:
         filtering_progress_bar.close()
         return filtered_expansion
 
-    def one_hop_extend(self, src_class_iri: str, tgt_class_iri: str, pool_size: int = 200):
-        r"""Extend mappings from a scored class pair $(c, c')$ by
-        searching from one-hop neighbors.
+    def load_hierarchy_indexes(self):
+        """Build the asserted parents and children indexes of both ontologies (if not built yet)."""
+        if self.src_hierarchy_index is None:
+            self.logger.info("Build hierarchy indexes for mapping extension and repair.")
+            self.src_hierarchy_index = self.src_onto.build_hierarchy_index()
+            self.tgt_hierarchy_index = self.tgt_onto.build_hierarchy_index()
 
-        Search for plausible mappings between the parents of $c$ and $c'$,
-        and between the children of $c$ and $c'$. Mappings that are not
-        already computed (recorded in `self.mapping_score_dict`) and have
-        a score $\geq$ `self.mapping_extension_threshold` will be returned as
-        **new** mappings.
+    def get_one_hop_candidate_pairs(self, src_class_iri: str, tgt_class_iri: str, pool_size: int = 200):
+        r"""Pair up the parents of $c$ and $c'$, and the children of $c$ and $c'$, for a scored class pair $(c, c')$;
+        the candidate pairs already scored are excluded.
 
         Args:
             src_class_iri (str): The IRI of the source ontology class $c$.
@@ -217,47 +262,67 @@ class MappingRefiner:
             pool_size (int, optional): The maximum number of plausible mappings to be extended. Defaults to 200.
 
         Returns:
-            (List[EntityMapping]): A list of one-hop extended mappings.
+            (List[Tuple[str, str]]): A list of (at most `pool_size`) one-hop candidate class pairs.
         """
-        
-        def get_iris(owl_objects):
-            return [str(x.getIRI()) for x in owl_objects]
-        
-        src_class = self.src_onto.get_owl_object(src_class_iri)
-        src_class_parent_iris = get_iris(self.src_onto.get_asserted_parents(src_class, named_only=True))
-        src_class_children_iris = get_iris(self.src_onto.get_asserted_children(src_class, named_only=True))
-
-        tgt_class = self.tgt_onto.get_owl_object(tgt_class_iri)
-        tgt_class_parent_iris = get_iris(self.tgt_onto.get_asserted_parents(tgt_class, named_only=True))
-        tgt_class_children_iris = get_iris(self.tgt_onto.get_asserted_children(tgt_class, named_only=True))
+        self.load_hierarchy_indexes()
+        src_parents_index, src_children_index = self.src_hierarchy_index
+        tgt_parents_index, tgt_children_index = self.tgt_hierarchy_index
 
         # pair up parents and children, respectively; NOTE set() might not be necessary
-        parent_pairs = list(set(itertools.product(src_class_parent_iris, tgt_class_parent_iris)))
-        children_pairs = list(set(itertools.product(src_class_children_iris, tgt_class_children_iris)))
+        parent_pairs = list(set(itertools.product(src_parents_index[src_class_iri], tgt_parents_index[tgt_class_iri])))
+        children_pairs = list(set(itertools.product(src_children_index[src_class_iri], tgt_children_index[tgt_class_iri])))
 
-        candidate_pairs = parent_pairs + children_pairs
+        # if already computed meaning that it is not a new mapping
+        candidate_pairs = [pair for pair in parent_pairs + children_pairs if pair not in self.mapping_score_dict]
         # downsample if the number of candidates is too large
         if len(candidate_pairs) > pool_size:
             candidate_pairs = random.sample(candidate_pairs, pool_size)
 
-        extended_mappings = []
-        for src_candidate_iri, tgt_candidate_iri in parent_pairs + children_pairs:
-
-            # if already computed meaning that it is not a new mapping
-            if (src_candidate_iri, tgt_candidate_iri) in self.mapping_score_dict:
-                continue
+        return candidate_pairs
 
-            src_candidate_annotations = self.mapping_predictor.src_annotation_index[src_candidate_iri]
-            tgt_candidate_annotations = self.mapping_predictor.tgt_annotation_index[tgt_candidate_iri]
-            score = self.mapping_predictor.bert_mapping_score(src_candidate_annotations, tgt_candidate_annotations)
+    def score_candidate_pairs(self, candidate_pairs: list[tuple[str, str]]):
+        r"""Score candidate class pairs in packed batches, record them in `self.mapping_score_dict`, and return those
+        with a score $\geq$ `self.mapping_extension_threshold` as new mappings.
+        """
+        scores = self.mapping_predictor.bert_mapping_scores(
+            [
+                (
+                    self.mapping_predictor.src_annotation_index[src_candidate_iri],
+                    self.mapping_predictor.tgt_annotation_index[tgt_candidate_iri],
+                )
+                for src_candidate_iri, tgt_candidate_iri in candidate_pairs
+            ]
+        )
+        extended_mappings = []
+        for (src_candidate_iri, tgt_candidate_iri), score in zip(candidate_pairs, scores):
             # add to already scored collection
             self.mapping_score_dict[(src_candidate_iri, tgt_candidate_iri)] = score
-
             # skip mappings with low scores
             if score < self.mapping_extension_threshold:
                 continue
-
             extended_mappings.append((src_candidate_iri, tgt_candidate_iri, score))
+        return extended_mappings
+
+    def one_hop_extend(self, src_class_iri: str, tgt_class_iri: str, pool_size: int = 200):
+        r"""Extend mappings from a scored class pair $(c, c')$ by
+        searching from one-hop neighbors.
+
+        Search for plausible mappings between the parents of $c$ and $c'$,
+        and between the children of $c$ and $c'$. Mappings that are not
+        already computed (recorded in `self.mapping_score_dict`) and have
+        a score $\geq$ `self.mapping_extension_threshold` will be returned as
+        **new** mappings.
+
+        Args:
+            src_class_iri (str): The IRI of the source ontology class $c$.
+            tgt_class_iri (str): The IRI of the target ontology class $c'$.
+            pool_size (int, optional): The maximum number of plausible mappings to be extended. Defaults to 200.
+
+        Returns:
+            (List[EntityMapping]): A list of one-hop extended mappings.
+        """
+        candidate_pairs = self.get_one_hop_candidate_pairs(src_class_iri, tgt_class_iri, pool_size)
+        extended_mappings = self.score_candidate_pairs(candidate_pairs)
 
         self.logger.info(
             f"New mappings (in tuples) extended from {(src_class_iri, tgt_class_iri)} are:\n" + f"{extended_mappings}"
@@ -265,12 +330,15 @@ class MappingRefiner:
 
         return extended_mappings
 
-    def mapping_repair(self):
-        """Repair the filtered mappings with LogMap's debugger.
+    def mapping_repair(self, one_to_one: bool = False):
+        """Repair the filtered mappings with LogMap's debugger or the native [`MappingRepairer`][deeponto.align.repair.MappingRepairer].
         
         !!! note
             
             A sub-folder under `match` named `logmap-repair` contains LogMap-related intermediate files.
+
+        Args:
+            one_to_one (bool, optional): Whether to enforce one-to-one mappings in the native repair. Defaults to `False`.
         """
         
         # progress bar for animation purposes
@@ -293,10 +361,51 @@ class MappingRefiner:
             return 
 
         # start mapping repair
-        self.logger.info("Repair the filtered mappings with LogMap debugger.")
+        repaired_mappings = None
+        if self.repair_method == "native":
+            self.logger.info("Repair the filtered mappings with the native mapping repairer.")
+            self.load_hierarchy_indexes()
+            repairer = MappingRepairer(
+                src_parents_index=self.src_hierarchy_index[0],
+                tgt_parents_index=self.tgt_hierarchy_index[0],
+                src_disjointness_index=self.src_onto.build_disjointness_index(),
+                tgt_disjointness_index=self.tgt_onto.build_disjointness_index(),
+                one_to_one=one_to_one,
+            )
+            filtered_mappings = EntityMapping.read_table_mappings(self.filtered_mapping_path)
+            repaired_mappings = repairer.repair([m.to_tuple(with_score=True) for m in filtered_mappings])
+            self.logger.info(f"Native repair statistics: {repairer.stats}")
+        elif self.repair_method == "logmap_in_process":
+            self.logger.info("Repair the filtered mappings with LogMap debugger (in process).")
+            filtered_mappings = EntityMapping.read_table_mappings(self.filtered_mapping_path)
+            try:
+                repaired_mappings = run_logmap_repair_in_process(
+                    self.src_onto, self.tgt_onto, [m.to_tuple(with_score=True) for m in filtered_mappings], self.logger
+                )
+            except Exception as e:
+                self.logger.warning(
+                    f"In-process LogMap repair failed ({type(e).__name__}: {e}); fall back to running LogMap in a subprocess."
+                )
+        else:
+            self.logger.info("Repair the filtered mappings with LogMap debugger.")
+        if repaired_mappings is None:
+            repaired_mappings = self.run_logmap_repair_in_subprocess()
+
+        # create table mappings from LogMap repair outputs
+        with open(self.repaired_mapping_path, "w+") as f:
+            f.write("SrcEntity\tTgtEntity\tScore\n")
+            for src_ent_iri, tgt_ent_iri, score in repaired_mappings:
+                f.write(f"{src_ent_iri}\t{tgt_ent_iri}\t{score}\n")
+                repair_progress_bar.update()
+
+        self.logger.info("Mapping repair finished.")
+        repair_progress_bar.close()
+
+    def run_logmap_repair_in_subprocess(self):
+        """Run LogMap's debugger on the filtered mappings with `java -jar` and read the repaired mappings."""
         # formatting the filtered mappings
         self.logmap_repair_formatting()
-        
+
         # run the LogMap repair module on the extended mappings
         run_logmap_repair(
             self.src_onto.owl_path,
@@ -306,18 +415,13 @@ class MappingRefiner:
             Ontology.get_max_jvm_memory()
         )
 
-        # create table mappings from LogMap repair outputs
         with open(os.path.join(self.logmap_repair_path, "mappings_repaired_with_LogMap.tsv"), "r") as f:
             lines = f.readlines()
-        with open(os.path.join(self.output_path, "match", "repaired_mappings.tsv"), "w+") as f:
-            f.write("SrcEntity\tTgtEntity\tScore\n")
-            for line in lines:
-                src_ent_iri, tgt_ent_iri, score = line.split("\t")
-                f.write(f"{src_ent_iri}\t{tgt_ent_iri}\t{score}")
-                repair_progress_bar.update()
-
-        self.logger.info("Mapping repair finished.")
-        repair_progress_bar.close()
+        repaired_mappings = []
+        for line in lines:
+            src_ent_iri, tgt_ent_iri, score = line.strip().split("\t")
+            repaired_mappings.append((src_ent_iri, tgt_ent_iri, score))
+        return repaired_mappings
 
     def logmap_repair_formatting(self):
         """Transform the filtered mapping file into the LogMap format.
@@ -17,18 +17,25 @@ from __future__ import annotations
 from typing import Optional, Callable
 from yacs.config import CfgNode
 import os
+import glob
 import random
 import enlighten
+import numpy as np
+from datasets import Dataset
 from collections import defaultdict
 # import transformers
 
 from deeponto.align.mapping import ReferenceMapping
 from deeponto.onto import Ontology
-from deeponto.utils import print_dict, create_path, load_file, save_file
+from deeponto.utils import print_dict, create_path, load_file, save_file, save_arrow_file, load_arrow_file
+from deeponto.utils.cache_utils import StageCache, remove_path
+from deeponto.utils.decorators import StageProfiler, profile_stage
 from deeponto.utils.logging import create_logger
 from .text_semantics import TextSemanticsCorpora
-from .bert_classifier import BERTSynonymClassifier
+from .bert_classifier import BERTSynonymClassifier, SynonymScoreCache, LabelTokenStore
+from .distillation import SynonymClassifierDistiller
 from .mapping_prediction import MappingPredictor
+from .candidate_retrieval import DenseCandidateRetriever
 from .mapping_refinement import MappingRefiner
 
 
@@ -60,11 +67,22 @@ class BERTMapPipeline:
         tgt_annotation_index (dict): A dictionary that stores the `(class_iri, class_annotations)` pairs from `tgt_onto` according to `annotation_property_iris`.
         known_mappings (List[ReferenceMapping], optional): List of known mappings for constructing the **cross-ontology corpus**.
         auxliary_ontos (List[Ontology], optional): List of auxiliary ontolgoies for constructing any **auxiliary corpus**.
-        corpora (dict, optional): A dictionary that stores the `summary` of built text semantics corpora and the sampled `synonyms` and `nonsynonyms`.
-        finetune_data (dict, optional): A dictionary that stores the `training` and `validation` splits of samples from `corpora`.
+        corpora (Union[dict, pyarrow.Table], optional): A dictionary that stores the `summary` of built text semantics corpora and the sampled `synonyms` and `nonsynonyms`,
+            or a memory-mapped table of the labelled samples (with the `summary` in the schema metadata) if `config.text_semantics.data_format` is `arrow`.
+        finetune_data (dict, optional): A dictionary that stores the `training` and `validation` splits of samples from `corpora`, where the splits are
+            (memory-mapped) `datasets.Dataset` if `config.text_semantics.data_format` is `arrow`.
         bert (BERTSynonymClassifier, optional): A BERT model for synonym classification and mapping prediction.
+        student_synonym_classifier (BERTSynonymClassifier, optional): The compact classifier distilled from the fine-tuned BERT
+            if `config.distillation.enabled` is `True`.
+        teacher_synonym_classifier (BERTSynonymClassifier, optional): The fine-tuned BERT if the student replaces it for mapping prediction.
         best_checkpoint (str, optional): The path to the best BERT checkpoint which will be loaded after training.
+        synonym_score_cache (SynonymScoreCache, optional): The cache of annotation pair synonym scores shared by all the matching stages.
         mapping_predictor (MappingPredictor): The predictor function based on class annotations, used for **global matching** or **mapping scoring**.
+        stage_cache (StageCache, optional): The content-addressed cache of stage artifacts shared across output directories. Defaults to `None`
+            which means a stage is skipped only if its output files exist.
+        stage_keys (dict): The keys of the stages (recorded at `stage_keys.json`) that produced the artifacts in the output directory.
+        profiler (StageProfiler, optional): The profiler that records the time, memory and throughput of each stage at `metrics.json`
+            (and optionally a Chrome trace at `trace.json`). Defaults to `None` if profiling is disabled.
 
     """
 
@@ -76,8 +94,8 @@ class BERTMapPipeline:
             tgt_onto (Ontology): The target ontology for alignment.
             config (CfgNode): The configuration for BERTMap or BERTMapLt.
         """
-        # load the configuration and confirm model name is valid
-        self.config = config
+        # load the configuration (with newly introduced options filled by defaults) and confirm model name is valid
+        self.config = self.fill_default_bertmap_config(config)
         self.name = self.config.model
         if not self.name in MODEL_OPTIONS.keys():
             raise RuntimeError(f"`model` {self.name} in the config file is not one of the supported.")
@@ -92,6 +110,14 @@ class BERTMapPipeline:
         self.logger = create_logger(self.name, self.output_path)
         self.enlighten_manager = enlighten.get_manager()
 
+        # stage profiler
+        self.profiler = None
+        if self.config.profiling.enabled:
+            self.profiler = StageProfiler(
+                metrics_file=os.path.join(self.output_path, "metrics.json"),
+                trace_file=os.path.join(self.output_path, "trace.json") if self.config.profiling.chrome_trace else None,
+            )
+
         # ontology
         self.src_onto = src_onto
         self.tgt_onto = tgt_onto
@@ -101,11 +127,16 @@ class BERTMapPipeline:
         self.logger.info(f"Save the configuration file at {config_path}.")
         self.save_bertmap_config(self.config, config_path)
 
+        # content-addressed stage cache
+        self.stage_cache = None
+        self.stage_keys_path = os.path.join(self.output_path, "stage_keys.json")
+        self.stage_keys = load_file(self.stage_keys_path) if os.path.exists(self.stage_keys_path) else dict()
+        if self.config.stage_cache.enabled:
+            self.stage_cache = StageCache(self.config.stage_cache.cache_path)
+            self.logger.info(f"Use the stage cache at {self.stage_cache.cache_path}.")
+
         # build the annotation thesaurus
-        self.src_annotation_index, _ = self.src_onto.build_annotation_index(self.annotation_property_iris, apply_lowercasing=True)
-        self.tgt_annotation_index, _ = self.tgt_onto.build_annotation_index(self.annotation_property_iris, apply_lowercasing=True)
-        if (not self.src_annotation_index) or (not self.tgt_annotation_index):
-            raise RuntimeError("No class annotations found in input ontologies; unable to produce alignment.")
+        self.load_annotation_indexes()
 
         # provided mappings if any
         self.known_mappings = self.config.known_mappings
@@ -113,17 +144,18 @@ class BERTMapPipeline:
             self.known_mappings = ReferenceMapping.read_table_mappings(self.known_mappings)
 
         # auxiliary ontologies if any
-        self.auxiliary_ontos = self.config.auxiliary_ontos
-        if self.auxiliary_ontos:
-            self.auxiliary_ontos = [Ontology(ao) for ao in self.auxiliary_ontos]
+        self.auxiliary_ontos = self.load_auxiliary_ontos()
 
         self.data_path = os.path.join(self.output_path, "data")
+        self.data_format = self.config.text_semantics.data_format
+        if self.data_format not in ["json", "arrow"]:
+            raise ValueError(f"Unknown data format: {self.data_format}; choose from `json` or `arrow`.")
         # load or construct the corpora
-        self.corpora_path = os.path.join(self.data_path, "text-semantics.corpora.json")
+        self.corpora_path = os.path.join(self.data_path, f"text-semantics.corpora.{self.data_format}")
         self.corpora = self.load_text_semantics_corpora()
 
         # load or construct fine-tune data
-        self.finetune_data_path = os.path.join(self.data_path, "fine-tune.data.json")
+        self.finetune_data_path = os.path.join(self.data_path, f"fine-tune.data.{self.data_format}")
         self.finetune_data = self.load_finetune_data()
 
         # load the bert model and train
@@ -133,22 +165,33 @@ class BERTMapPipeline:
         self.bert_resume_training = self.bert_config.resume_training
         self.bert_synonym_classifier = None
         self.best_checkpoint = None
+        self.synonym_score_cache = None
+        self.synonym_score_cache_path = os.path.join(self.bert_finetuned_path, "synonym_score_cache.pkl")
         if self.name == "bertmap":
-            self.bert_synonym_classifier = self.load_bert_synonym_classifier()
-            # train if the loaded classifier is not in eval mode
-            if self.bert_synonym_classifier.eval_mode == False:
-                self.logger.info(
-                    f"Data statistics:\n \
-                    {print_dict(self.bert_synonym_classifier.data_stat)}"
-                )
-                self.bert_synonym_classifier.train(self.bert_resume_training)
-                # turn on eval mode after training
-                self.bert_synonym_classifier.eval()
-            # NOTE potential redundancy here: after training, load the best checkpoint
-            self.best_checkpoint = self.load_best_checkpoint()
-            if not self.best_checkpoint:
-                raise RuntimeError(f"No best checkpoint found for the BERT synonym classifier model.")
-            self.logger.info(f"Fine-tuning finished, found best checkpoint at {self.best_checkpoint}.")
+            self.run_stage(
+                "fine_tuning",
+                {
+                    "fine_tune_data": self.hash_file(self.finetune_data_path),
+                    "bert": {
+                        k: self.bert_config[k]
+                        for k in [
+                            "pretrained_path",
+                            "max_length_for_input",
+                            "num_epochs_for_training",
+                            "batch_size_for_training",
+                            "group_by_length",
+                            "max_tokens_for_training",
+                        ]
+                    },
+                },
+                artifact_paths=lambda: [self.load_best_checkpoint()],
+                run=self.fine_tune_bert_synonym_classifier,
+                stale_paths=lambda: glob.glob(os.path.join(self.bert_finetuned_path, "checkpoint-*"))
+                + [self.synonym_score_cache_path, os.path.join(self.bert_finetuned_path, "inference_backend.json")],
+            )
+            self.load_label_token_store()
+            self.load_inference_backend()
+            self.synonym_score_cache = self.load_synonym_score_cache()
         else:
             self.logger.info(f"No training needed; skip BERT fine-tuning.")
             
@@ -176,25 +219,67 @@ class BERTMapPipeline:
                 if use_in_alignment and str(use_in_alignment[0]).lower() == "false":
                     self.ignored_class_index[tgt_class_iri] = True
                     
-        self.mapping_predictor = MappingPredictor(
-            output_path=self.output_path,
-            tokenizer_path=self.bert_config.pretrained_path,
-            src_annotation_index=self.src_annotation_index,
-            tgt_annotation_index=self.tgt_annotation_index,
-            bert_synonym_classifier=self.bert_synonym_classifier,
-            num_raw_candidates=self.global_matching_config.num_raw_candidates,
-            num_best_predictions=self.global_matching_config.num_best_predictions,
-            batch_size_for_prediction=self.bert_config.batch_size_for_prediction,
-            logger=self.logger,
-            enlighten_manager=self.enlighten_manager,
-            enlighten_status=self.enlighten_status,
-            ignored_class_index=self.ignored_class_index,
-        )
+        self.dense_candidate_retriever = self.load_dense_candidate_retriever()
+        self.mapping_predictor = self.load_mapping_predictor()
         self.mapping_refiner = None
 
+        # distil the fine-tuned BERT into a compact student classifier (and use it as the scorer if specified)
+        self.distillation_config = self.config.distillation
+        self.student_path = os.path.join(self.bert_finetuned_path, "student")
+        self.student_synonym_classifier = None
+        self.teacher_synonym_classifier = None
+        if self.name == "bertmap" and self.distillation_config.enabled:
+            self.run_stage(
+                "distillation",
+                {
+                    "ontologies": self.get_ontology_stage_inputs(),
+                    "model": self.stage_keys.get("fine_tuning"),
+                    "max_length_for_input": self.bert_config.max_length_for_input,
+                    # the target class candidates scored by the teacher
+                    "global_matching": {
+                        k: self.global_matching_config[k] for k in ["num_raw_candidates", "for_oaei", "dense_retrieval"]
+                    },
+                    "distillation": {k: v for k, v in self.distillation_config.items() if k != "use_for_matching"},
+                },
+                artifact_paths=[self.student_path],
+                run=self.distill_student_synonym_classifier,
+            )
+            if self.distillation_config.use_for_matching:
+                self.use_student_synonym_classifier()
+        # the stage key of the model that scores the mappings
+        scorer_key = self.stage_keys.get("distillation" if self.teacher_synonym_classifier else "fine_tuning")
+
         # if global matching is disabled (potentially used for class pair scoring)
         if self.config.global_matching.enabled:
-            self.mapping_predictor.mapping_prediction()  # mapping prediction
+            match_path = os.path.join(self.output_path, "match")
+            self.run_stage(
+                "mapping_prediction",
+                {
+                    "ontologies": self.get_ontology_stage_inputs(),
+                    "model": scorer_key if self.name == "bertmap" else None,
+                    "bert": {
+                        k: self.bert_config[k]
+                        for k in ["pretrained_path", "max_length_for_input", "inference_backend", "quantize"]
+                    },
+                    "global_matching": {
+                        k: self.global_matching_config[k]
+                        for k in [
+                            "num_raw_candidates",
+                            "num_best_predictions",
+                            "for_oaei",
+                            "lexical_scorer",
+                            "dense_retrieval",
+                            "cascade",
+                        ]
+                    },
+                },
+                artifact_paths=[os.path.join(match_path, f) for f in ["raw_mappings.json", "raw_mappings.tsv"]],
+                run=self.mapping_predictor.mapping_prediction,  # mapping prediction
+                stale_paths=[
+                    os.path.join(match_path, f) for f in ["raw_mappings.json", "raw_mappings.tsv", "cascade_report.json"]
+                ],
+            )
+            self.save_synonym_score_cache()
             if self.name == "bertmap":
                 self.mapping_refiner = MappingRefiner(
                     output_path=self.output_path,
@@ -205,22 +290,198 @@ class BERTMapPipeline:
                     mapping_filtered_threshold=self.global_matching_config.mapping_filtered_threshold,
                     logger=self.logger,
                     enlighten_manager=self.enlighten_manager,
-                    enlighten_status=self.enlighten_status
+                    enlighten_status=self.enlighten_status,
+                    repair_method=self.global_matching_config.repair_method,
+                )
+                self.run_stage(
+                    "mapping_extension",
+                    {
+                        "ontologies": self.get_ontology_stage_inputs(),
+                        "model": scorer_key,
+                        "raw_mappings": self.hash_file(os.path.join(match_path, "raw_mappings.tsv")),
+                        "global_matching": {
+                            k: self.global_matching_config[k]
+                            for k in ["mapping_extension_threshold", "mapping_filtered_threshold", "extension"]
+                        },
+                    },
+                    artifact_paths=[self.mapping_refiner.extended_mapping_path, self.mapping_refiner.filtered_mapping_path],
+                    run=lambda: self.mapping_refiner.mapping_extension(
+                        max_iter=self.global_matching_config.extension.max_iter,
+                        pool_size=self.global_matching_config.extension.pool_size,
+                        budget=self.global_matching_config.extension.budget,
+                    ),  # mapping extension
+                )
+                self.save_synonym_score_cache()
+                self.run_stage(
+                    "mapping_repair",
+                    {
+                        "ontologies": self.get_ontology_stage_inputs(),
+                        "filtered_mappings": self.hash_file(self.mapping_refiner.filtered_mapping_path),
+                        "global_matching": {
+                            k: self.global_matching_config[k] for k in ["repair_method", "native_repair"]
+                        },
+                    },
+                    artifact_paths=[self.mapping_refiner.repaired_mapping_path],
+                    run=lambda: self.mapping_refiner.mapping_repair(
+                        one_to_one=self.global_matching_config.native_repair.one_to_one
+                    ),  # mapping repair
+                    stale_paths=[self.mapping_refiner.repaired_mapping_path, self.mapping_refiner.logmap_repair_path],
                 )
-                self.mapping_refiner.mapping_extension()  # mapping extension
-                self.mapping_refiner.mapping_repair()  # mapping repair
             self.enlighten_status.update(demo="Finished")  
         else:
             self.enlighten_status.update(demo="Skipped")  
               
         self.enlighten_status.close()
+        if self.profiler:
+            self.profiler.save()
+            self.logger.info(f"Save the stage metrics at {self.profiler.metrics_file}.")
 
         # class pair scoring is invoked outside
 
-    def load_or_construct(self, data_file: str, data_name: str, construct_func: Callable, *args, **kwargs):
+    @profile_stage("annotation_index")
+    def load_annotation_indexes(self):
+        """Build the annotation indexes of the source and target ontologies according to `annotation_property_iris`."""
+        self.src_annotation_index, _ = self.src_onto.build_annotation_index(self.annotation_property_iris, apply_lowercasing=True)
+        self.tgt_annotation_index, _ = self.tgt_onto.build_annotation_index(self.annotation_property_iris, apply_lowercasing=True)
+        if (not self.src_annotation_index) or (not self.tgt_annotation_index):
+            raise RuntimeError("No class annotations found in input ontologies; unable to produce alignment.")
+
+    @profile_stage("auxiliary_ontology_loading")
+    def load_auxiliary_ontos(self):
+        """Load the auxiliary ontologies (if any)."""
+        if not self.config.auxiliary_ontos:
+            return self.config.auxiliary_ontos
+        return [Ontology(ao) for ao in self.config.auxiliary_ontos]
+
+    def run_stage(
+        self,
+        stage_name: str,
+        stage_inputs: dict,
+        artifact_paths: list[str] | Callable[[], list[str]],
+        run: Callable,
+        stale_paths: list[str] | Callable[[], list[str]] | None = None,
+    ):
+        r"""Run a pipeline stage with the content-addressed stage cache (if enabled).
+
+        The stage key is computed from `stage_inputs`. If the key differs from the one recorded for the output
+        directory (at `stage_keys.json`), the existing outputs of the stage are stale and removed (`stale_paths`).
+        If the key is found in the cache, the artifacts are restored into the output directory such that `run`
+        merely loads them; otherwise, `run` computes the stage and its artifacts are stored in the cache.
+
+        !!! note
+
+            Outputs produced before the stage cache is enabled (i.e., without a recorded key) are reused as is,
+            but they are never stored in the (shared) cache because their origin is unknown. The key of a stage is
+            recorded only after the stage completes, so the partial outputs of an interrupted stage are not taken as up to date.
+
+        Args:
+            stage_name (str): The name of the stage.
+            stage_inputs (dict): Everything the stage depends on, e.g., the ontology content hashes, the relevant
+                configuration subtree, and the hashes (or keys) of the upstream artifacts.
+            artifact_paths (Union[List[str], Callable[[], List[str]]]): The paths of the artifacts produced by the stage
+                (or a function that returns them after the stage has run).
+            run (Callable): The function that runs (or resumes) the stage and loads its artifacts.
+            stale_paths (Union[List[str], Callable[[], List[str]]], optional): The paths of the outputs to be removed when
+                invalidated. Defaults to `None` which means `artifact_paths`.
+        Returns:
+            (Any): The return value of `run`.
+        """
+        if self.profiler is None:
+            return self._run_stage(stage_name, stage_inputs, artifact_paths, run, stale_paths, dict())
+        with self.profiler.stage(stage_name, throughput_of="num_scored_pairs") as record:
+            return self._run_stage(stage_name, stage_inputs, artifact_paths, run, stale_paths, record)
+
+    def _run_stage(
+        self,
+        stage_name: str,
+        stage_inputs: dict,
+        artifact_paths: list[str] | Callable[[], list[str]],
+        run: Callable,
+        stale_paths: list[str] | Callable[[], list[str]] | None,
+        record: dict,
+    ):
+        if self.stage_cache is None:
+            record["stage_cache"] = "disabled"
+            return self.run_with_inference_stats(run, record)
+
+        key = self.stage_cache.stage_key(stage_name, stage_inputs)
+        recorded_key = self.stage_keys.get(stage_name)
+        stale_paths = stale_paths if stale_paths is not None else artifact_paths
+        stale_paths = stale_paths() if callable(stale_paths) else stale_paths
+        if recorded_key is not None and recorded_key != key:
+            self.logger.info(f"Inputs of stage `{stage_name}` changed; remove its stale outputs.")
+            for path in stale_paths:
+                remove_path(path)
+            # NOTE: the key is recorded again only after the stage completes
+            del self.stage_keys[stage_name]
+            save_file(self.stage_keys, self.stage_keys_path)
+            recorded_key = None
+        # outputs without a recorded key are produced before the stage cache is enabled or by an interrupted run
+        unknown_outputs = recorded_key is None and any(map(os.path.exists, stale_paths))
+
+        restored = None
+        up_to_date = False
+        if recorded_key == key:
+            # NOTE: resolve (callable) artifact paths such that up-to-date outputs are not restored over themselves
+            current_artifact_paths = artifact_paths() if callable(artifact_paths) else artifact_paths
+            up_to_date = all(p and os.path.exists(p) for p in current_artifact_paths)
+        if not up_to_date:
+            restored = self.stage_cache.restore(stage_name, key, self.output_path)
+        record["stage_cache"] = "hit" if restored is not None else "miss"
+        if restored is not None:
+            self.logger.info(f"Restore the outputs of stage `{stage_name}` from the stage cache (key: {key}).")
+            unknown_outputs = False
+        result = self.run_with_inference_stats(run, record)
+        self.stage_keys[stage_name] = key
+        save_file(self.stage_keys, self.stage_keys_path)
+        if unknown_outputs:
+            self.logger.info(f"Outputs of stage `{stage_name}` are reused from an unknown run and not stored in the stage cache.")
+        elif restored is None and not self.stage_cache.has(stage_name, key):
+            artifact_paths = artifact_paths() if callable(artifact_paths) else artifact_paths
+            artifact_paths = [os.path.relpath(p, self.output_path) for p in artifact_paths if p and os.path.exists(p)]
+            self.stage_cache.store(stage_name, key, self.output_path, artifact_paths, stage_inputs)
+            self.logger.info(f"Store the outputs of stage `{stage_name}` in the stage cache (key: {key}).")
+        return result
+
+    def run_with_inference_stats(self, run: Callable, record: dict):
+        """Run a stage and add the BERT inference statistics (and the synonym score cache hit rate) incurred in the stage to its record."""
+        classifier, score_cache = self.bert_synonym_classifier, self.synonym_score_cache
+        inference_stats = dict(classifier.inference_stats) if classifier else None
+        cache_stats = (score_cache.num_hits, score_cache.num_misses) if score_cache else None
+        result = run()
+        # NOTE: the classifier and the cache may be created within the stage (e.g., fine-tuning)
+        if inference_stats is not None and self.bert_synonym_classifier is classifier:
+            for k, v in classifier.inference_stats.items():
+                record[k] = round(v - inference_stats[k], 4) if isinstance(v, float) else v - inference_stats[k]
+            if record["num_scored_pairs"]:
+                record["scored_pairs_per_inference_second"] = round(
+                    record["num_scored_pairs"] / max(record["inference_time"], 1e-9), 3
+                )
+        if cache_stats is not None and self.synonym_score_cache is score_cache:
+            num_hits, num_misses = score_cache.num_hits - cache_stats[0], score_cache.num_misses - cache_stats[1]
+            record["score_cache_hit_rate"] = round(num_hits / (num_hits + num_misses), 4) if num_hits + num_misses else None
+        return result
+
+    def hash_file(self, file_path: str | None) -> str | None:
+        """Compute the content hash of a (stage input) file if the stage cache is enabled."""
+        if self.stage_cache is None or not file_path:
+            return None
+        return self.stage_cache.hash_file(file_path)
+
+    def get_ontology_stage_inputs(self):
+        """Get the stage inputs shared by all stages, i.e., the ontology content hashes and the annotation properties."""
+        return {
+            "src_onto": self.hash_file(self.src_onto.owl_path),
+            "tgt_onto": self.hash_file(self.tgt_onto.owl_path),
+            "annotation_property_iris": list(self.annotation_property_iris),
+        }
+
+    def load_or_construct(
+        self, data_file: str, data_name: str, construct_func: Callable, *args, load_func: Callable = load_file, **kwargs
+    ):
         """Load existing data or construct a new one.
 
-        An auxlirary function that checks the existence of a data file and loads it if it exists.
+        An auxlirary function that checks the existence of a data file and loads it (by `load_func`) if it exists.
         Otherwise, construct new data with the input `construct_func` which is supported generate
         a local data file.
         """
@@ -230,7 +491,7 @@ class BERTMapPipeline:
             self.logger.info(f"Construct new {data_name} and save at {data_file}.")
             construct_func(*args, **kwargs)
         # load the data file that is supposed to be saved locally
-        return load_file(data_file)
+        return load_func(data_file)
 
     def load_text_semantics_corpora(self):
         """Load or construct text semantics corpora.
@@ -248,11 +509,29 @@ class BERTMapPipeline:
                     annotation_property_iris=self.annotation_property_iris,
                     class_mappings=self.known_mappings,
                     auxiliary_ontos=self.auxiliary_ontos,
+                    max_synonyms_per_group=self.config.text_semantics.max_synonyms_per_group,
+                    num_workers=self.config.text_semantics.num_workers,
                 )
                 self.logger.info(str(corpora))
-                corpora.save(self.data_path)
-
-            return self.load_or_construct(self.corpora_path, data_name, construct)
+                corpora.save(self.data_path, data_format=self.data_format)
+
+            return self.run_stage(
+                "text_semantics_corpora",
+                {
+                    "ontologies": self.get_ontology_stage_inputs(),
+                    "known_mappings": self.hash_file(self.config.known_mappings),
+                    "auxiliary_ontos": [self.hash_file(ao.owl_path) for ao in self.auxiliary_ontos or []],
+                    # the samples do not depend on the number of workers
+                    "text_semantics": {k: v for k, v in self.config.text_semantics.items() if k != "num_workers"},
+                },
+                artifact_paths=[self.corpora_path],
+                run=lambda: self.load_or_construct(
+                    self.corpora_path,
+                    data_name,
+                    construct,
+                    load_func=load_arrow_file if self.data_format == "arrow" else load_file,
+                ),
+            )
 
         self.logger.info(f"No training needed; skip the construction of {data_name}.")
         return None
@@ -264,12 +543,35 @@ class BERTMapPipeline:
 
         1. Mix synonym and nonsynonym data.
         2. Randomly sample 90% as training samples and 10% as validation.
+
+        In the `arrow` data format, the shuffled samples are streamed from the memory-mapped corpora into a single
+        `fine-tune.data.arrow` file (training samples first) and the splits are loaded as zero-copy slices of it.
         """
         data_name = "fine-tuning data"
 
         if self.name == "bertmap":
 
+            def construct_arrow():
+                num_samples = self.corpora.num_rows
+                order = np.random.default_rng(random.getrandbits(64)).permutation(num_samples)
+                split_index = int(0.9 * num_samples)  # split at 90%
+                chunk_size = 100000
+                schema = self.corpora.schema.with_metadata({"num_training": str(split_index)})
+                save_arrow_file(
+                    (
+                        self.corpora.take(order[i : i + chunk_size]).replace_schema_metadata(schema.metadata)
+                        for i in range(0, num_samples, chunk_size)
+                    ),
+                    schema,
+                    self.finetune_data_path,
+                )
+
             def construct():
+                # remove the tokenised data cached for the previous fine-tuning data
+                for cache_file in glob.glob(os.path.join(self.data_path, "tokenised-*.arrow")):
+                    os.remove(cache_file)
+                if self.data_format == "arrow":
+                    return construct_arrow()
                 finetune_data = dict()
                 samples = self.corpora["synonyms"] + self.corpora["nonsynonyms"]
                 random.shuffle(samples)
@@ -278,11 +580,55 @@ class BERTMapPipeline:
                 finetune_data["validation"] = samples[split_index:]
                 save_file(finetune_data, self.finetune_data_path)
 
-            return self.load_or_construct(self.finetune_data_path, data_name, construct)
+            return self.run_stage(
+                "fine_tune_data",
+                {"corpora": self.hash_file(self.corpora_path)},
+                artifact_paths=[self.finetune_data_path],
+                run=lambda: self.load_or_construct(
+                    self.finetune_data_path,
+                    data_name,
+                    construct,
+                    load_func=self.load_finetune_data_file,
+                ),
+            )
 
         self.logger.info(f"No training needed; skip the construction of {data_name}.")
         return None
 
+    @staticmethod
+    def load_finetune_data_file(finetune_data_file: str):
+        """Load the fine-tuning data file, where the splits of an `.arrow` file are memory-mapped `datasets.Dataset`."""
+        if not finetune_data_file.endswith(".arrow"):
+            return load_file(finetune_data_file)
+        dataset = Dataset.from_file(finetune_data_file)
+        num_training = int(load_arrow_file(finetune_data_file).schema.metadata[b"num_training"])
+        return {
+            "training": dataset.select(range(num_training)),
+            "validation": dataset.select(range(num_training, len(dataset))),
+        }
+
+    def fine_tune_bert_synonym_classifier(self):
+        """Load the BERT synonym classifier and train it if no best checkpoint is found (or training is resumed)."""
+        self.bert_synonym_classifier = self.load_bert_synonym_classifier()
+        # train if the loaded classifier is not in eval mode
+        if self.bert_synonym_classifier.eval_mode == False:
+            self.logger.info(
+                f"Data statistics:\n \
+                {print_dict(self.bert_synonym_classifier.data_stat)}"
+            )
+            self.bert_synonym_classifier.train(self.bert_resume_training)
+            self.logger.info(
+                f"Training throughput:\n \
+                {print_dict(self.bert_synonym_classifier.training_throughput)}"
+            )
+            # turn on eval mode after training
+            self.bert_synonym_classifier.eval()
+        # NOTE potential redundancy here: after training, load the best checkpoint
+        self.best_checkpoint = self.load_best_checkpoint()
+        if not self.best_checkpoint:
+            raise RuntimeError(f"No best checkpoint found for the BERT synonym classifier model.")
+        self.logger.info(f"Fine-tuning finished, found best checkpoint at {self.best_checkpoint}.")
+
     def load_bert_synonym_classifier(self):
         """Load the BERT model from a pre-trained or a local checkpoint.
 
@@ -306,10 +652,234 @@ class BERTMapPipeline:
             num_epochs_for_training=self.bert_config.num_epochs_for_training,
             batch_size_for_training=self.bert_config.batch_size_for_training,
             batch_size_for_prediction=self.bert_config.batch_size_for_prediction,
+            max_tokens_for_prediction=self.bert_config.max_tokens_for_prediction,
+            num_workers_for_tokenization=self.bert_config.num_workers_for_tokenization,
+            tokenized_data_path=self.data_path,
+            group_by_length=self.bert_config.group_by_length,
+            max_tokens_for_training=self.bert_config.max_tokens_for_training,
             training_data=self.finetune_data["training"],
             validation_data=self.finetune_data["validation"],
         )
 
+    def distill_student_synonym_classifier(self):
+        """Load the student classifier, or distil it from the fine-tuned BERT synonym classifier (the teacher) if not found.
+
+        See [`SynonymClassifierDistiller`][deeponto.align.bertmap.distillation.SynonymClassifierDistiller]. The student is
+        trained on (a sample of) the training split of the fine-tuning data and the annotation pairs of the target class
+        candidates of sampled source classes, all scored by the teacher. Its speed/accuracy trade-off against the teacher
+        is measured on (a sample of) the validation split and saved at `bert/student/distillation_report.json`.
+        """
+        config = self.distillation_config
+        report_path = os.path.join(self.student_path, "distillation_report.json")
+        if not os.path.exists(os.path.join(self.student_path, "config.json")):
+            distiller = SynonymClassifierDistiller(
+                teacher=self.bert_synonym_classifier,
+                student_path=self.student_path,
+                max_length_for_input=self.bert_config.max_length_for_input,
+                student_pretrained_path=config.student_pretrained_path,
+                num_student_layers=config.num_student_layers,
+                temperature=config.temperature,
+                alpha=config.alpha,
+                num_epochs_for_training=config.num_epochs_for_training,
+                batch_size_for_training=config.batch_size_for_training,
+                learning_rate=config.learning_rate,
+                group_by_length=self.bert_config.group_by_length,
+                seed=config.seed,
+            )
+            annotation_pairs, labels = self.sample_finetune_data("training", config.num_corpus_pairs, config.seed)
+            candidate_pairs = self.mapping_predictor.sample_candidate_annotation_pairs(
+                config.num_src_classes_for_candidates, config.num_candidates_per_class, seed=config.seed
+            )
+            self.logger.info(
+                f"Score {len(annotation_pairs)} fine-tuning pairs and {len(candidate_pairs)} candidate pairs with the teacher for distillation."
+            )
+            annotation_pairs += candidate_pairs
+            labels += [None] * len(candidate_pairs)
+            teacher_scores = self.mapping_predictor.bert_synonym_scores(annotation_pairs)
+            distiller.distill(annotation_pairs, teacher_scores, labels)
+            self.logger.info(f"Distillation throughput:\n{print_dict(distiller.training_throughput)}")
+            remove_path(report_path)
+
+        self.student_synonym_classifier = BERTSynonymClassifier(
+            loaded_path=self.student_path,
+            output_path=self.student_path,
+            eval_mode=True,
+            max_length_for_input=self.bert_config.max_length_for_input,
+            batch_size_for_prediction=self.bert_config.batch_size_for_prediction,
+            max_tokens_for_prediction=self.bert_config.max_tokens_for_prediction,
+        )
+        if not os.path.exists(report_path):
+            validation_pairs, validation_labels = self.sample_finetune_data(
+                "validation", config.num_pairs_for_report, config.seed
+            )
+            report = SynonymClassifierDistiller.speed_accuracy_report(
+                self.bert_synonym_classifier,
+                self.student_synonym_classifier,
+                validation_pairs,
+                validation_labels,
+                batch_size=self.bert_config.batch_size_for_prediction,
+            )
+            save_file(report, report_path)
+        self.logger.info(f"Distillation report (teacher vs. student):\n{print_dict(load_file(report_path))}")
+
+    def use_student_synonym_classifier(self):
+        """Replace the fine-tuned BERT (kept as the teacher) by the distilled student classifier as the scorer of the mapping
+        predictor, with the label tokenisation, the inference backend and the synonym score cache set up as for the teacher.
+        """
+        # keep the teacher scores computed for distillation
+        self.save_synonym_score_cache()
+        self.teacher_synonym_classifier = self.bert_synonym_classifier
+        self.bert_synonym_classifier = self.student_synonym_classifier
+        self.synonym_score_cache_path = os.path.join(self.student_path, "synonym_score_cache.pkl")
+        self.load_label_token_store()
+        self.load_inference_backend(self.student_path)
+        self.synonym_score_cache = self.load_synonym_score_cache(self.student_path)
+        self.mapping_predictor.bert_synonym_classifier = self.bert_synonym_classifier
+        self.logger.info(f"Use the distilled student classifier at {self.student_path} for mapping prediction.")
+
+    def sample_finetune_data(self, split: str, num_samples: int | None = None, seed: int | None = None):
+        """Sample (all if `num_samples` is `None`) the `(annotation1, annotation2)` pairs and the labels of a split of the fine-tuning data."""
+        data = self.finetune_data[split]
+        idxs = list(range(len(data)))
+        if num_samples is not None and num_samples < len(idxs):
+            idxs = sorted(random.Random(seed).sample(idxs, num_samples))
+        if isinstance(data, Dataset):
+            columns = data.select(idxs).to_dict()
+            return list(zip(columns["annotation1"], columns["annotation2"])), list(columns["labels"])
+        return [(data[i][0], data[i][1]) for i in idxs], [data[i][2] for i in idxs]
+
+    @profile_stage("mapping_predictor_loading")
+    def load_mapping_predictor(self):
+        """Load the mapping predictor (which builds the sub-word inverted index of the target annotations)."""
+        return MappingPredictor(
+            output_path=self.output_path,
+            tokenizer_path=self.bert_config.pretrained_path,
+            src_annotation_index=self.src_annotation_index,
+            tgt_annotation_index=self.tgt_annotation_index,
+            bert_synonym_classifier=self.bert_synonym_classifier,
+            num_raw_candidates=self.global_matching_config.num_raw_candidates,
+            num_best_predictions=self.global_matching_config.num_best_predictions,
+            batch_size_for_prediction=self.bert_config.batch_size_for_prediction,
+            logger=self.logger,
+            enlighten_manager=self.enlighten_manager,
+            enlighten_status=self.enlighten_status,
+            ignored_class_index=self.ignored_class_index,
+            lexical_scorer=self.global_matching_config.lexical_scorer,
+            num_workers_for_lexical_scoring=self.global_matching_config.num_workers_for_lexical_scoring,
+            dense_candidate_retriever=self.dense_candidate_retriever,
+            num_dense_candidates=self.global_matching_config.dense_retrieval.num_candidates,
+            rrf_k=self.global_matching_config.dense_retrieval.rrf_k,
+            num_src_classes_per_dense_query=self.global_matching_config.dense_retrieval.num_src_classes_per_query,
+            cascade_config=self.global_matching_config.cascade,
+            num_prefetch_workers=self.bert_config.num_prefetch_workers,
+            max_prefetched_batches=self.bert_config.max_prefetched_batches,
+        )
+
+    @profile_stage("dense_index")
+    def load_dense_candidate_retriever(self):
+        """Load the dense candidate retriever if enabled; the target annotation embeddings are cached at `match/dense_index`."""
+        dense_config = self.global_matching_config.dense_retrieval
+        if not dense_config.enabled:
+            return None
+        encoder_path = dense_config.encoder_path or self.bert_config.pretrained_path
+        self.logger.info(f"Load the encoder for dense candidate retrieval from: {encoder_path}.")
+        return DenseCandidateRetriever(
+            encoder_path=encoder_path,
+            cache_path=os.path.join(self.output_path, "match", "dense_index"),
+            batch_size=dense_config.batch_size,
+            max_length=dense_config.max_length,
+        )
+
+    @profile_stage("label_tokenisation")
+    def load_label_token_store(self):
+        """Tokenise the class labels of both ontologies once such that the BERT synonym classifier assembles
+        its input pairs from the stored token ids instead of tokenising every annotation pair.
+        """
+        if not self.bert_config.pretokenize_labels:
+            return
+        label_token_store = LabelTokenStore(
+            self.bert_synonym_classifier.tokenizer._tokenizer, self.bert_config.max_length_for_input
+        )
+        for annotation_index in [self.src_annotation_index, self.tgt_annotation_index]:
+            label_token_store.add([label for labels in annotation_index.values() for label in labels])
+        self.logger.info(f"Pre-tokenise {len(label_token_store)} unique class labels.")
+        self.bert_synonym_classifier.label_token_store = label_token_store
+
+    @profile_stage("inference_backend")
+    def load_inference_backend(self, checkpoint: str | None = None):
+        """Set the inference backend of the BERT synonym classifier according to the configuration.
+
+        For a backend other than the plain eager model, the score parity against the eager model and the
+        throughput are measured on (a subset of) the validation data and saved at `bert/inference_backend.json`
+        (or in the directory of `checkpoint` if specified, e.g., of the student classifier).
+        """
+        backend, quantize = self.bert_config.inference_backend, self.bert_config.quantize
+        if backend == "eager" and not quantize:
+            return
+        report_path = os.path.join(checkpoint or self.bert_finetuned_path, "inference_backend.json")
+        checkpoint = checkpoint or self.best_checkpoint
+        self.logger.info(f"Set the inference backend to {backend} (int8 quantisation: {quantize}).")
+        self.bert_synonym_classifier.set_inference_backend(
+            backend, quantize, export_path=os.path.join(checkpoint, "onnx")
+        )
+        # measure score parity and throughput on the validation data
+        validation_data = self.finetune_data["validation"][: self.bert_config.num_pairs_for_backend_validation]
+        if isinstance(validation_data, dict):
+            # columns of a `datasets.Dataset` slice
+            validation_pairs = list(zip(validation_data["annotation1"], validation_data["annotation2"]))
+        else:
+            validation_pairs = [(left, right) for left, right, _ in validation_data]
+        batch_size = self.bert_config.batch_size_for_prediction
+        validation_batches = [
+            self.bert_synonym_classifier.process_inputs(validation_pairs[i : i + batch_size])
+            for i in range(0, len(validation_pairs), batch_size)
+        ]
+        inference_backend = self.bert_synonym_classifier.inference_backend
+        report = {
+            "backend": backend,
+            "quantize": quantize,
+            "num_validation_pairs": len(validation_pairs),
+            "parity": inference_backend.check_parity(validation_batches),
+            "benchmark": inference_backend.benchmark(validation_batches),
+        }
+        self.logger.info(f"Inference backend report:\n{print_dict(report)}")
+        save_file(report, report_path)
+
+    @profile_stage("score_cache_loading")
+    def load_synonym_score_cache(self, checkpoint: str | None = None):
+        """Attach a synonym score cache to the BERT synonym classifier so that every annotation pair is
+        scored at most once across global matching and mapping extension.
+
+        The cache is restored from `bert/synonym_score_cache.pkl` if it was saved by the same best checkpoint
+        (or by `checkpoint` if specified, e.g., of the student classifier) with the same weights.
+        """
+        cache_config = self.bert_config.score_cache
+        if not cache_config.enabled:
+            self.logger.info("Synonym score cache is disabled.")
+            return None
+        synonym_score_cache = SynonymScoreCache(
+            max_size=cache_config.max_size,
+            symmetric=cache_config.symmetric,
+            model_id=SynonymScoreCache.get_model_id(checkpoint or self.best_checkpoint),
+        )
+        if cache_config.save and synonym_score_cache.load(self.synonym_score_cache_path):
+            self.logger.info(
+                f"Load {len(synonym_score_cache)} cached synonym scores from {self.synonym_score_cache_path}."
+            )
+        self.bert_synonym_classifier.score_cache = synonym_score_cache
+        return synonym_score_cache
+
+    def save_synonym_score_cache(self):
+        """Save the synonym score cache (if enabled) and log its hit rate."""
+        if self.synonym_score_cache is None:
+            return
+        self.logger.info(
+            f"Synonym score cache: {len(self.synonym_score_cache)} annotation pairs cached "
+            + f"with a hit rate of {self.synonym_score_cache.hit_rate:.4f}."
+        )
+        if self.bert_config.score_cache.save:
+            self.synonym_score_cache.save(self.synonym_score_cache_path)
+
     def load_best_checkpoint(self) -> Optional[str]:
         """Find the best checkpoint by searching for trainer states in each checkpoint file."""
         best_checkpoint = -1
@@ -345,6 +915,21 @@ class BERTMapPipeline:
             raise RuntimeError("Configuration file should be in `yaml` format.")
         return CfgNode(load_file(config_file))
 
+    @staticmethod
+    def fill_default_bertmap_config(config: CfgNode):
+        """Fill the options missing in a (possibly older) BERTMap configuration with the default values."""
+        default_config = CfgNode(load_file(DEFAULT_CONFIG_FILE))
+
+        def fill(cfg: CfgNode, default_cfg: CfgNode):
+            for k, v in default_cfg.items():
+                if k not in cfg:
+                    cfg[k] = v
+                elif isinstance(v, CfgNode) and isinstance(cfg[k], CfgNode):
+                    fill(cfg[k], v)
+
+        fill(config, default_config)
+        return config
+
     @staticmethod
     def save_bertmap_config(config: CfgNode, config_file: str):
         """Save the BERTMap configuration in `.yaml`."""
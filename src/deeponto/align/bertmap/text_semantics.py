@@ -18,12 +18,96 @@ import networkx as nx
 import itertools
 import random
 import os
-from typing import List, Set, Tuple, Optional, Union
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pyarrow as pa
+from typing import Iterable, List, Set, Tuple, Optional, Union
 import warnings
 
 from deeponto.onto import Ontology
 from deeponto.align.mapping import ReferenceMapping
-from deeponto.utils import uniqify, create_path, save_file, print_dict
+from deeponto.utils import uniqify, create_path, save_file, save_arrow_file, print_dict
+
+# the schema of labelled annotation pairs saved in the `arrow` format, i.e., `(annotation1, annotation2, label)` samples
+LABELLED_PAIR_SCHEMA = pa.schema([("annotation1", pa.string()), ("annotation2", pa.string()), ("labels", pa.int64())])
+
+
+def iter_labelled_pair_batches(
+    samples: Iterable[tuple[str, str, int]], schema: pa.Schema = LABELLED_PAIR_SCHEMA, batch_size: int = 100000
+):
+    """Group `(annotation1, annotation2, label)` samples into Arrow record batches for streamed writing."""
+    samples = iter(samples)
+    while True:
+        batch = list(itertools.islice(samples, batch_size))
+        if not batch:
+            return
+        yield pa.RecordBatch.from_arrays([pa.array(column) for column in zip(*batch)], schema=schema)
+
+
+def _ranges(sizes: np.ndarray) -> np.ndarray:
+    """Concatenate `arange(size)` for each of the sizes."""
+    ends = np.cumsum(sizes)
+    return np.arange(ends[-1] if len(ends) else 0, dtype=np.int64) - np.repeat(ends - sizes, sizes)
+
+
+def _flatten_label_groups(label_groups: list[set[str]], label_to_id: dict):
+    """Flatten groups of labels into an array of label ids (with new labels added to `label_to_id`),
+    the offset and the size of each group.
+    """
+    sizes = np.fromiter((len(g) for g in label_groups), dtype=np.int64, count=len(label_groups))
+    offsets = np.zeros(len(label_groups), dtype=np.int64)
+    np.cumsum(sizes[:-1], out=offsets[1:])
+    # NOTE: sort the labels because the iteration order of a set of strings varies across processes
+    label_ids = np.fromiter(
+        (label_to_id.setdefault(label, len(label_to_id)) for group in label_groups for label in sorted(group)),
+        dtype=np.int64,
+        count=int(sizes.sum()),
+    )
+    return label_ids, offsets, sizes
+
+
+def _sample_pair_indices(
+    pair_counts: np.ndarray,
+    num_samples: int | None = None,
+    max_pairs_per_group: int | None = None,
+    rng: np.random.Generator | None = None,
+):
+    r"""Sample pairs from groups (without replacement) given only the number of pairs in each group.
+
+    A pair is identified by its group and its index within the group, so the pairs are never materialised
+    before sampling. At most `max_pairs_per_group` pairs (randomly selected) are available in each group.
+
+    Returns:
+        (Tuple[np.ndarray, np.ndarray]): The group and the within-group index of each sampled pair (ordered by groups).
+    """
+    rng = rng or np.random.default_rng()
+    pair_counts = np.asarray(pair_counts, dtype=np.int64)
+    available_counts = pair_counts if max_pairs_per_group is None else np.minimum(pair_counts, max_pairs_per_group)
+    ends = np.cumsum(available_counts)
+    total = int(ends[-1]) if len(ends) else 0
+    if num_samples is None or num_samples >= total:
+        flat_idxs = np.arange(total, dtype=np.int64)
+    else:
+        flat_idxs = np.sort(rng.choice(total, size=num_samples, replace=False))
+    groups = np.searchsorted(ends, flat_idxs, side="right")
+    pair_idxs = flat_idxs - (ends - available_counts)[groups]
+    if max_pairs_per_group is not None:
+        # the available pairs of a capped group are a random subset of its pairs
+        capped = pair_counts[groups] > available_counts[groups]
+        for group in np.unique(groups[capped]):
+            start, end = np.searchsorted(groups, [group, group + 1])
+            available_idxs = rng.choice(pair_counts[group], size=available_counts[group], replace=False)
+            pair_idxs[start:end] = available_idxs[pair_idxs[start:end]]
+    return groups, pair_idxs
+
+
+def _first_occurrences(codes: np.ndarray) -> np.ndarray:
+    """Get the (ordered) indices of the first occurrences of the distinct codes."""
+    _, first_idxs = np.unique(codes, return_index=True)
+    first_idxs.sort()
+    return first_idxs
 
 
 # @paper(
@@ -50,6 +134,8 @@ class AnnotationThesaurus:
         average_number_of_annotations_per_class (int): The average number of (extracted) annotations per ontology class.
         apply_transitivity (bool): Apply synonym transitivity to merge synonym groups or not.
         synonym_groups (List[Set[str]]): The list of synonym groups extracted from the ontology according to specified annotation properties.
+        labels (List[str]): The vocabulary of (distinct) labels in the synonym groups and the annotation index, where the position of a label is its id;
+            built on the first use of the samplers.
     """
 
     def __init__(self, onto: Ontology, annotation_property_iris: List[str], apply_transitivity: bool = False):
@@ -81,6 +167,15 @@ class AnnotationThesaurus:
         if self.apply_transitivity:
             self.synonym_groups = self.merge_synonym_groups_by_transitivity(self.synonym_groups)
 
+        self._sibling_class_groups = None
+
+        # label vocabulary and flattened label id arrays for the (vectorised) samplers; built on the first use
+        self.labels = None
+        self._label_to_id = None
+        self._synonym_group_arrays = None
+        self._class_label_arrays = None
+        self._sibling_group_arrays = None
+
         # summary
         self.info = {
             type(self).__name__: {
@@ -91,9 +186,17 @@ class AnnotationThesaurus:
         }
 
     def __str__(self):
-        str(self.onto)  # the info of ontology is updated upon calling its __str__ method
+        if self.onto is not None:
+            str(self.onto)  # the info of ontology is updated upon calling its __str__ method
         return print_dict(self.info)
 
+    @property
+    def sibling_class_groups(self) -> list[list[str]]:
+        """The sibling class groups of the input ontology (see [`Ontology.sibling_class_groups`][deeponto.onto.Ontology.sibling_class_groups])."""
+        if self._sibling_class_groups is None:
+            self._sibling_class_groups = self.onto.sibling_class_groups
+        return self._sibling_class_groups
+
     @staticmethod
     def get_synonym_pairs(synonym_group: Set[str], remove_duplicates: bool = True):
         """Get synonym pairs from a synonym group through a cartesian product.
@@ -118,6 +221,10 @@ class AnnotationThesaurus:
         multiple ontologies, we can merge their synonym groups by first concatenating them
         then use this function.
 
+        The labels are mapped to integer ids and merged by
+        [`merge_label_id_groups_by_transitivity`][deeponto.align.bertmap.text_semantics.AnnotationThesaurus.merge_label_id_groups_by_transitivity],
+        so no synonym pairs are materialised.
+
         !!! note
 
             In $\textsf{BERTMap}$ experiments we have considered this as a data augmentation approach
@@ -128,15 +235,74 @@ class AnnotationThesaurus:
             synonym_groups (List[Set[str]]): A sequence of synonym groups to be merged.
 
         Returns:
-            (List[Set[str]]): A list of merged synonym groups.
+            (List[Set[str]]): A list of merged synonym groups (in the order of their first labels' appearance).
         """
-        synonym_pairs = []
-        for synonym_group in synonym_groups:
-            # gather synonym pairs from the self-product of a synonym group
-            synonym_pairs += AnnotationThesaurus.get_synonym_pairs(synonym_group, remove_duplicates=False)
-        synonym_pairs = uniqify(synonym_pairs)
-        merged_grouped_synonyms = AnnotationThesaurus.connected_labels(synonym_pairs)
-        return merged_grouped_synonyms
+        label_to_id = dict()
+        label_ids, offsets, sizes = _flatten_label_groups(synonym_groups, label_to_id)
+        merged_label_ids, merged_offsets, merged_sizes = AnnotationThesaurus.merge_label_id_groups_by_transitivity(
+            label_ids, offsets, sizes, num_labels=len(label_to_id)
+        )
+        labels = np.array(list(label_to_id.keys()), dtype=object)
+        return [set(group) for group in np.split(labels[merged_label_ids], merged_offsets[1:])] if len(merged_sizes) else []
+
+    @staticmethod
+    def merge_label_id_groups_by_transitivity(
+        label_ids: np.ndarray, offsets: np.ndarray, sizes: np.ndarray, num_labels: int | None = None
+    ):
+        r"""Merge groups of label ids (flattened as in
+        [`flatten_label_groups`][deeponto.align.bertmap.text_semantics.AnnotationThesaurus.flatten_label_groups])
+        by transitivity with a (vectorised) union-find.
+
+        Each group contributes the edges from its first label to the others, i.e., linear in the group size.
+        The roots of all edges are then repeatedly hooked onto the smaller roots followed by pointer jumping
+        until every group lies in a single tree, which takes a logarithmic number of rounds in practice.
+
+        Args:
+            label_ids (np.ndarray): The flattened label ids of the groups.
+            offsets (np.ndarray): The offset of each group in `label_ids`.
+            sizes (np.ndarray): The size of each group.
+            num_labels (int, optional): The size of the label id space. Defaults to `None` (the maximum label id plus one).
+
+        Returns:
+            (Tuple[np.ndarray, np.ndarray, np.ndarray]): The flattened (sorted) label ids, the offsets and the sizes of
+                the merged groups, which are ordered by their smallest label ids.
+        """
+        label_ids = np.asarray(label_ids, dtype=np.int64)
+        if num_labels is None:
+            num_labels = int(label_ids.max()) + 1 if len(label_ids) else 0
+        sizes = np.asarray(sizes, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        # edges from the first label of each (non-empty) group to every label in it
+        non_empty = sizes > 0
+        heads = np.repeat(label_ids[offsets[non_empty]], sizes[non_empty])
+        tails = label_ids[np.repeat(offsets[non_empty], sizes[non_empty]) + _ranges(sizes[non_empty])]
+        linked = heads != tails
+        heads, tails = heads[linked], tails[linked]
+
+        parents = np.arange(num_labels, dtype=np.int64)
+        while True:
+            head_roots, tail_roots = parents[heads], parents[tails]
+            unmerged = head_roots != tail_roots
+            if not unmerged.any():
+                break
+            heads, tails = heads[unmerged], tails[unmerged]
+            head_roots, tail_roots = head_roots[unmerged], tail_roots[unmerged]
+            # hook the larger roots onto the smaller ones
+            np.minimum.at(parents, np.maximum(head_roots, tail_roots), np.minimum(head_roots, tail_roots))
+            # pointer jumping such that every label points to its root
+            while True:
+                grand_parents = parents[parents]
+                if np.array_equal(grand_parents, parents):
+                    break
+                parents = grand_parents
+
+        present_ids = np.unique(label_ids)
+        roots = parents[present_ids]
+        order = np.argsort(roots, kind="stable")
+        _, merged_sizes = np.unique(roots[order], return_counts=True)
+        merged_offsets = np.zeros(len(merged_sizes), dtype=np.int64)
+        np.cumsum(merged_sizes[:-1], out=merged_offsets[1:])
+        return present_ids[order], merged_offsets, merged_sizes.astype(np.int64)
 
     @staticmethod
     def connected_annotations(synonym_pairs: List[Tuple[str, str]]):
@@ -157,7 +323,12 @@ class AnnotationThesaurus:
         connected = list(nx.connected_components(graph))
         return connected
 
-    def synonym_sampling(self, num_samples: Optional[int] = None):
+    def synonym_sampling(
+        self,
+        num_samples: int | None = None,
+        max_synonyms_per_group: int | None = None,
+        seed: int | None = None,
+    ):
         r"""Sample synonym pairs from a list of synonym groups extracted from the input ontology.
 
         According to the $\textsf{BERTMap}$ paper, **synonyms** are defined as label pairs that belong
@@ -165,123 +336,242 @@ class AnnotationThesaurus:
 
         NOTE this has been validated for getting the same results as in the original $\textsf{BERTMap}$ repository.
 
+        The synonym pool is never materialised: a group of $n$ labels has $n^2$ synonym pairs (including the identity ones)
+        indexed by $i \cdot n + j$, so pair indices are sampled directly and mapped to labels over the flattened
+        label ids of the groups. If groups share labels, the same pair can be drawn from different groups; in that case
+        the (integer) pool is de-duplicated and sampled again such that exactly `num_samples` unique pairs are returned
+        unless the pool is smaller.
+
         Args:
-            num_samples (int, optional): The (maximum) number of **unique** samples extracted. Defaults to `None`.
+            num_samples (int, optional): The number of **unique** samples extracted. Defaults to `None` which means all.
+            max_synonyms_per_group (int, optional): The maximum number of synonym pairs (randomly) selected from a synonym group
+                such that large groups do not dominate the samples. Defaults to `None`.
+            seed (int, optional): The random seed. Defaults to `None` which means using the state of Python's `random` module.
 
         Returns:
             (List[Tuple[str, str]]): A list of unique synonym pair samples.
         """
-        synonym_pool = []
-        for synonym_group in self.synonym_groups:
-            # do not remove duplicates in the loop to save time
-            synonym_pairs = self.get_synonym_pairs(synonym_group, remove_duplicates=False)
-            synonym_pool += synonym_pairs
-        # remove duplicates afer the loop
-        synonym_pool = uniqify(synonym_pool)
-
-        if (not num_samples) or (num_samples >= len(synonym_pool)):
-            # print("Return all synonym pairs without downsampling.")
-            return synonym_pool
-        else:
-            return random.sample(synonym_pool, num_samples)
+        if self._synonym_group_arrays is None:
+            self._synonym_group_arrays = self.flatten_label_groups([g for g in self.synonym_groups if g])
+        label_ids, offsets, sizes = self._synonym_group_arrays
+        rng = self.get_rng(seed)
+
+        def sample_unique_pairs(num_samples: int | None):
+            groups, pair_idxs = _sample_pair_indices(sizes * sizes, num_samples, max_synonyms_per_group, rng)
+            left = label_ids[offsets[groups] + pair_idxs // sizes[groups]]
+            right = label_ids[offsets[groups] + pair_idxs % sizes[groups]]
+            # remove the duplicated pairs from different groups
+            first_idxs = _first_occurrences(left * max(len(self.labels), 1) + right)
+            return left[first_idxs], right[first_idxs]
+
+        left, right = sample_unique_pairs(num_samples)
+        if num_samples is not None and len(left) < num_samples:
+            # duplicates are drawn: sample from the de-duplicated pool as a whole
+            left, right = sample_unique_pairs(None)
+            if len(left) > num_samples:
+                selected = np.sort(rng.choice(len(left), size=num_samples, replace=False))
+                left, right = left[selected], right[selected]
+        return list(zip(self.get_labels(left), self.get_labels(right)))
 
-    def soft_nonsynonym_sampling(self, num_samples: int, max_iter: int = 5):
+    @staticmethod
+    def get_rng(seed: int | None = None):
+        """Get a NumPy random generator from the `seed`, or from the state of Python's `random` module if `seed` is `None`
+        (such that `random.seed` still makes the samplers reproducible).
+        """
+        return np.random.default_rng(seed if seed is not None else random.getrandbits(64))
+
+    def get_label_ids(self, labels: list[str]) -> np.ndarray:
+        """Get the ids of labels in the label vocabulary (new labels are added to the vocabulary)."""
+        if self.labels is None:
+            self.labels, self._label_to_id = [], dict()
+        label_ids = np.empty(len(labels), dtype=np.int64)
+        for i, label in enumerate(labels):
+            label_id = self._label_to_id.get(label)
+            if label_id is None:
+                label_id = self._label_to_id[label] = len(self.labels)
+                self.labels.append(label)
+            label_ids[i] = label_id
+        return label_ids
+
+    def flatten_label_groups(self, label_groups: list[set[str]]):
+        r"""Flatten groups of labels into an array of label ids with the offset and the size of each group.
+
+        NOTE that labels in a group are sorted because the iteration order of a set of strings varies across processes.
+
+        Returns:
+            (Tuple[np.ndarray, np.ndarray, np.ndarray]): The flattened label ids, the group offsets and the group sizes.
+        """
+        if self.labels is None:
+            self.labels, self._label_to_id = [], dict()
+        label_ids, offsets, sizes = _flatten_label_groups(label_groups, self._label_to_id)
+        # the new labels are appended to the vocabulary in the order of their ids
+        self.labels.extend(itertools.islice(self._label_to_id, len(self.labels), None))
+        return label_ids, offsets, sizes
+
+    def get_labels(self, label_ids: np.ndarray) -> list[str]:
+        """Get the labels of label ids in the label vocabulary."""
+        return np.array(self.labels, dtype=object)[label_ids].tolist() if len(label_ids) else []
+
+    def sample_unique_label_pairs(self, draw, num_samples: int, max_iter: int = 5) -> list[tuple[str, str]]:
+        r"""Sample unique label pairs in batches with a vectorised drawing function.
+
+        Pairs of the same label (which are synonyms by reflexivity) and duplicated pairs are rejected by hashing
+        each pair of label ids into a single integer; if the samples are not enough, the remaining ones are drawn
+        again for at most `max_iter` more times.
+
+        Args:
+            draw (Callable[[int], Tuple[np.ndarray, np.ndarray]]): A function that draws (at most) a given number of
+                label id pairs as two aligned arrays.
+            num_samples (int): The (maximum) number of **unique** samples.
+            max_iter (int): The maximum number of additional drawings. Defaults to `5`.
+
+        Returns:
+            (List[Tuple[str, str]]): A list of unique label pairs in the order of drawing.
+        """
+        sampled_codes = np.empty(0, dtype=np.int64)
+        sampled_left, sampled_right = [], []
+        num_sampled = 0
+        num_labels = max(len(self.labels or []), 1)
+        for _ in range(max_iter + 1):
+            if num_sampled >= num_samples:
+                break
+            left, right = draw(num_samples - num_sampled)
+            valid = left != right
+            left, right = left[valid], right[valid]
+            codes = left * num_labels + right
+            # keep the first occurrence of each pair not sampled before
+            _, first_idxs = np.unique(codes, return_index=True)
+            first_idxs.sort()
+            first_idxs = first_idxs[~np.isin(codes[first_idxs], sampled_codes)]
+            first_idxs = first_idxs[: num_samples - num_sampled]
+            sampled_codes = np.concatenate([sampled_codes, codes[first_idxs]])
+            sampled_left.append(left[first_idxs])
+            sampled_right.append(right[first_idxs])
+            num_sampled += len(first_idxs)
+
+        if not num_sampled:
+            return []
+        labels = np.array(self.labels, dtype=object)
+        return list(zip(labels[np.concatenate(sampled_left)].tolist(), labels[np.concatenate(sampled_right)].tolist()))
+
+    def soft_nonsynonym_sampling(self, num_samples: int, max_iter: int = 5, seed: int | None = None):
         r"""Sample **soft** non-synonyms from a list of synonym groups extracted from the input ontology.
 
         According to the $\textsf{BERTMap}$ paper, **soft non-synonyms** are defined as label pairs
         from two *different* synonym groups that are **randomly** selected.
 
+        The sampling is vectorised over the flattened label ids of the synonym groups: two different (non-empty)
+        groups and then one label from each are drawn for all the samples at once.
+
         Args:
             num_samples (int): The (maximum) number of **unique** samples extracted; this is
                 required **unlike for synonym sampling** because the non-synonym pool is **significantly
                 larger** (considering random combinations of different synonym groups).
             max_iter (int): The maximum number of iterations for conducting sampling. Defaults to `5`.
+            seed (int, optional): The random seed. Defaults to `None` which means using the state of Python's `random` module.
 
         Returns:
             (List[Tuple[str, str]]): A list of unique (soft) non-synonym pair samples.
         """
-        nonsyonym_pool = []
-        # randomly select disjoint synonym group pairs from all
-        for _ in range(num_samples):
-            left_synonym_group, right_synonym_group = tuple(random.sample(self.synonym_groups, 2))
-            try:
-                # randomly choose one label from a synonym group
-                left_label = random.choice(list(left_synonym_group))
-                right_label = random.choice(list(right_synonym_group))
-                nonsyonym_pool.append((left_label, right_label))
-            except:
-                # skip if there are no class labels
-                continue
-
-        # DataUtils.uniqify is too slow so we should avoid operating it too often
-        nonsyonym_pool = uniqify(nonsyonym_pool)
-
-        while len(nonsyonym_pool) < num_samples and max_iter > 0:
-            max_iter = max_iter - 1  # reduce the iteration to prevent exhausting loop
-            nonsyonym_pool += self.soft_nonsynonym_sampling(num_samples - len(nonsyonym_pool), max_iter)
-            nonsyonym_pool = uniqify(nonsyonym_pool)
-
-        return nonsyonym_pool
+        if self._synonym_group_arrays is None:
+            # skip the groups with no labels
+            self._synonym_group_arrays = self.flatten_label_groups([g for g in self.synonym_groups if g])
+        label_ids, offsets, sizes = self._synonym_group_arrays
+        num_groups = len(sizes)
+        if num_groups < 2:
+            return []
+        rng = self.get_rng(seed)
+
+        def draw(n: int):
+            # two different groups selected uniformly
+            left_groups = rng.integers(num_groups, size=n)
+            right_groups = rng.integers(num_groups - 1, size=n)
+            right_groups += right_groups >= left_groups
+            # one label selected uniformly from each group
+            left = label_ids[offsets[left_groups] + (rng.random(n) * sizes[left_groups]).astype(np.int64)]
+            right = label_ids[offsets[right_groups] + (rng.random(n) * sizes[right_groups]).astype(np.int64)]
+            return left, right
+
+        return self.sample_unique_label_pairs(draw, num_samples, max_iter)
+
+    def get_sibling_group_arrays(self):
+        """Flatten the sibling class groups into an array of class indices (into the annotation index) with the
+        offset, the size and the cumulative size (for weighted selection) of each group.
+        """
+        if self._sibling_group_arrays is None:
+            class_iris = list(self.annotation_index.keys())
+            self._class_label_arrays = self.flatten_label_groups([self.annotation_index[iri] for iri in class_iris])
+            class_idxs = {iri: i for i, iri in enumerate(class_iris)}
+            # NOTE: classes not in the annotation index have no labels and are indexed as -1
+            sibling_groups = self.sibling_class_groups
+            flat_class_idxs = np.array([class_idxs.get(iri, -1) for group in sibling_groups for iri in group], dtype=np.int64)
+            sizes = np.array([len(group) for group in sibling_groups], dtype=np.int64)
+            offsets = np.zeros(len(sibling_groups), dtype=np.int64)
+            np.cumsum(sizes[:-1], out=offsets[1:])
+            self._sibling_group_arrays = (flat_class_idxs, offsets, sizes, np.cumsum(sizes))
+        return self._sibling_group_arrays
 
     def weighted_random_choices_of_sibling_groups(self, k: int = 1):
         """Randomly (weighted) select a number of sibling class groups.
 
         The weights are computed according to the sizes of the sibling class groups.
         """
-        weights = [len(s) for s in self.onto.sibling_class_groups]
-        weights = [w / sum(weights) for w in weights]  # normalised
-        return random.choices(self.onto.sibling_class_groups, weights=weights, k=k)
+        _, _, _, cum_sizes = self.get_sibling_group_arrays()
+        return random.choices(self.sibling_class_groups, cum_weights=cum_sizes.tolist(), k=k)
 
-    def hard_nonsynonym_sampling(self, num_samples: int, max_iter: int = 5):
+    def hard_nonsynonym_sampling(self, num_samples: int, max_iter: int = 5, seed: int | None = None):
         r"""Sample **hard** non-synonyms from sibling classes of the input ontology.
 
         According to the $\textsf{BERTMap}$ paper, **hard non-synonyms** are defined as label pairs
         that belong to two **disjoint** ontology classes. For practical reason, the condition
         is eased to two **sibling** ontology classes.
 
+        The sampling is vectorised over the flattened sibling class groups: a sibling group (weighted by its size),
+        two different classes in it, and then one label from each are drawn for all the samples at once.
+
         Args:
             num_samples (int): The (maximum) number of **unique** samples extracted; this is
                 required **unlike for synonym sampling** because the non-synonym pool is **significantly
                 larger** (considering random combinations of different synonym groups).
             max_iter (int): The maximum number of iterations for conducting sampling. Defaults to `5`.
+            seed (int, optional): The random seed. Defaults to `None` which means using the state of Python's `random` module.
 
         Returns:
             (List[Tuple[str, str]]): A list of unique (hard) non-synonym pair samples.
         """
-        # intialise the sibling class groups
-        self.onto.sibling_class_groups
-
-        if not self.onto.sibling_class_groups:
+        if not self.sibling_class_groups:
             warnings.warn("Skip hard negative sampling as no sibling class groups are defined.")
             return []
 
-        # flatten the disjointness groups into all pairs of hard neagtives
-        nonsynonym_pool = []
-        # randomly (weighted) select a number of sibling class groups with replacement
-        sibling_class_groups = self.weighted_random_choices_of_sibling_groups(k=num_samples)
-
-        for sibling_class_group in sibling_class_groups:
-            # random select two sibling classes; no weights this time
-            left_class_iri, right_class_iri = tuple(random.sample(sibling_class_group, 2))
-            try:
-                # random select a label for each of them
-                left_label = random.choice(list(self.annotation_index[left_class_iri]))
-                right_label = random.choice(list(self.annotation_index[right_class_iri]))
-                # add the label pair to the pool
-                nonsynonym_pool.append((left_label, right_label))
-            except:
-                # skip them if there are no class labels
-                continue
-
-        # DataUtils.uniqify is too slow so we should avoid operating it too often
-        nonsynonym_pool = uniqify(nonsynonym_pool)
-
-        while len(nonsynonym_pool) < num_samples and max_iter > 0:
-            max_iter = max_iter - 1  # reduce the iteration to prevent exhausting loop
-            nonsynonym_pool += self.hard_nonsynonym_sampling(num_samples - len(nonsynonym_pool), max_iter)
-            nonsynonym_pool = uniqify(nonsynonym_pool)
-
-        return nonsynonym_pool
+        flat_class_idxs, offsets, sizes, cum_sizes = self.get_sibling_group_arrays()
+        label_ids, label_offsets, label_sizes = self._class_label_arrays
+        # classes not in the annotation index have no labels
+        label_offsets, label_sizes = np.append(label_offsets, 0), np.append(label_sizes, 0)
+        rng = self.get_rng(seed)
+
+        def draw(n: int):
+            # sibling groups selected with weights proportional to their sizes
+            groups = np.searchsorted(cum_sizes, rng.random(n) * cum_sizes[-1], side="right")
+            # two different classes selected uniformly from each group
+            left_positions = (rng.random(n) * sizes[groups]).astype(np.int64)
+            right_positions = (rng.random(n) * (sizes[groups] - 1)).astype(np.int64)
+            right_positions += right_positions >= left_positions
+            left_classes = flat_class_idxs[offsets[groups] + left_positions]
+            right_classes = flat_class_idxs[offsets[groups] + right_positions]
+            # skip the classes with no labels
+            has_labels = (label_sizes[left_classes] > 0) & (label_sizes[right_classes] > 0)
+            left_classes, right_classes = left_classes[has_labels], right_classes[has_labels]
+            # one label selected uniformly from each class
+            left = label_ids[
+                label_offsets[left_classes] + (rng.random(len(left_classes)) * label_sizes[left_classes]).astype(np.int64)
+            ]
+            right = label_ids[
+                label_offsets[right_classes]
+                + (rng.random(len(right_classes)) * label_sizes[right_classes]).astype(np.int64)
+            ]
+            return left, right
+
+        return self.sample_unique_label_pairs(draw, num_samples, max_iter)
 
 
 class IntraOntologyTextSemanticsCorpus:
@@ -297,6 +587,10 @@ class IntraOntologyTextSemanticsCorpus:
         hard_negative_ratio (int): The expected negative sample ratio of the hard non-synonyms to the extracted synonyms. Defaults to `2`.
             However, hard non-synonyms are sometimes insufficient given an ontology's hierarchy, the soft ones are used to compensate
             the number in this case.
+        max_synonyms_per_group (int, optional): The maximum number of synonyms sampled from a synonym group. Defaults to `None`.
+        thesaurus (AnnotationThesaurus, optional): A pre-built annotation thesaurus of `onto` that will be used
+            instead of building one. Defaults to `None`.
+        seed (int, optional): The random seed of the samplers. Defaults to `None` which means using the state of Python's `random` module.
     """
 
     def __init__(
@@ -305,18 +599,25 @@ class IntraOntologyTextSemanticsCorpus:
         annotation_property_iris: List[str],
         soft_negative_ratio: int = 2,
         hard_negative_ratio: int = 2,
+        max_synonyms_per_group: int | None = None,
+        thesaurus: AnnotationThesaurus | None = None,
+        seed: int | None = None,
     ):
         self.onto = onto
         # $\textsf{BERTMap}$ does not apply synonym transitivity
-        self.thesaurus = AnnotationThesaurus(onto, annotation_property_iris, apply_transitivity=False)
+        self.thesaurus = thesaurus or AnnotationThesaurus(onto, annotation_property_iris, apply_transitivity=False)
+        # a private random state (if seeded) such that sub-corpora can be sampled on concurrent threads
+        self.random = random.Random(seed) if seed is not None else random
 
-        self.synonyms = self.thesaurus.synonym_sampling()
+        self.synonyms = self.thesaurus.synonym_sampling(
+            max_synonyms_per_group=max_synonyms_per_group, seed=self.random.getrandbits(64)
+        )
         # sample hard negatives first as they might not be enough
         num_hard = hard_negative_ratio * len(self.synonyms)
-        self.hard_nonsynonyms = self.thesaurus.hard_nonsynonym_sampling(num_hard)
+        self.hard_nonsynonyms = self.thesaurus.hard_nonsynonym_sampling(num_hard, seed=self.random.getrandbits(64))
         # compensate the number of hard negatives as soft negatives are almost always available
         num_soft = (soft_negative_ratio + hard_negative_ratio) * len(self.synonyms) - len(self.hard_nonsynonyms)
-        self.soft_nonsynonyms = self.thesaurus.soft_nonsynonym_sampling(num_soft)
+        self.soft_nonsynonyms = self.thesaurus.soft_nonsynonym_sampling(num_soft, seed=self.random.getrandbits(64))
 
         self.info = {
             type(self).__name__: {
@@ -358,6 +659,10 @@ class CrossOntologyTextSemanticsCorpus:
         annotation_property_iris (List[str]): A list of annotation property IRIs used to extract the annotations.
         negative_ratio (int): The expected negative sample ratio of the non-synonyms to the extracted synonyms. Defaults to `4`. NOTE
             that we do not have *hard* non-synonyms at the cross-ontology level.
+        max_synonyms_per_group (int, optional): The maximum number of synonyms sampled from (each direction of) a class mapping. Defaults to `None`.
+        src_thesaurus (AnnotationThesaurus, optional): A pre-built annotation thesaurus of `src_onto`. Defaults to `None`.
+        tgt_thesaurus (AnnotationThesaurus, optional): A pre-built annotation thesaurus of `tgt_onto`. Defaults to `None`.
+        seed (int, optional): The random seed of the samplers. Defaults to `None` which means using the state of Python's `random` module.
     """
 
     def __init__(
@@ -367,14 +672,21 @@ class CrossOntologyTextSemanticsCorpus:
         tgt_onto: Ontology,
         annotation_property_iris: List[str],
         negative_ratio: int = 4,
+        max_synonyms_per_group: int | None = None,
+        src_thesaurus: AnnotationThesaurus | None = None,
+        tgt_thesaurus: AnnotationThesaurus | None = None,
+        seed: int | None = None,
     ):
         self.class_mappings = class_mappings
         self.src_onto = src_onto
         self.tgt_onto = tgt_onto
         # build the annotation thesaurus for each ontology
-        self.src_thesaurus = AnnotationThesaurus(src_onto, annotation_property_iris)
-        self.tgt_thesaurus = AnnotationThesaurus(tgt_onto, annotation_property_iris)
+        self.src_thesaurus = src_thesaurus or AnnotationThesaurus(src_onto, annotation_property_iris)
+        self.tgt_thesaurus = tgt_thesaurus or AnnotationThesaurus(tgt_onto, annotation_property_iris)
         self.negative_ratio = negative_ratio
+        self.max_synonyms_per_group = max_synonyms_per_group
+        # a private random state (if seeded) such that sub-corpora can be sampled on concurrent threads
+        self.random = random.Random(seed) if seed is not None else random
 
         self.synonyms = self.synonym_sampling_from_mappings()
         num_negative = negative_ratio * len(self.synonyms)
@@ -418,23 +730,35 @@ class CrossOntologyTextSemanticsCorpus:
         Note that **identity synonyms** in the form of $(a, a)$ are removed because they have been covered
         in the intra-ontology case.
 
+        As in [`synonym_sampling`][deeponto.align.bertmap.text_semantics.AnnotationThesaurus.synonym_sampling],
+        the label pairs of a class mapping are indexed rather than materialised, and at most `max_synonyms_per_group`
+        of them are (randomly) selected before adding their backward pairs.
+
         Returns:
             (List[Tuple[str, str]]): A list of unique synonym pair samples from ontology class mappings.
         """
-        synonym_pool = []
-
-        for class_mapping in self.class_mappings:
-            src_class_iri, tgt_class_iri = class_mapping.to_tuple()
-            src_class_annotations = self.src_thesaurus.annotation_index[src_class_iri]
-            tgt_class_annotations = self.tgt_thesaurus.annotation_index[tgt_class_iri]
-            synonym_pairs = list(itertools.product(src_class_annotations, tgt_class_annotations))
-            # remove the identity synonyms as the have been covered in the intra-ontology case
-            synonym_pairs = [(l, r) for l, r in synonym_pairs if l != r]
-            backward_synonym_pairs = [(r, l) for l, r in synonym_pairs]
-            synonym_pool += synonym_pairs + backward_synonym_pairs
+        class_pairs = [class_mapping.to_tuple() for class_mapping in self.class_mappings]
+        label_to_id = dict()
+        src_ids, src_offsets, src_sizes = _flatten_label_groups(
+            [self.src_thesaurus.annotation_index[src_class_iri] for src_class_iri, _ in class_pairs], label_to_id
+        )
+        tgt_ids, tgt_offsets, tgt_sizes = _flatten_label_groups(
+            [self.tgt_thesaurus.annotation_index[tgt_class_iri] for _, tgt_class_iri in class_pairs], label_to_id
+        )
+        groups, pair_idxs = _sample_pair_indices(
+            src_sizes * tgt_sizes, max_pairs_per_group=self.max_synonyms_per_group,
+            rng=AnnotationThesaurus.get_rng(self.random.getrandbits(64)),
+        )
+        left = src_ids[src_offsets[groups] + pair_idxs // tgt_sizes[groups]]
+        right = tgt_ids[tgt_offsets[groups] + pair_idxs % tgt_sizes[groups]]
+        # remove the identity synonyms as the have been covered in the intra-ontology case
+        non_identity = left != right
+        left, right = left[non_identity], right[non_identity]
+        left, right = np.concatenate([left, right]), np.concatenate([right, left])
+        first_idxs = _first_occurrences(left * max(len(label_to_id), 1) + right)
 
-        synonym_pool = uniqify(synonym_pool)
-        return synonym_pool
+        labels = np.array(list(label_to_id.keys()), dtype=object)
+        return list(zip(labels[left[first_idxs]].tolist(), labels[right[first_idxs]].tolist()))
 
     def nonsynonym_sampling_from_mappings(self, num_samples: int, max_iter: int = 5):
         r"""Sample non-synonyms from cross-ontology class mappings.
@@ -461,15 +785,16 @@ class CrossOntologyTextSemanticsCorpus:
             src_class_annotations = self.src_thesaurus.annotation_index[src_class_iri]
             tgt_class_annotations = self.tgt_thesaurus.annotation_index[tgt_class_iri]
             # let each matched class pair's annotations form a synonym group_pair
-            cross_onto_synonym_group_pair.append((src_class_annotations, tgt_class_annotations))
+            # NOTE: sort the annotations because the iteration order of a set of strings varies across runs
+            cross_onto_synonym_group_pair.append((sorted(src_class_annotations), sorted(tgt_class_annotations)))
 
         # randomly select disjoint synonym group pairs from all
         for _ in range(num_samples):
-            left_class_pair, right_class_pair = tuple(random.sample(cross_onto_synonym_group_pair, 2))
+            left_class_pair, right_class_pair = tuple(self.random.sample(cross_onto_synonym_group_pair, 2))
             try:
                 # randomly choose one label from a synonym group
-                left_label = random.choice(list(left_class_pair[0]))  # choosing the src side by [0]
-                right_label = random.choice(list(right_class_pair[1]))  # choosing the tgt side by [1]
+                left_label = self.random.choice(left_class_pair[0])  # choosing the src side by [0]
+                right_label = self.random.choice(right_class_pair[1])  # choosing the tgt side by [1]
                 nonsynonym_pool.append((left_label, right_label))
             except:
                 # skip if there are no class labels
@@ -500,6 +825,10 @@ class TextSemanticsCorpora:
         class_mappings (List[ReferenceMapping], optional): A list of cross-ontology class mappings between the
             source and the target ontologies. Defaults to `None`.
         auxiliary_ontos (List[Ontology], optional): A list of auxiliary ontologies for augmenting more synonym/non-synonym samples. Defaults to `None`.
+        max_synonyms_per_group (int, optional): The maximum number of synonyms sampled from a synonym group (or a class mapping)
+            in each sub-corpus. Defaults to `None`.
+        num_workers (int, optional): The number of (JVM) threads for extracting the annotations of the ontologies and
+            for sampling the sub-corpora (`-1` means all CPU cores). Defaults to `1`.
     """
 
     def __init__(
@@ -509,42 +838,72 @@ class TextSemanticsCorpora:
         annotation_property_iris: List[str],
         class_mappings: Optional[List[ReferenceMapping]] = None,
         auxiliary_ontos: Optional[List[Ontology]] = None,
+        max_synonyms_per_group: int | None = None,
+        num_workers: int = 1,
     ):
         self.synonyms = []
         self.nonsynonyms = []
+        self.class_mappings = class_mappings
+        self.auxiliary_ontos = auxiliary_ontos
+        ontos = [src_onto, tgt_onto] + list(self.auxiliary_ontos or [])
+        num_workers = (os.cpu_count() or 1) if num_workers < 0 else num_workers
 
-        # build intra-ontology corpora
-        # negative sample ratios are by default
-        self.intra_src_onto_corpus = IntraOntologyTextSemanticsCorpus(src_onto, annotation_property_iris)
-        self.add_samples_from_sub_corpus(self.intra_src_onto_corpus)
-        self.intra_tgt_onto_corpus = IntraOntologyTextSemanticsCorpus(tgt_onto, annotation_property_iris)
-        self.add_samples_from_sub_corpus(self.intra_tgt_onto_corpus)
+        # extract the annotations and the sibling class groups of the ontologies on (concurrent) JVM threads
+        def build_thesaurus(onto: Ontology):
+            # $\textsf{BERTMap}$ does not apply synonym transitivity
+            thesaurus = AnnotationThesaurus(onto, annotation_property_iris, apply_transitivity=False)
+            thesaurus.sibling_class_groups
+            return thesaurus
 
-        # build cross-ontolgoy corpora
-        self.class_mappings = class_mappings
-        self.cross_onto_corpus = None
+        with ThreadPoolExecutor(max_workers=max(1, min(len(ontos), num_workers))) as executor:
+            thesauri = list(executor.map(build_thesaurus, ontos))
+
+        # sample the intra-ontology (including auxiliary) corpora and the cross-ontology corpus on threads;
+        # each sub-corpus has its own seed such that the samples do not depend on the number of workers
+        # negative sample ratios are by default
+        sub_corpus_builders = [
+            functools.partial(
+                IntraOntologyTextSemanticsCorpus,
+                onto=onto,
+                annotation_property_iris=annotation_property_iris,
+                max_synonyms_per_group=max_synonyms_per_group,
+                thesaurus=thesaurus,
+                seed=random.getrandbits(64),
+            )
+            for onto, thesaurus in zip(ontos, thesauri)
+        ]
         if self.class_mappings:
-            self.cross_onto_corpus = CrossOntologyTextSemanticsCorpus(
-                class_mappings, src_onto, tgt_onto, annotation_property_iris
+            sub_corpus_builders.append(
+                functools.partial(
+                    CrossOntologyTextSemanticsCorpus,
+                    class_mappings=class_mappings,
+                    src_onto=src_onto,
+                    tgt_onto=tgt_onto,
+                    annotation_property_iris=annotation_property_iris,
+                    max_synonyms_per_group=max_synonyms_per_group,
+                    src_thesaurus=thesauri[0],
+                    tgt_thesaurus=thesauri[1],
+                    seed=random.getrandbits(64),
+                )
             )
-            self.add_samples_from_sub_corpus(self.cross_onto_corpus)
+        with ThreadPoolExecutor(max_workers=max(1, min(len(sub_corpus_builders), num_workers))) as executor:
+            sub_corpora = list(executor.map(lambda build: build(), sub_corpus_builders))
 
-        # build auxiliary ontology corpora (same as intra-ontology)
-        self.auxiliary_ontos = auxiliary_ontos
-        self.auxiliary_onto_corpora = []
-        if self.auxiliary_ontos:
-            for auxiliary_onto in self.auxiliary_ontos:
-                self.auxiliary_onto_corpora.append(
-                    IntraOntologyTextSemanticsCorpus(auxiliary_onto, annotation_property_iris)
-                )
+        self.intra_src_onto_corpus, self.intra_tgt_onto_corpus = sub_corpora[:2]
+        self.auxiliary_onto_corpora = sub_corpora[2 : len(ontos)]
+        self.cross_onto_corpus = sub_corpora[-1] if self.class_mappings else None
+
+        self.add_samples_from_sub_corpus(self.intra_src_onto_corpus)
+        self.add_samples_from_sub_corpus(self.intra_tgt_onto_corpus)
+        if self.cross_onto_corpus:
+            self.add_samples_from_sub_corpus(self.cross_onto_corpus)
         for auxiliary_onto_corpus in self.auxiliary_onto_corpora:
             self.add_samples_from_sub_corpus(auxiliary_onto_corpus)
 
-        # DataUtils.uniqify the samples
-        self.synonyms = uniqify(self.synonyms)
-        self.nonsynonyms = uniqify(self.nonsynonyms)
-        # remove invalid nonsynonyms
-        self.nonsynonyms = list(set(self.nonsynonyms) - set(self.synonyms))
+        # de-duplicate the samples and remove invalid nonsynonyms (that are also synonyms) in a single hash-based pass
+        synonyms = dict.fromkeys(self.synonyms)
+        self.synonyms = list(synonyms)
+        self.nonsynonyms = [pair for pair in dict.fromkeys(self.nonsynonyms) if pair not in synonyms]
 
         # summary
         self.info = {
@@ -565,11 +924,30 @@ class TextSemanticsCorpora:
     def __str__(self):
         return print_dict(self.info)
 
-    def save(self, save_path: str):
-        """Save the overall text semantics corpora (a `.json` file for label pairs
-        and its summary) in the specified directory.
+    def save(self, save_path: str, data_format: str = "json"):
+        r"""Save the overall text semantics corpora (label pairs and the summary) in the specified directory.
+
+        Args:
+            save_path (str): The directory to save the corpora in.
+            data_format (str, optional): `"json"` for a single `text-semantics.corpora.json` file (readable but fully
+                loaded in memory), or `"arrow"` for a `text-semantics.corpora.arrow` file streamed in record batches
+                with columns `annotation1`, `annotation2` and `labels` (synonyms first), where the summary is kept in
+                the schema metadata. Defaults to `"json"`.
         """
         create_path(save_path)
+        if data_format == "arrow":
+            samples = itertools.chain(
+                ((pos[0], pos[1], 1) for pos in self.synonyms), ((neg[0], neg[1], 0) for neg in self.nonsynonyms)
+            )
+            schema = LABELLED_PAIR_SCHEMA.with_metadata({"summary": json.dumps(self.info)})
+            save_arrow_file(
+                iter_labelled_pair_batches(samples, schema),
+                schema,
+                os.path.join(save_path, "text-semantics.corpora.arrow"),
+            )
+            return
+        elif data_format != "json":
+            raise ValueError(f"Unknown data format: {data_format}; choose from `json` or `arrow`.")
         save_json = {
             "summary": self.info,
             "synonyms": [(pos[0], pos[1], 1) for pos in self.synonyms],
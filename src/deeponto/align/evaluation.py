@@ -12,9 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Tuple, List
 import math
-from .mapping import *
+from typing import List, Tuple, Union
+
+from .mapping import EntityMapping, MappingSet, ReferenceMapping
 
 
 class AlignmentEvaluator:
@@ -24,30 +25,34 @@ class AlignmentEvaluator:
         pass
 
     @staticmethod
-    def precision(prediction_mappings: List[EntityMapping], reference_mappings: List[ReferenceMapping]) -> float:
+    def precision(
+        prediction_mappings: Union[List[EntityMapping], MappingSet],
+        reference_mappings: Union[List[ReferenceMapping], MappingSet],
+    ) -> float:
         r"""The percentage of correct predictions.
 
         $$P = \frac{|\mathcal{M}_{pred} \cap \mathcal{M}_{ref}|}{|\mathcal{M}_{pred}|}$$
         """
-        preds = [p.to_tuple() for p in prediction_mappings]
-        refs = [r.to_tuple() for r in reference_mappings]
-        return len(set(preds).intersection(set(refs))) / len(set(preds))
+        preds = MappingSet.from_entity_mappings(prediction_mappings).deduplicate()
+        return len(preds.intersection(reference_mappings)) / len(preds)
 
     @staticmethod
-    def recall(prediction_mappings: List[EntityMapping], reference_mappings: List[ReferenceMapping]) -> float:
+    def recall(
+        prediction_mappings: Union[List[EntityMapping], MappingSet],
+        reference_mappings: Union[List[ReferenceMapping], MappingSet],
+    ) -> float:
         r"""The percentage of correct retrievals.
 
         $$R = \frac{|\mathcal{M}_{pred} \cap \mathcal{M}_{ref}|}{|\mathcal{M}_{ref}|}$$
         """
-        preds = [p.to_tuple() for p in prediction_mappings]
-        refs = [r.to_tuple() for r in reference_mappings]
-        return len(set(preds).intersection(set(refs))) / len(set(refs))
+        refs = MappingSet.from_entity_mappings(reference_mappings).deduplicate()
+        return len(refs.intersection(prediction_mappings)) / len(refs)
 
     @staticmethod
     def f1(
-        prediction_mappings: List[EntityMapping],
-        reference_mappings: List[ReferenceMapping],
-        null_reference_mappings: List[ReferenceMapping] = [],
+        prediction_mappings: Union[List[EntityMapping], MappingSet],
+        reference_mappings: Union[List[ReferenceMapping], MappingSet],
+        null_reference_mappings: Union[List[ReferenceMapping], MappingSet] = [],
     ):
         r"""Compute the F1 score given the prediction and reference mappings.
 
@@ -57,16 +62,20 @@ class AlignmentEvaluator:
         should be **ignored** in the calculation, i.e., **neither positive nor negative**.
         Specifically, both $\mathcal{M}_{pred}$ and $\mathcal{M}_{ref}$ will **substract**
         $\mathcal{M}_{null}$ from them.
+
+        The mappings can be given as lists of [`EntityMapping`][deeponto.align.mapping.EntityMapping] or as
+        [`MappingSet`][deeponto.align.mapping.MappingSet]s which are compared by their `(head, tail)` pairs without
+        creating any tuples.
         """
-        preds = [p.to_tuple() for p in prediction_mappings]
-        refs = [r.to_tuple() for r in reference_mappings]
-        null_refs = [n.to_tuple() for n in null_reference_mappings]
+        preds = MappingSet.from_entity_mappings(prediction_mappings).deduplicate()
+        refs = MappingSet.from_entity_mappings(reference_mappings).deduplicate()
         # elements in the {null_set} are removed from both {pred} and {ref} (ignored)
-        if null_refs:
-            preds = set(preds) - set(null_refs)
-            refs = set(refs) - set(null_refs)
-        P = len(set(preds).intersection(set(refs))) / len(set(preds))
-        R = len(set(preds).intersection(set(refs))) / len(set(refs))
+        if len(null_reference_mappings) > 0:
+            preds = preds.difference(null_reference_mappings)
+            refs = refs.difference(null_reference_mappings)
+        num_correct = len(preds.intersection(refs))
+        P = num_correct / len(preds)
+        R = num_correct / len(refs)
         F1 = 2 * P * R / (P + R)
 
         return {"P": round(P, 3), "R": round(R, 3), "F1": round(F1, 3)}
@@ -11,9 +11,20 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from deeponto.utils import run_jar
+from __future__ import annotations
+
+import logging
 import os
 
+import jpype
+
+from deeponto.utils import run_jar
+
+_logger = logging.getLogger(__name__)
+
+# the class loader of the LogMap jar inside the running JVM (created on the first use)
+_LOGMAP_CLASS_LOADER = None
+
 
 def run_logmap_repair(
     src_onto_path: str, tgt_onto_path: str, mapping_file_path: str, output_path: str, max_jvm_memory: str = "10g"
@@ -38,3 +49,70 @@ def run_logmap_repair(
     )
     print(f"The jar command is:\n{repair_command}.")
     run_jar(repair_command)
+
+
+def get_logmap_class_loader():
+    """Get a class loader of the LogMap jar (and its dependencies) inside the running JPype JVM.
+
+    The system class loader is the parent such that OWLAPI classes (e.g., the loaded `OWLOntology` objects)
+    are shared between $\textsf{DeepOnto}$ and LogMap.
+    """
+    global _LOGMAP_CLASS_LOADER
+    if _LOGMAP_CLASS_LOADER is None:
+        if not jpype.isJVMStarted():
+            raise RuntimeError("The JVM has not been started; load the ontologies first.")
+        from java.io import File  # type: ignore
+        from java.lang import ClassLoader  # type: ignore
+        from java.net import URL, URLClassLoader  # type: ignore
+
+        logmap_path = os.path.dirname(__file__)
+        dependency_path = os.path.join(logmap_path, "java-dependencies")
+        jar_paths = [os.path.join(logmap_path, "logmap-matcher-4.0.jar")] + [
+            os.path.join(dependency_path, jar) for jar in sorted(os.listdir(dependency_path)) if jar.endswith(".jar")
+        ]
+        jar_urls = jpype.JArray(URL)([File(jar_path).toURI().toURL() for jar_path in jar_paths])
+        _LOGMAP_CLASS_LOADER = URLClassLoader(jar_urls, ClassLoader.getSystemClassLoader())
+    return _LOGMAP_CLASS_LOADER
+
+
+def run_logmap_repair_in_process(
+    src_onto, tgt_onto, mappings: list[tuple[str, str, float]], logger: logging.Logger | None = None
+):
+    r"""Run the repair module of LogMap inside the running JPype JVM.
+
+    Unlike [`run_logmap_repair`][deeponto.align.logmap.run_logmap_repair], no second JVM is launched; the already
+    loaded `OWLOntology` objects are reused and the mappings are passed as in-memory collections.
+
+    !!! warning
+
+        The LogMap classes are loaded with the system class loader as the parent, so they link against the OWLAPI
+        of $\textsf{DeepOnto}$ rather than the one LogMap was built with. This has not been verified end to end;
+        the subprocess [`run_logmap_repair`][deeponto.align.logmap.run_logmap_repair] remains the default.
+
+    Args:
+        src_onto (Ontology): The source ontology.
+        tgt_onto (Ontology): The target ontology.
+        mappings (List[Tuple[str, str, float]]): The `(src_class_iri, tgt_class_iri, score)` equivalence mappings to be repaired.
+        logger (Logger, optional): The logger of the caller. Defaults to `None` which means using the logger of this module.
+
+    Returns:
+        (List[Tuple[str, str, float]]): The repaired mappings.
+    """
+    class_loader = get_logmap_class_loader()
+    RepairFacility = jpype.JClass("uk.ac.ox.krr.logmap2.LogMap2_RepairFacility", loader=class_loader)
+    MappingObjectStr = jpype.JClass("uk.ac.ox.krr.logmap2.mappings.objects.MappingObjectStr", loader=class_loader)
+    from java.util import HashSet  # type: ignore
+
+    input_mappings = HashSet()
+    for src_class_iri, tgt_class_iri, score in mappings:
+        input_mappings.add(
+            MappingObjectStr(src_class_iri, tgt_class_iri, float(score), MappingObjectStr.EQ, MappingObjectStr.CLASSES)
+        )
+    logger = logger or _logger
+    logger.info(f"Run the repair module of LogMap in process on {len(mappings)} mappings.")
+    # repair the whole ontologies (no overlapping extraction) in a single cleaning step (not optimal)
+    repair_facility = RepairFacility(src_onto.owl_onto, tgt_onto.owl_onto, input_mappings, False, False)
+    return [
+        (str(m.getIRIStrEnt1()), str(m.getIRIStrEnt2()), float(m.getConfidence()))
+        for m in repair_facility.getCleanMappings()
+    ]
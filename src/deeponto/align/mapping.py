@@ -14,22 +14,28 @@
 
 from __future__ import annotations
 
-from typing import Optional, List, TYPE_CHECKING
+from typing import Optional, List, Sequence, TYPE_CHECKING
 import pprintpp
 from collections import defaultdict
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import random
 import logging
-logger = logging.getLogger(__name__)
 
 from deeponto.onto import Ontology
-from deeponto.utils import Tokenizer, uniqify, read_table
+from deeponto.utils import Tokenizer, uniqify, read_arrow_table
 
 if TYPE_CHECKING:
     from org.semanticweb.owlapi.model import OWLObject  # type: ignore
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_REL = "<?rel>"
 DUP_STRATEGIES = ["average", "kept_new", "kept_old"]
+MAPPING_TABLE_COLUMN_TYPES = {"SrcEntity": pa.string(), "TgtEntity": pa.string(), "Score": pa.float64()}
 DEFAULT_DUP_STRATEGY = DUP_STRATEGIES[0]
 
 
@@ -121,34 +127,38 @@ class EntityMapping:
         threshold: Optional[float] = None,
         relation: str = DEFAULT_REL,
         is_reference: bool = False,
-    ) -> List[EntityMapping]:
-        r"""Read entity mappings from `.csv` or `.tsv` files.
+        as_mapping_set: bool = False,
+    ) -> list[EntityMapping] | MappingSet:
+        r"""Read entity mappings from `.csv`, `.tsv` or `.parquet` files.
         
         !!! note "Mapping Table Format"
         
             The columns of the mapping table must have the headings: `"SrcEntity"`, `"TgtEntity"`, and `"Score"`.
 
+        The table is parsed by the pyarrow readers and the threshold is applied to the score column before any
+        mapping is created (see [`read_mapping_table`][deeponto.align.mapping.read_mapping_table]).
+
         Args:
-            table_of_mappings_file (str): The path to the table (`.csv` or `.tsv`) of mappings.
+            table_of_mappings_file (str): The path to the table (`.csv`, `.tsv` or `.parquet`) of mappings.
             threshold (Optional[float], optional): Mappings with scores less than `threshold` will not be loaded. Defaults to 0.0.
             relation (str, optional): A symbol that represents what semantic relation this mapping stands for. Defaults to `<?rel>` which means unspecified.
                 Suggested inputs are `"<EquivalentTo>"` and `"<SubsumedBy>"`.
             is_reference (bool): Whether the loaded mappings are reference mappigns; if so, `threshold` is disabled and mapping scores
                 are all set to $1.0$. Defaults to `False`.
+            as_mapping_set (bool): Whether to return a columnar [`MappingSet`][deeponto.align.mapping.MappingSet] instead of
+                a list of mapping objects. Defaults to `False`.
 
         Returns:
-            (List[EntityMapping]): A list of entity mappings loaded from the table file.
+            (Union[List[EntityMapping], MappingSet]): A list (or a mapping set) of entity mappings loaded from the table file.
         """
-        df = read_table(table_of_mappings_file)
-        entity_mappings = []
-        for dp in df.itertuples():
-            if is_reference:
-                entity_mappings.append(ReferenceMapping(dp.SrcEntity, dp.TgtEntity, relation))
-            else:
-                # allow `None` for threshold
-                if not threshold or dp["Score"] >= threshold:
-                    entity_mappings.append(EntityMapping(dp.SrcEntity, dp.TgtEntity, relation, dp.Score))
-        return entity_mappings
+        table = read_mapping_table(table_of_mappings_file, threshold, is_reference)
+        if as_mapping_set:
+            return MappingSet.from_arrow(table, relation)
+        heads, tails = table["SrcEntity"].to_pylist(), table["TgtEntity"].to_pylist()
+        if is_reference:
+            return [ReferenceMapping(head, tail, relation) for head, tail in zip(heads, tails)]
+        scores = table["Score"].to_pylist()
+        return [EntityMapping(head, tail, relation, score) for head, tail, score in zip(heads, tails, scores)]
 
     def __repr__(self):
         return f"EntityMapping({self.head} {self.relation} {self.tail}, {round(self.score, 6)})"
@@ -209,22 +219,407 @@ class ReferenceMapping(EntityMapping):
         self.candidates.append(candidate_mapping)
 
     @staticmethod
-    def read_table_mappings(table_of_mappings_file: str, relation: str = DEFAULT_REL):
-        r"""Read reference mappings from `.csv` or `.tsv` files.
+    def read_table_mappings(table_of_mappings_file: str, relation: str = DEFAULT_REL, as_mapping_set: bool = False):
+        r"""Read reference mappings from `.csv`, `.tsv` or `.parquet` files.
         
         !!! note "Mapping Table Format"
         
             The columns of the mapping table must have the headings: `"SrcEntity"`, `"TgtEntity"`, and `"Score"`.
 
         Args:
-            table_of_mappings_file (str): The path to the table (`.csv` or `.tsv`) of mappings.
+            table_of_mappings_file (str): The path to the table (`.csv`, `.tsv` or `.parquet`) of mappings.
             relation (str, optional): A symbol that represents what semantic relation this mapping stands for. Defaults to `<?rel>` which means unspecified.
                 Suggested inputs are `"<EquivalentTo>"` and `"<SubsumedBy>"`.
+            as_mapping_set (bool): Whether to return a columnar [`MappingSet`][deeponto.align.mapping.MappingSet] instead of
+                a list of mapping objects. Defaults to `False`.
 
         Returns:
-            (List[ReferenceMapping]): A list of reference mappings loaded from the table file.
+            (Union[List[ReferenceMapping], MappingSet]): A list (or a mapping set) of reference mappings loaded from the table file.
+        """
+        return EntityMapping.read_table_mappings(
+            table_of_mappings_file, relation=relation, is_reference=True, as_mapping_set=as_mapping_set
+        )
+
+
+##################################################################################
+###                        columnar mapping structure                          ###
+##################################################################################
+
+
+def read_mapping_table(table_of_mappings_file: str, threshold: float | None = None, is_reference: bool = False) -> pa.Table:
+    r"""Read a (`.csv`, `.tsv` or `.parquet`) table of mappings as a typed pyarrow table.
+
+    Only the `"SrcEntity"` and `"TgtEntity"` (string) columns and, if not `is_reference`, the `"Score"` (float) column are
+    parsed. Mappings with scores less than `threshold` are filtered out in the columnar form; `None` (or `0.0`) means no threshold.
+    For reference mappings, the threshold is disabled and the scores are all set to $1.0$. Rows with an empty `"SrcEntity"`
+    or `"TgtEntity"` cell are dropped as they do not form mappings.
+    """
+    columns = ["SrcEntity", "TgtEntity"] if is_reference else ["SrcEntity", "TgtEntity", "Score"]
+    table = read_arrow_table(table_of_mappings_file, columns=columns, column_types=MAPPING_TABLE_COLUMN_TYPES)
+    if table["SrcEntity"].null_count or table["TgtEntity"].null_count:
+        table = table.filter(pc.and_(pc.is_valid(table["SrcEntity"]), pc.is_valid(table["TgtEntity"])))
+    if is_reference:
+        return table.append_column("Score", pa.array(np.ones(len(table)), type=pa.float64()))
+    # allow `None` for threshold
+    if threshold:
+        table = table.filter(pc.greater_equal(table["Score"], threshold))
+    return table
+
+
+def _merge_vocabs(vocab: np.ndarray, other_vocab: np.ndarray):
+    """Merge the entries of `other_vocab` into `vocab` and return the merged vocabulary together with the ids
+    of the `other_vocab` entries in it (`None` if the vocabularies are identical)."""
+    if other_vocab is vocab:
+        return vocab, None
+    other_ids = pd.Index(vocab).get_indexer(other_vocab)
+    unknown = other_ids < 0
+    other_ids[unknown] = len(vocab) + np.arange(unknown.sum())
+    return np.concatenate([vocab, other_vocab[unknown]]), other_ids
+
+
+def _intern(values, dtype) -> tuple[np.ndarray, np.ndarray]:
+    """Intern the values into integer ids (in the order of first occurrence) and the vocabulary of unique values.
+
+    Null values (`None` or `NaN`) are rejected as they have no id (`pd.factorize` marks them with `-1`, which would
+    otherwise index the last entry of the vocabulary).
+    """
+    ids, vocab = pd.factorize(np.asarray(values, dtype=object))
+    if (ids < 0).any():
+        raise ValueError(f"Null values found at positions {np.flatnonzero(ids < 0)[:10].tolist()} (at most 10 shown).")
+    return ids.astype(dtype), np.asarray(vocab, dtype=object)
+
+
+def _intern_arrow(column: pa.ChunkedArray) -> tuple[np.ndarray, np.ndarray]:
+    """Intern a (possibly dictionary-encoded) pyarrow string column into integer ids and the vocabulary of unique values.
+
+    Null values are rejected as in `_intern`.
+    """
+    if column.null_count:
+        raise ValueError(f"{column.null_count} null values found in the column.")
+    if pa.types.is_dictionary(column.type):
+        column = column.unify_dictionaries().combine_chunks()
+    else:
+        # NOTE: encoding the combined column is much faster than unifying the dictionaries of many encoded chunks
+        column = pc.dictionary_encode(column.cast(pa.string()).combine_chunks())
+    # the dictionary is interned again in case it has duplicated values
+    codes, vocab = _intern(column.dictionary.to_numpy(zero_copy_only=False), np.int32)
+    return codes[column.indices.to_numpy()], vocab
+
+
+class MappingSet:
+    r"""A columnar container of (possibly millions of) entity mappings.
+
+    Instead of a list of [`EntityMapping`][deeponto.align.mapping.EntityMapping] objects, the mappings are stored as arrays:
+    the entity IRIs are interned, i.e., each mapping has the ids of its head (source entity) and tail (target entity) in the
+    head and tail vocabularies, a relation code in the relation vocabulary, and a `float32` score. Thresholding, sorting,
+    top-$k$ selection, de-duplication and set operations are vectorised over these arrays, and the mapping sets derived
+    from one another share their vocabularies.
+
+    As [`to_tuple`][deeponto.align.mapping.EntityMapping.to_tuple], a mapping is identified by its `(head, tail)` pair in
+    de-duplication and set operations, or by its `(head, tail, relation)` triple if `by_relation` is `True`.
+
+    Attributes:
+        head_vocab (np.ndarray): The unique head (source entity) IRIs.
+        tail_vocab (np.ndarray): The unique tail (target entity) IRIs.
+        relation_vocab (np.ndarray): The unique relations.
+        head_ids (np.ndarray): The `int32` ids of the heads in `head_vocab`.
+        tail_ids (np.ndarray): The `int32` ids of the tails in `tail_vocab`.
+        relation_ids (np.ndarray): The `int16` codes of the relations in `relation_vocab`.
+        scores (np.ndarray): The `float32` scores of the mappings.
+    """
+
+    def __init__(
+        self,
+        heads: Sequence[str] = (),
+        tails: Sequence[str] = (),
+        relations: str | Sequence[str] = DEFAULT_REL,
+        scores: float | Sequence[float] = 0.0,
+    ):
+        """Initialise a mapping set from the IRIs of the heads and the tails.
+
+        Args:
+            heads (Sequence[str]): The IRIs of the source entities.
+            tails (Sequence[str]): The IRIs of the target entities.
+            relations (Union[str, Sequence[str]], optional): The relation of all the mappings or of each mapping. Defaults to `<?rel>`.
+            scores (Union[float, Sequence[float]], optional): The score of all the mappings or of each mapping. Defaults to `0.0`.
         """
-        return EntityMapping.read_table_mappings(table_of_mappings_file, relation=relation, is_reference=True)
+        if len(heads) != len(tails):
+            raise ValueError(f"The numbers of heads ({len(heads)}) and tails ({len(tails)}) are different.")
+        self.head_ids, self.head_vocab = _intern(heads, np.int32)
+        self.tail_ids, self.tail_vocab = _intern(tails, np.int32)
+        if isinstance(relations, str):
+            self.relation_ids, self.relation_vocab = np.zeros(len(heads), dtype=np.int16), np.array([relations], dtype=object)
+        else:
+            self.relation_ids, self.relation_vocab = _intern(relations, np.int16)
+        self.scores = np.empty(len(heads), dtype=np.float32)
+        self.scores[:] = scores
+
+    @classmethod
+    def from_arrays(
+        cls,
+        head_vocab: np.ndarray,
+        tail_vocab: np.ndarray,
+        relation_vocab: np.ndarray,
+        head_ids: np.ndarray,
+        tail_ids: np.ndarray,
+        relation_ids: np.ndarray,
+        scores: np.ndarray,
+    ):
+        """Create a mapping set from the (already interned) vocabularies and id arrays."""
+        mapping_set = cls.__new__(cls)
+        mapping_set.head_vocab, mapping_set.tail_vocab, mapping_set.relation_vocab = head_vocab, tail_vocab, relation_vocab
+        mapping_set.head_ids = np.asarray(head_ids, dtype=np.int32)
+        mapping_set.tail_ids = np.asarray(tail_ids, dtype=np.int32)
+        mapping_set.relation_ids = np.asarray(relation_ids, dtype=np.int16)
+        mapping_set.scores = np.asarray(scores, dtype=np.float32)
+        return mapping_set
+
+    @classmethod
+    def from_entity_mappings(cls, entity_mappings: list[EntityMapping] | MappingSet):
+        """Create a mapping set from a list of entity (or reference) mappings; a mapping set is returned as is."""
+        if isinstance(entity_mappings, MappingSet):
+            return entity_mappings
+        return cls(
+            [m.head for m in entity_mappings],
+            [m.tail for m in entity_mappings],
+            [m.relation for m in entity_mappings],
+            [m.score for m in entity_mappings],
+        )
+
+    @classmethod
+    def from_tuples(cls, mapping_tuples: list[tuple], relation: str = DEFAULT_REL):
+        """Create a mapping set from a list of `(head, tail)` or `(head, tail, score)` tuples."""
+        if not mapping_tuples:
+            return cls(relations=relation)
+        columns = list(zip(*mapping_tuples))
+        return cls(columns[0], columns[1], relation, columns[2] if len(columns) > 2 else 0.0)
+
+    @classmethod
+    def from_table(
+        cls,
+        table_of_mappings_file: str,
+        threshold: float | None = None,
+        relation: str = DEFAULT_REL,
+        is_reference: bool = False,
+    ):
+        r"""Read a mapping set from a `.csv`, `.tsv` or `.parquet` file with the `"SrcEntity"`, `"TgtEntity"` and `"Score"` columns
+        (see [`read_mapping_table`][deeponto.align.mapping.read_mapping_table]).
+
+        Args:
+            table_of_mappings_file (str): The path to the table (`.csv`, `.tsv` or `.parquet`) of mappings.
+            threshold (Optional[float], optional): Mappings with scores less than `threshold` will not be loaded. Defaults to `None`.
+            relation (str, optional): The relation of the mappings. Defaults to `<?rel>`.
+            is_reference (bool): Whether the loaded mappings are reference mappings; if so, `threshold` is disabled and mapping scores
+                are all set to $1.0$. Defaults to `False`.
+        """
+        return cls.from_arrow(read_mapping_table(table_of_mappings_file, threshold, is_reference), relation)
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table, relation: str = DEFAULT_REL):
+        r"""Create a mapping set from a pyarrow table with the `"SrcEntity"`, `"TgtEntity"` and `"Score"` columns, where
+        the entity columns are interned by (pyarrow) dictionary encoding, or taken as they are if already dictionary-encoded
+        (e.g., read from a `.parquet` file saved by [`save_table`][deeponto.align.mapping.MappingSet.save_table])."""
+        head_ids, head_vocab = _intern_arrow(table["SrcEntity"])
+        tail_ids, tail_vocab = _intern_arrow(table["TgtEntity"])
+        return cls.from_arrays(
+            head_vocab,
+            tail_vocab,
+            np.array([relation], dtype=object),
+            head_ids,
+            tail_ids,
+            np.zeros(len(table), dtype=np.int16),
+            table["Score"].to_numpy().astype(np.float32),
+        )
+
+    def to_arrow(self) -> pa.Table:
+        """Transform the mapping set into a pyarrow table with the dictionary-encoded `"SrcEntity"` and `"TgtEntity"` columns
+        (sharing the vocabularies of the mapping set) and the `"Score"` column; the relations are discarded."""
+        return pa.table(
+            {
+                "SrcEntity": pa.DictionaryArray.from_arrays(self.head_ids, pa.array(self.head_vocab, type=pa.string())),
+                "TgtEntity": pa.DictionaryArray.from_arrays(self.tail_ids, pa.array(self.tail_vocab, type=pa.string())),
+                "Score": pa.array(self.scores, type=pa.float32()),
+            }
+        )
+
+    def save_table(self, save_path: str):
+        r"""Save the mappings to a `.tsv` (or `.csv`) file with the `"SrcEntity"`, `"TgtEntity"` and `"Score"` columns, or to a
+        `.parquet` file (with dictionary-encoded entity columns) for fast re-loading."""
+        if save_path.endswith(".parquet"):
+            pq.write_table(self.to_arrow(), save_path)
+            return
+        df = pd.DataFrame({"SrcEntity": self.heads, "TgtEntity": self.tails, "Score": self.scores})
+        df.to_csv(save_path, sep="\t" if save_path.endswith(".tsv") else ",", index=False)
+
+    @property
+    def heads(self) -> np.ndarray:
+        """The head (source entity) IRIs of the mappings."""
+        return self.head_vocab[self.head_ids]
+
+    @property
+    def tails(self) -> np.ndarray:
+        """The tail (target entity) IRIs of the mappings."""
+        return self.tail_vocab[self.tail_ids]
+
+    @property
+    def relations(self) -> np.ndarray:
+        """The relations of the mappings."""
+        return self.relation_vocab[self.relation_ids]
+
+    def to_entity_mappings(self) -> list[EntityMapping]:
+        """Transform the mapping set into a list of entity mappings."""
+        return [
+            EntityMapping(head, tail, relation, score)
+            for head, tail, relation, score in zip(
+                self.heads.tolist(), self.tails.tolist(), self.relations.tolist(), self.scores.tolist()
+            )
+        ]
+
+    def to_reference_mappings(self) -> list[ReferenceMapping]:
+        """Transform the mapping set into a list of reference mappings (whose scores are $1.0$)."""
+        return [
+            ReferenceMapping(head, tail, relation)
+            for head, tail, relation in zip(self.heads.tolist(), self.tails.tolist(), self.relations.tolist())
+        ]
+
+    def to_tuples(self, with_score: bool = False) -> list[tuple]:
+        """Transform the mapping set into `(head, tail)` (or `(head, tail, score)` if `with_score` is `True`) tuples."""
+        if with_score:
+            return list(zip(self.heads.tolist(), self.tails.tolist(), self.scores.tolist()))
+        return list(zip(self.heads.tolist(), self.tails.tolist()))
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __iter__(self):
+        return iter(self.to_entity_mappings())
+
+    def __getitem__(self, key):
+        """Get an entity mapping by an integer index, or a mapping subset by a slice, an index array or a boolean mask."""
+        if isinstance(key, (int, np.integer)):
+            return EntityMapping(
+                self.head_vocab[self.head_ids[key]],
+                self.tail_vocab[self.tail_ids[key]],
+                self.relation_vocab[self.relation_ids[key]],
+                float(self.scores[key]),
+            )
+        return self.from_arrays(
+            self.head_vocab,
+            self.tail_vocab,
+            self.relation_vocab,
+            self.head_ids[key],
+            self.tail_ids[key],
+            self.relation_ids[key],
+            self.scores[key],
+        )
+
+    def __repr__(self):
+        return f"MappingSet(num_mappings={len(self)}, num_heads={len(self.head_vocab)}, num_tails={len(self.tail_vocab)})"
+
+    def threshold(self, threshold: float) -> MappingSet:
+        """Keep the mappings with scores no less than `threshold`."""
+        return self[self.scores >= threshold]
+
+    def sort_by_score(self, k: int | None = None) -> MappingSet:
+        r"""Sort the mappings by their scores in descending order (ties in the original order) and keep the top $k$ if specified,
+        as [`sort_entity_mappings_by_score`][deeponto.align.mapping.EntityMapping.sort_entity_mappings_by_score] does.
+        """
+        return self[np.argsort(-self.scores, kind="stable")[:k]]
+
+    def topk_per_head(self, k: int) -> MappingSet:
+        r"""Keep the top $k$ scored mappings of each head (source entity), grouped by heads (in the order of the head ids)
+        and then sorted by scores in descending order (ties in the original order)."""
+        order = np.lexsort((-self.scores, self.head_ids))
+        sorted_head_ids = self.head_ids[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_head_ids[1:] != sorted_head_ids[:-1]])
+        ranks = np.arange(len(order)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(order)]))
+        return self[order[ranks < k]]
+
+    def keys(self, by_relation: bool = False) -> np.ndarray:
+        """Get the `int64` keys identifying the `(head, tail)` pairs (or `(head, tail, relation)` triples) of the mappings."""
+        keys = self.head_ids.astype(np.int64) * len(self.tail_vocab) + self.tail_ids
+        if by_relation:
+            keys = keys * len(self.relation_vocab) + self.relation_ids
+        return keys
+
+    def deduplicate(self, strategy: str = "kept_old", by_relation: bool = False) -> MappingSet:
+        r"""Remove the duplicated mappings.
+
+        Args:
+            strategy (str, optional): Keep the first (`"kept_old"`) or the last (`"kept_new"`) of the duplicated mappings,
+                or keep the first with the `"average"` score. Defaults to `"kept_old"`.
+            by_relation (bool, optional): Whether mappings of different relations are different. Defaults to `False`.
+
+        Returns:
+            (MappingSet): The de-duplicated mappings in the order of the kept ones.
+        """
+        if strategy not in DUP_STRATEGIES:
+            raise ValueError(f"Unknown de-duplication strategy: {strategy}; choose from {DUP_STRATEGIES}.")
+        keys = self.keys(by_relation)
+        if strategy == "kept_new":
+            _, last_idxs = np.unique(keys[::-1], return_index=True)
+            return self[np.sort(len(keys) - 1 - last_idxs)]
+        _, first_idxs, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+        deduplicated = self[first_idxs]
+        if strategy == "average":
+            deduplicated.scores = (np.bincount(inverse.ravel(), weights=self.scores, minlength=len(counts)) / counts).astype(np.float32)
+        return deduplicated[np.argsort(first_idxs, kind="stable")]
+
+    def isin(self, other: MappingSet | list[EntityMapping], by_relation: bool = False) -> np.ndarray:
+        """Get the boolean mask of the mappings that are also in `other`."""
+        other = MappingSet.from_entity_mappings(other)
+        head_ids = self._align_ids(self.head_vocab, other.head_vocab, other.head_ids)
+        tail_ids = self._align_ids(self.tail_vocab, other.tail_vocab, other.tail_ids)
+        other_keys = head_ids.astype(np.int64) * len(self.tail_vocab) + tail_ids
+        known = (head_ids >= 0) & (tail_ids >= 0)
+        if by_relation:
+            relation_ids = self._align_ids(self.relation_vocab, other.relation_vocab, other.relation_ids)
+            other_keys = other_keys * len(self.relation_vocab) + relation_ids
+            known &= relation_ids >= 0
+        return np.isin(self.keys(by_relation), other_keys[known])
+
+    @staticmethod
+    def _align_ids(vocab: np.ndarray, other_vocab: np.ndarray, other_ids: np.ndarray) -> np.ndarray:
+        """Map the ids of `other_vocab` into the ids of `vocab` (`-1` for the entries not in `vocab`)."""
+        if other_vocab is vocab:
+            return other_ids
+        return pd.Index(vocab).get_indexer(other_vocab)[other_ids]
+
+    def intersection(self, other: MappingSet | list[EntityMapping], by_relation: bool = False) -> MappingSet:
+        """Get the (de-duplicated) mappings that are also in `other` (with the scores of `self`)."""
+        deduplicated = self.deduplicate(by_relation=by_relation)
+        return deduplicated[deduplicated.isin(other, by_relation)]
+
+    def difference(self, other: MappingSet | list[EntityMapping], by_relation: bool = False) -> MappingSet:
+        """Get the (de-duplicated) mappings that are not in `other`."""
+        deduplicated = self.deduplicate(by_relation=by_relation)
+        return deduplicated[~deduplicated.isin(other, by_relation)]
+
+    def union(
+        self, other: MappingSet | list[EntityMapping], strategy: str = "kept_old", by_relation: bool = False
+    ) -> MappingSet:
+        """Get the (de-duplicated) mappings in either `self` or `other`, where the scores of the mappings in both
+        are resolved by `strategy` (see [`deduplicate`][deeponto.align.mapping.MappingSet.deduplicate])."""
+        return MappingSet.concat([self, MappingSet.from_entity_mappings(other)]).deduplicate(strategy, by_relation)
+
+    @classmethod
+    def concat(cls, mapping_sets: list[MappingSet]) -> MappingSet:
+        """Concatenate mapping sets (with duplicates) into one mapping set with merged vocabularies."""
+        if not mapping_sets:
+            return cls()
+        vocabs = [mapping_sets[0].head_vocab, mapping_sets[0].tail_vocab, mapping_sets[0].relation_vocab]
+        id_arrays = [[mapping_sets[0].head_ids], [mapping_sets[0].tail_ids], [mapping_sets[0].relation_ids]]
+        for mapping_set in mapping_sets[1:]:
+            other_vocabs = [mapping_set.head_vocab, mapping_set.tail_vocab, mapping_set.relation_vocab]
+            other_id_arrays = [mapping_set.head_ids, mapping_set.tail_ids, mapping_set.relation_ids]
+            for i in range(3):
+                vocabs[i], merged_ids = _merge_vocabs(vocabs[i], other_vocabs[i])
+                id_arrays[i].append(other_id_arrays[i] if merged_ids is None else merged_ids[other_id_arrays[i]])
+        return cls.from_arrays(
+            *vocabs,
+            *[np.concatenate(ids) for ids in id_arrays],
+            np.concatenate([mapping_set.scores for mapping_set in mapping_sets]),
+        )
 
 
 class SubsFromEquivMappingGenerator:
@@ -0,0 +1,227 @@
+# Copyright 2021 Yuan He. All rights reserved.
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import time
+from collections import defaultdict
+
+REPAIR_CONFLICT_TYPES = ["one_to_many", "disjointness", "cyclic_equivalence"]
+
+
+class _TaxonomyClosure:
+    """The (lazily computed) ancestor closure of a taxonomy and the disjointness inherited along it."""
+
+    def __init__(self, parents_index: dict, disjointness_index: dict | None = None):
+        self.parents_index = parents_index
+        self.disjointness_index = disjointness_index or {}
+        self._ancestors = dict()
+        self._disjoint_classes = dict()
+
+    def ancestors(self, iri: str) -> frozenset:
+        """Get the ancestors of an entity, **including** itself."""
+        if iri in self._ancestors:
+            return self._ancestors[iri]
+        # depth-first along the (uncached) parents such that the closure of an entity is the union of its parents'
+        path, on_path = [iri], {iri}
+        while path:
+            node = path[-1]
+            parents = self.parents_index.get(node, ())
+            uncached_parent = next((p for p in parents if p not in self._ancestors), None)
+            if uncached_parent is None:
+                self._ancestors[node] = frozenset([node]).union(*[self._ancestors[p] for p in parents])
+                on_path.discard(path.pop())
+            elif uncached_parent in on_path:
+                # NOTE: fall back to the breadth-first search for the entities in a subsumption cycle
+                for node in path:
+                    self._ancestors[node] = self._search_ancestors(node)
+                break
+            else:
+                path.append(uncached_parent)
+                on_path.add(uncached_parent)
+        return self._ancestors[iri]
+
+    def _search_ancestors(self, iri: str) -> frozenset:
+        ancestors = {iri}
+        queue = [iri]
+        while queue:
+            for parent in self.parents_index.get(queue.pop(), ()):
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    queue.append(parent)
+        return frozenset(ancestors)
+
+    def disjoint_classes(self, iri: str) -> frozenset:
+        """Get the entities asserted to be disjoint with any ancestor of an entity."""
+        if iri not in self._disjoint_classes:
+            disjoint_classes = set()
+            for ancestor in self.ancestors(iri):
+                disjoint_classes.update(self.disjointness_index.get(ancestor, ()))
+            self._disjoint_classes[iri] = frozenset(disjoint_classes)
+        return self._disjoint_classes[iri]
+
+    def is_disjoint(self, iri1: str, iri2: str) -> bool:
+        """Check if two entities are disjoint, i.e., an ancestor of one is asserted to be disjoint with an ancestor of the other."""
+        if not self.disjointness_index:
+            return False
+        return not self.disjoint_classes(iri1).isdisjoint(self.ancestors(iri2))
+
+
+class MappingRepairer:
+    r"""Class for repairing (equivalence) mappings natively, i.e., without running LogMap's debugger.
+
+    A mapping $(c, c')$ is regarded as an equivalence between the source class $c$ and the target class $c'$.
+    Two mappings $(c, c')$ and $(d, d')$ where $c \sqsubseteq d$ in the source taxonomy are in conflict if:
+
+    - **disjointness**: $c'$ and $d'$ are disjoint in the target ontology (so $c'$ becomes unsatisfiable),
+        where two classes are disjoint if any of their ancestors are asserted to be disjoint;
+    - **cyclic equivalence**: $d' \sqsubseteq c'$ in the target taxonomy (so $c \equiv d$ and $c' \equiv d'$ are
+        entailed, i.e., the mappings collapse a hierarchy into a cycle of equivalences);
+
+    and symmetrically for the target taxonomy. Optionally, two mappings sharing a source or a target class are
+    in conflict (**one-to-many**), which enforces one-to-one mappings.
+
+    Conflicts are resolved greedily: mappings are visited in descending order of scores and a mapping is kept
+    only if it does not conflict with any mapping kept so far. With the ancestor closures cached and the kept
+    mappings indexed by the classes and their ancestors, each mapping is checked against only the kept mappings
+    that are related to it in either taxonomy.
+
+    !!! note
+
+        This is a sound but incomplete approximation of logic-based repair (like LogMap's); it only considers
+        the asserted named taxonomies and disjointness axioms, which are the sources of most of the incoherence
+        caused by equivalence mappings.
+
+    Attributes:
+        src_closure (_TaxonomyClosure): The ancestor and disjointness closure of the source ontology.
+        tgt_closure (_TaxonomyClosure): The ancestor and disjointness closure of the target ontology.
+        one_to_one (bool): Whether to remove mappings that share a source or a target class with a mapping of a higher score.
+        stats (dict): The statistics of the last repair, including the numbers of removed mappings by conflict types.
+    """
+
+    def __init__(
+        self,
+        src_parents_index: dict,
+        tgt_parents_index: dict,
+        src_disjointness_index: dict | None = None,
+        tgt_disjointness_index: dict | None = None,
+        one_to_one: bool = False,
+    ):
+        """Initialise a native mapping repairer.
+
+        Args:
+            src_parents_index (dict): The `(class_iri, parent_iris)` dictionary of the source ontology
+                (see [`build_hierarchy_index`][deeponto.onto.Ontology.build_hierarchy_index]).
+            tgt_parents_index (dict): The `(class_iri, parent_iris)` dictionary of the target ontology.
+            src_disjointness_index (dict, optional): The `(class_iri, disjoint_class_iris)` dictionary of the source ontology
+                (see [`build_disjointness_index`][deeponto.onto.Ontology.build_disjointness_index]). Defaults to `None`.
+            tgt_disjointness_index (dict, optional): The `(class_iri, disjoint_class_iris)` dictionary of the target ontology. Defaults to `None`.
+            one_to_one (bool, optional): Whether to enforce one-to-one mappings. Defaults to `False`.
+        """
+        self.src_closure = _TaxonomyClosure(src_parents_index, src_disjointness_index)
+        self.tgt_closure = _TaxonomyClosure(tgt_parents_index, tgt_disjointness_index)
+        self.one_to_one = one_to_one
+        self.stats = dict()
+
+    @classmethod
+    def from_ontologies(cls, src_onto, tgt_onto, one_to_one: bool = False):
+        """Initialise a native mapping repairer from the asserted class hierarchies and disjointness of two ontologies."""
+        return cls(
+            src_parents_index=src_onto.build_hierarchy_index("Classes")[0],
+            tgt_parents_index=tgt_onto.build_hierarchy_index("Classes")[0],
+            src_disjointness_index=src_onto.build_disjointness_index("Classes"),
+            tgt_disjointness_index=tgt_onto.build_disjointness_index("Classes"),
+            one_to_one=one_to_one,
+        )
+
+    def repair(self, mappings: list[tuple[str, str, float]]) -> list[tuple[str, str, float]]:
+        r"""Repair the input mappings by greedily removing the conflicting mappings of lower scores.
+
+        Args:
+            mappings (List[Tuple[str, str, float]]): The `(src_class_iri, tgt_class_iri, score)` mappings to be repaired.
+
+        Returns:
+            (List[Tuple[str, str, float]]): The repaired mappings in descending order of scores.
+        """
+        start_time = time.time()
+        # mappings indexed by their source (target) classes
+        kept_by_src, kept_by_tgt = defaultdict(list), defaultdict(list)
+        # mappings indexed by the ancestors of their source (target) classes, i.e., the mappings "below" a class
+        kept_below_src, kept_below_tgt = defaultdict(list), defaultdict(list)
+
+        repaired_mappings, seen = [], set()
+        num_removed = {conflict_type: 0 for conflict_type in REPAIR_CONFLICT_TYPES}
+        # NOTE: the sorting is stable so ties are broken by the input order
+        for src_iri, tgt_iri, score in sorted(mappings, key=lambda m: float(m[2]), reverse=True):
+            if (src_iri, tgt_iri) in seen:
+                continue
+            seen.add((src_iri, tgt_iri))
+            conflict_type = self._find_conflict(
+                src_iri, tgt_iri, kept_by_src, kept_by_tgt, kept_below_src, kept_below_tgt
+            )
+            if conflict_type:
+                num_removed[conflict_type] += 1
+                continue
+            repaired_mappings.append((src_iri, tgt_iri, float(score)))
+            kept_by_src[src_iri].append(tgt_iri)
+            kept_by_tgt[tgt_iri].append(src_iri)
+            for src_ancestor in self.src_closure.ancestors(src_iri):
+                kept_below_src[src_ancestor].append((src_iri, tgt_iri))
+            for tgt_ancestor in self.tgt_closure.ancestors(tgt_iri):
+                kept_below_tgt[tgt_ancestor].append((src_iri, tgt_iri))
+
+        self.stats = {
+            "num_input_mappings": len(seen),
+            "num_repaired_mappings": len(repaired_mappings),
+            "num_removed_mappings": num_removed,
+            "time": round(time.time() - start_time, 3),
+        }
+        return repaired_mappings
+
+    def _find_conflict(
+        self,
+        src_iri: str,
+        tgt_iri: str,
+        kept_by_src: dict,
+        kept_by_tgt: dict,
+        kept_below_src: dict,
+        kept_below_tgt: dict,
+    ) -> str | None:
+        """Return the type of the first conflict between a mapping and the kept mappings, or `None` if there is no conflict."""
+        if self.one_to_one and (src_iri in kept_by_src or tgt_iri in kept_by_tgt):
+            return "one_to_many"
+        src_ancestors = self.src_closure.ancestors(src_iri)
+        tgt_ancestors = self.tgt_closure.ancestors(tgt_iri)
+
+        # kept mappings (a, b) with src ⊑ a
+        for src_ancestor in src_ancestors:
+            for kept_tgt_iri in kept_by_src.get(src_ancestor, ()):
+                if self.tgt_closure.is_disjoint(tgt_iri, kept_tgt_iri):
+                    return "disjointness"
+                if tgt_iri in self.tgt_closure.ancestors(kept_tgt_iri):
+                    return "cyclic_equivalence"
+        # kept mappings (a, b) with a ⊑ src
+        for _, kept_tgt_iri in kept_below_src.get(src_iri, ()):
+            if self.tgt_closure.is_disjoint(tgt_iri, kept_tgt_iri):
+                return "disjointness"
+            if kept_tgt_iri in tgt_ancestors:
+                return "cyclic_equivalence"
+        # kept mappings (a, b) with tgt ⊑ b or b ⊑ tgt (cycles are already detected above)
+        for tgt_ancestor in tgt_ancestors:
+            for kept_src_iri in kept_by_tgt.get(tgt_ancestor, ()):
+                if self.src_closure.is_disjoint(src_iri, kept_src_iri):
+                    return "disjointness"
+        for kept_src_iri, _ in kept_below_tgt.get(tgt_iri, ()):
+            if self.src_closure.is_disjoint(src_iri, kept_src_iri):
+                return "disjointness"
+        return None
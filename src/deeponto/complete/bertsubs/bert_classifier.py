@@ -16,7 +16,7 @@
 #     "Contextual Semantic Embeddings for Ontology Subsumption Prediction (World Wide Web Journal)",
 # )
 
-from typing import List
+from typing import List, Optional
 
 from datasets import Dataset
 from sklearn.metrics import accuracy_score
@@ -24,10 +24,11 @@ from transformers import (
     AutoModelForSequenceClassification,
     AutoTokenizer,
     EarlyStoppingCallback,
-    Trainer,
     TrainingArguments,
 )
 
+from deeponto.utils.training_utils import LengthGroupedTrainer, get_token_length_stats, tokenize_pair_dataset
+
 
 class BERTSubsumptionClassifierTrainer:
     def __init__(
@@ -38,6 +39,10 @@ class BERTSubsumptionClassifierTrainer:
         max_length: int = 128,
         early_stop: bool = False,
         early_stop_patience: int = 10,
+        num_proc: int = 1,
+        cache_path: Optional[str] = None,
+        group_by_length: bool = False,
+        max_tokens_per_batch: Optional[int] = None,
     ):
         print(f"initialize BERT for Binary Classification from the Pretrained BERT model at: {bert_checkpoint} ...")
 
@@ -47,6 +52,9 @@ class BERTSubsumptionClassifierTrainer:
         self.trainer = None
 
         self.max_length = max_length
+        # the tokenised datasets are cached (at `cache_path`) and tokenised by `num_proc` processes
+        self.num_proc = num_proc
+        self.cache_path = cache_path
         self.tra = self.load_dataset(train_data, max_length=self.max_length, count_token_size=True)
         self.val = self.load_dataset(val_data, max_length=self.max_length, count_token_size=True)
         print(f"text max length: {self.max_length}")
@@ -57,6 +65,11 @@ class BERTSubsumptionClassifierTrainer:
         self.early_stop = early_stop
         self.early_stop_patience = early_stop_patience
 
+        # length-grouped training batches (under a token budget if `max_tokens_per_batch` is set) to reduce padding
+        self.group_by_length = group_by_length
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.training_throughput = {}
+
     def add_special_tokens(self, tokens: List):
         r"""Add additional special tokens into the tokenizer's vocab.
         Args:
@@ -72,18 +85,26 @@ class BERTSubsumptionClassifierTrainer:
             train_args (TrainingArguments): Arguments for training.
             do_fine_tune (bool): `False` means loading the checkpoint without training. Defaults to `True`.
         """
-        self.trainer = Trainer(
+        self.trainer = LengthGroupedTrainer(
             model=self.model,
             args=train_args,
             train_dataset=self.tra,
             eval_dataset=self.val,
             compute_metrics=self.compute_metrics,
             tokenizer=self.tokenizer,
+            group_by_length=self.group_by_length,
+            max_tokens_per_batch=self.max_tokens_per_batch,
         )
         if self.early_stop:
             self.trainer.add_callback(EarlyStoppingCallback(early_stopping_patience=self.early_stop_patience))
         if do_fine_tune:
             self.trainer.train()
+            self.training_throughput = self.trainer.get_throughput_report()
+            print("training throughput: {:.2f} samples/s, {:.2f} tokens/s, padding ratio: {:.3f}".format(
+                self.training_throughput["samples_per_second"],
+                self.training_throughput["tokens_per_second"],
+                self.training_throughput["padding_ratio"],
+            ))
 
     @staticmethod
     def compute_metrics(pred):
@@ -96,44 +117,31 @@ class BERTSubsumptionClassifierTrainer:
 
     def load_dataset(self, data: List, max_length: int = 512, count_token_size: bool = False) -> Dataset:
         r"""Load a Huggingface dataset from a list of samples.
+
+        The tokenised dataset is cached on disk and fingerprinted by the data, the tokenizer and `max_length`
+        (see [`tokenize_pair_dataset`][deeponto.utils.training_utils.tokenize_pair_dataset]).
+
         Args:
             data (List[Tuple]): Data samples in a list.
             max_length (int): Maximum length of the input sequence.
             count_token_size (bool): Whether or not to count the token sizes of the data. Defaults to `False`.
         """
-        # data_df = pd.DataFrame(data, columns=["sent1", "sent2", "labels"])
-        # dataset = Dataset.from_pandas(data_df)
-
-        def iterate():
-            for sample in data:
-                yield {"sent1": sample[0], "sent2": sample[1], "labels": sample[2]}
-
-        dataset = Dataset.from_generator(iterate)
+        dataset = tokenize_pair_dataset(
+            data,
+            self.tokenizer,
+            max_length,
+            text_columns=("sent1", "sent2"),
+            cache_path=self.cache_path,
+            num_proc=self.num_proc,
+        )
 
         if count_token_size:
-            tokens = self.tokenizer(dataset["sent1"], dataset["sent2"])
-            l_sum, num_128, num_256, num_512, l_max = 0, 0, 0, 0, 0
-            for item in tokens["input_ids"]:
-                l = len(item)
-                l_sum += l
-                if l <= 128:
-                    num_128 += 1
-                if l <= 256:
-                    num_256 += 1
-                if l <= 512:
-                    num_512 += 1
-                if l > l_max:
-                    l_max = l
-            print("average token size: %.2f" % (l_sum / len(tokens["input_ids"])))
-            print("ratio of token size <= 128: %.3f" % (num_128 / len(tokens["input_ids"])))
-            print("ratio of token size <= 256: %.3f" % (num_256 / len(tokens["input_ids"])))
-            print("ratio of token size <= 512: %.3f" % (num_512 / len(tokens["input_ids"])))
-            print("max token size: %d" % l_max)
-        dataset = dataset.map(
-            lambda examples: self.tokenizer(
-                examples["sent1"], examples["sent2"], max_length=max_length, truncation=True
-            ),
-            batched=True,
-            num_proc=1,
-        )
+            # the token sizes (before truncation) are recorded in the same tokenisation pass
+            stats = get_token_length_stats(dataset, max_length, thresholds=(128, 256, 512))
+            if stats["num_inputs"]:
+                print("average token size: {:.2f}".format(stats["average_num_tokens"]))
+                print("ratio of token size <= 128: {:.3f}".format(stats["ratio_num_tokens_<=128"]))
+                print("ratio of token size <= 256: {:.3f}".format(stats["ratio_num_tokens_<=256"]))
+                print("ratio of token size <= 512: {:.3f}".format(stats["ratio_num_tokens_<=512"]))
+                print("max token size: {}".format(stats["max_num_tokens"]))
         return dataset
@@ -17,6 +17,7 @@
 # )
 
 import os
+import json
 import sys
 import warnings
 import random
@@ -30,6 +31,9 @@ from transformers import TrainingArguments
 from yacs.config import CfgNode
 
 from deeponto.onto import Ontology
+from deeponto.utils import prefetch_map, save_file
+from deeponto.utils.inference_utils import SequenceClassifierBackend
+from deeponto.utils.training_utils import get_num_training_batches
 from .bert_classifier import BERTSubsumptionClassifierTrainer
 from .text_semantics import SubsumptionSampler
 
@@ -134,9 +138,14 @@ class BERTSubsIntraPipeline:
             val_data=va,
             max_length=config.prompt.max_length,
             early_stop=config.fine_tune.early_stop,
+            num_proc=config.fine_tune.get("num_proc_for_tokenization", 1),
+            cache_path=os.path.join(config.fine_tune.output_dir, "tokenised-data"),
+            group_by_length=config.fine_tune.get("group_by_length", False),
+            max_tokens_per_batch=config.fine_tune.get("max_tokens_per_batch", None),
         )
 
-        epoch_steps = len(bert_trainer.tra) // config.fine_tune.batch_size  # total steps of an epoch
+        # total steps of an epoch (estimated with a token budget)
+        epoch_steps = get_num_training_batches(bert_trainer.tra, config.fine_tune.batch_size, bert_trainer.max_tokens_per_batch)
         logging_steps = int(epoch_steps * 0.02) if int(epoch_steps * 0.02) > 0 else 5
         eval_steps = 5 * logging_steps
         training_args = TrainingArguments(
@@ -182,7 +191,25 @@ class BERTSubsIntraPipeline:
             x, max_length=config.prompt.max_length, truncation=True, padding=True, return_tensors="pt"
         )
         softmax = torch.nn.Softmax(dim=1)
-        self.classifier = lambda x: softmax(bert_trainer.model(**x).logits)[:, 1]
+        # an optimised inference backend (e.g., TorchScript or ONNX with int8 quantisation) for CPU scoring
+        inference_backend = SequenceClassifierBackend(
+            bert_trainer.model,
+            backend=config.evaluation.get("inference_backend", "eager"),
+            quantize=config.evaluation.get("quantize", False),
+            export_path=os.path.join(config.fine_tune.output_dir, "onnx"),
+        )
+        if inference_backend.backend != "eager" or inference_backend.quantize:
+            # check the score parity against the eager model and the throughput before using the backend
+            validation_samples = va[: config.evaluation.get("num_pairs_for_backend_validation", 1000)]
+            batch_size = config.evaluation.batch_size
+            validation_batches = [
+                self.tokenize([sample[:2] for sample in validation_samples[i : i + batch_size]]).to(self.device)
+                for i in range(0, len(validation_samples), batch_size)
+            ]
+            report = inference_backend.validate(validation_batches)
+            print(f"inference backend report: {json.dumps(report, indent=4)}")
+            save_file(report, os.path.join(config.fine_tune.output_dir, "inference_backend.json"))
+        self.classifier = lambda x: softmax(inference_backend(x))[:, 1]
 
         self.evaluate(target_subsumptions=valid_subsumptions, test_type="valid")
         if test_subsumptions is not None:
@@ -203,14 +230,23 @@ class BERTSubsIntraPipeline:
         sample_size = len(samples)
         scores = np.zeros(sample_size)
         batch_num = math.ceil(sample_size / self.config.evaluation.batch_size)
-        for i in range(batch_num):
+
+        def tokenize_batch(i: int):
             j = (
                 (i + 1) * self.config.evaluation.batch_size
                 if (i + 1) * self.config.evaluation.batch_size <= sample_size
                 else sample_size
             )
             inputs = self.tokenize(samples[i * self.config.evaluation.batch_size : j])
-            inputs.to(self.device)
+            return i, j, inputs.to(self.device)
+
+        # tokenise the next batches in background threads while the classifier is running
+        for i, j, inputs in prefetch_map(
+            tokenize_batch,
+            range(batch_num),
+            num_workers=self.config.evaluation.get("num_prefetch_workers", 1),
+            max_prefetch=self.config.evaluation.get("max_prefetched_batches", 2),
+        ):
             with torch.no_grad():
                 batch_scores = self.classifier(inputs)
             scores[i * self.config.evaluation.batch_size : j] = batch_scores.cpu().numpy()
@@ -362,6 +362,59 @@ class Ontology:
             children = set([c for c in children if self.check_named_entity(c)])
         return children
 
+    def build_hierarchy_index(self, entity_type: str = "Classes"):
+        r"""Build an index of the asserted named parents and children of each entity in a single pass over the subsumption axioms.
+
+        It gives the same results as [`get_asserted_parents`][deeponto.onto.Ontology.get_asserted_parents] and
+        [`get_asserted_children`][deeponto.onto.Ontology.get_asserted_children] with `named_only=True`, but avoids
+        querying the JVM for every entity when the hierarchy is looked up repeatedly (e.g., in mapping extension).
+
+        Args:
+            entity_type (str, optional): The entity type to be considered. Defaults to `"Classes"`.
+                Options are `"Classes"`, `"ObjectProperties"`, and `"DataProperties"`.
+        Returns:
+            (Tuple[defaultdict, defaultdict]): The `(entity_iri, parent_iris)` and `(entity_iri, children_iris)` dictionaries.
+        """
+        if entity_type not in ["Classes", "ObjectProperties", "DataProperties"]:
+            raise ValueError(f"Unsupported entity type {entity_type}.")
+        parents_index, children_index = defaultdict(set), defaultdict(set)
+        for axiom in self.get_subsumption_axioms(entity_type):
+            if entity_type == "Classes":
+                sub_entity, super_entity = axiom.getSubClass(), axiom.getSuperClass()
+            else:
+                sub_entity, super_entity = axiom.getSubProperty(), axiom.getSuperProperty()
+            if self.check_named_entity(sub_entity) and self.check_named_entity(super_entity):
+                sub_entity_iri, super_entity_iri = str(sub_entity.getIRI()), str(super_entity.getIRI())
+                parents_index[sub_entity_iri].add(super_entity_iri)
+                children_index[super_entity_iri].add(sub_entity_iri)
+        return parents_index, children_index
+
+    def build_disjointness_index(self, entity_type: str = "Classes"):
+        r"""Build an index of the asserted disjointness between named entities in a single pass over the disjointness axioms.
+
+        Args:
+            entity_type (str, optional): The entity type to be considered. Defaults to `"Classes"`.
+                Options are `"Classes"`, `"ObjectProperties"`, and `"DataProperties"`.
+        Returns:
+            (defaultdict): The `(entity_iri, disjoint_entity_iris)` dictionary (symmetric).
+        """
+        if entity_type == "Classes":
+            axioms = self.owl_onto.getAxioms(AxiomType.DISJOINT_CLASSES)
+        elif entity_type == "ObjectProperties":
+            axioms = self.owl_onto.getAxioms(AxiomType.DISJOINT_OBJECT_PROPERTIES)
+        elif entity_type == "DataProperties":
+            axioms = self.owl_onto.getAxioms(AxiomType.DISJOINT_DATA_PROPERTIES)
+        else:
+            raise ValueError(f"Unsupported entity type {entity_type}.")
+        disjointness_index = defaultdict(set)
+        for axiom in axioms:
+            # NOTE: a disjointness axiom can involve more than two (pairwise disjoint) entities
+            entities = axiom.getClassExpressions() if entity_type == "Classes" else axiom.getProperties()
+            entity_iris = [str(e.getIRI()) for e in entities if self.check_named_entity(e)]
+            for entity_iri in entity_iris:
+                disjointness_index[entity_iri].update(e for e in entity_iris if e != entity_iri)
+        return disjointness_index
+
     def get_asserted_complex_classes(self, gci_only: bool = False):
         """Get complex classes that occur in at least one of the ontology axioms.
 
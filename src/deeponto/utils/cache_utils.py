@@ -0,0 +1,164 @@
+# Copyright 2021 Yuan He. All rights reserved.
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+from .file_utils import create_path, load_file, save_file
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "deeponto")
+
+# content hashes of files keyed by `(path, size, modification time)` such that a file is read at most once
+_FILE_HASHES = dict()
+
+
+class StageCache:
+    r"""Class for a content-addressed cache of the artifacts produced by pipeline stages.
+
+    A stage is identified by its name and a **key** which is the hash of everything the stage depends on,
+    e.g., the content hashes of the input ontologies, the relevant configuration subtree, and the hashes (or keys)
+    of the upstream artifacts. Artifacts (files or directories) are stored under `<cache_path>/<stage_name>/<key>`
+    together with a `manifest.json`, and can be restored into any output directory with the same key.
+
+    Attributes:
+        cache_path (str): The root directory of the cache. Defaults to `~/.cache/deeponto`.
+    """
+
+    def __init__(self, cache_path: str | None = None):
+        self.cache_path = os.path.abspath(cache_path or DEFAULT_CACHE_PATH)
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """Compute the `sha256` hash of a file's content."""
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        file_id = (file_path, stat.st_size, stat.st_mtime_ns)
+        if file_id not in _FILE_HASHES:
+            sha256 = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha256.update(chunk)
+            _FILE_HASHES[file_id] = sha256.hexdigest()
+        return _FILE_HASHES[file_id]
+
+    @staticmethod
+    def hash_object(obj) -> str:
+        """Compute the `sha256` hash of a JSON-serialisable object (e.g., a configuration subtree)."""
+        return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+    def stage_key(self, stage_name: str, stage_inputs: dict) -> str:
+        """Compute the key of a stage from its inputs."""
+        return self.hash_object({"stage": stage_name, "inputs": stage_inputs})
+
+    def get_entry_path(self, stage_name: str, key: str) -> str:
+        """Get the directory of a cache entry."""
+        return os.path.join(self.cache_path, stage_name, key)
+
+    def has(self, stage_name: str, key: str) -> bool:
+        """Check if the artifacts of a stage with the given key are cached."""
+        return os.path.exists(os.path.join(self.get_entry_path(stage_name, key), "manifest.json"))
+
+    def store(self, stage_name: str, key: str, root_path: str, artifact_paths: list[str], stage_inputs: dict | None = None):
+        r"""Store the artifacts of a stage.
+
+        Args:
+            stage_name (str): The name of the stage.
+            key (str): The key of the stage.
+            root_path (str): The output directory the artifact paths are relative to.
+            artifact_paths (list[str]): The relative paths of the artifacts (files or directories) produced by the stage.
+            stage_inputs (dict, optional): The stage inputs recorded in the manifest for inspection. Defaults to `None`.
+        """
+        entry_path = self.get_entry_path(stage_name, key)
+        if self.has(stage_name, key):
+            return
+        # NOTE: write into a temporary directory and rename it such that a cache entry is either complete or absent
+        tmp_path = os.path.join(self.cache_path, stage_name, f".tmp-{uuid.uuid4().hex}")
+        create_path(tmp_path)
+        for artifact_path in artifact_paths:
+            src_path = os.path.join(root_path, artifact_path)
+            dst_path = os.path.join(tmp_path, "artifacts", artifact_path)
+            create_path(os.path.dirname(dst_path))
+            if os.path.isdir(src_path):
+                shutil.copytree(src_path, dst_path)
+            else:
+                shutil.copy2(src_path, dst_path)
+        save_file(
+            {
+                "stage": stage_name,
+                "key": key,
+                "inputs": stage_inputs,
+                "artifacts": artifact_paths,
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+            os.path.join(tmp_path, "manifest.json"),
+        )
+        try:
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            # the same entry has been stored concurrently
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def restore(self, stage_name: str, key: str, root_path: str) -> list[str] | None:
+        r"""Restore the cached artifacts of a stage into an output directory (overwriting existing ones).
+
+        Args:
+            stage_name (str): The name of the stage.
+            key (str): The key of the stage.
+            root_path (str): The output directory the artifacts are restored into.
+
+        Returns:
+            (list[str], optional): The relative paths of the restored artifacts, or `None` if not cached.
+        """
+        if not self.has(stage_name, key):
+            return None
+        entry_path = self.get_entry_path(stage_name, key)
+        artifact_paths = load_file(os.path.join(entry_path, "manifest.json"))["artifacts"]
+        for artifact_path in artifact_paths:
+            src_path = os.path.join(entry_path, "artifacts", artifact_path)
+            dst_path = os.path.join(root_path, artifact_path)
+            remove_path(dst_path)
+            create_path(os.path.dirname(dst_path))
+            if os.path.isdir(src_path):
+                shutil.copytree(src_path, dst_path)
+            else:
+                shutil.copy2(src_path, dst_path)
+        return artifact_paths
+
+
+def fingerprint_checkpoint(checkpoint_path: str) -> str:
+    r"""Compute the `sha256` fingerprint of a (Hugging Face) model checkpoint from the content of its weights files
+    (e.g., `model.safetensors` or the shards of `pytorch_model.bin`) such that different models saved to the same
+    path have different fingerprints.
+    """
+    weights_files = sorted(
+        f
+        for f in os.listdir(checkpoint_path)
+        if f.startswith(("model", "pytorch_model")) and f.endswith((".safetensors", ".bin"))
+    )
+    if not weights_files:
+        raise FileNotFoundError(f"No model weights file is found in {checkpoint_path}.")
+    return StageCache.hash_object({f: StageCache.hash_file(os.path.join(checkpoint_path, f)) for f in weights_files})
+
+
+def remove_path(path: str):
+    """Remove a file or a directory if it exists."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
@@ -14,6 +14,9 @@
 from __future__ import annotations
 
 import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
 
 from transformers import set_seed as t_set_seed
 
@@ -40,3 +43,23 @@ def print_dict(dic: dict):
     pretty_print = json.dumps(dic, indent=4, separators=(",", ": "))
     # print(pretty_print)
     return pretty_print
+
+
+def prefetch_map(func: Callable, iterable: Iterable, num_workers: int = 1, max_prefetch: int = 2):
+    """Apply `func` to the items of `iterable` in background threads and yield the results in order.
+
+    At most `max_prefetch` results are computed ahead of the consumer (backpressure), so that preparing the
+    next items (e.g., building and tokenising input batches) overlaps with consuming the current one (e.g.,
+    model inference) with bounded memory. Set `num_workers` to `0` to apply `func` sequentially.
+    """
+    if num_workers <= 0:
+        yield from map(func, iterable)
+        return
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = deque()
+        for item in iterable:
+            futures.append(executor.submit(func, item))
+            if len(futures) > max_prefetch:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
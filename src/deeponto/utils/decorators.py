@@ -13,25 +13,167 @@
 # limitations under the License.
 from __future__ import annotations
 
+import json
+import os
+import threading
 import time
+from contextlib import contextmanager
 from functools import wraps
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+@contextmanager
+def timing():
+    """Measure the wall time and the CPU time (in seconds) of the `with` block into the yielded dictionary,
+    which has the `start_time`, `wall_time` and `cpu_time` keys once the block exits (even by an exception)."""
+    times = {"start_time": time.perf_counter()}
+    start_cpu = time.process_time()
+    try:
+        yield times
+    finally:
+        times["wall_time"] = time.perf_counter() - times["start_time"]
+        times["cpu_time"] = time.process_time() - start_cpu
+
 
 def timer(function):
     """Print the runtime of the decorated function."""
 
     @wraps(function)
     def wrapper_timer(*args, **kwargs):
-        start_time = time.perf_counter()  # 1
-        value = function(*args, **kwargs)
-        end_time = time.perf_counter()  # 2
-        run_time = end_time - start_time  # 3
-        print(f"Finished {function.__name__!r} in {run_time:.4f} secs.")
+        with timing() as times:
+            value = function(*args, **kwargs)
+        print(f"Finished {function.__name__!r} in {times['wall_time']:.4f} secs.")
         return value
 
     return wrapper_timer
 
 
+class StageProfiler:
+    r"""Class for recording the wall time, CPU time, peak memory and custom metrics of (nested) pipeline stages.
+
+    It extends [`timer`][deeponto.utils.decorators.timer] from functions to named stages with the same
+    [`timing`][deeponto.utils.decorators.timing] measurement (see also [`profile_stage`][deeponto.utils.decorators.profile_stage]).
+    Stages can be nested and profiled in multiple threads, where the nesting depth is tracked per thread. Each stage record has:
+
+    - `wall_time` and `cpu_time` (in seconds) of the process;
+    - `peak_rss_mb`, the peak resident set size (in MB) of the process so far;
+    - `jvm_heap_used_mb` and `jvm_heap_total_mb`, the JVM heap usage (in MB) at the end of the stage (if the JVM is started);
+    - custom metrics added to the yielded record, e.g., the number of scored pairs or cache hit rates.
+
+    The records are saved in a `.json` metrics file and optionally as a profile in the
+    [Chrome trace format](https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU)
+    which can be viewed in `chrome://tracing` or [Perfetto](https://ui.perfetto.dev).
+
+    Attributes:
+        metrics_file (str, optional): The `.json` file the stage records are saved to. Defaults to `None`.
+        trace_file (str, optional): The `.json` file the Chrome trace is saved to. Defaults to `None` (no tracing).
+        records (List[dict]): The records of finished stages.
+    """
+
+    def __init__(self, metrics_file: str | None = None, trace_file: str | None = None):
+        self.metrics_file = metrics_file
+        self.trace_file = trace_file
+        self.records = []
+        self.trace_events = []
+        self._start_time = time.perf_counter()
+        # the nesting depth of stages in each thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, throughput_of: str | None = None, **metrics):
+        r"""Profile a stage within the `with` block; metrics added to the yielded record are saved along.
+
+        Args:
+            name (str): The name of the stage.
+            throughput_of (str, optional): A (count) metric of the record whose rate per second of wall time
+                is added as `<throughput_of>_per_second`. Defaults to `None`.
+            **metrics: Initial custom metrics of the stage.
+        """
+        depth = getattr(self._local, "depth", 0)
+        record = {"name": name, "depth": depth, **metrics}
+        self._local.depth = depth + 1
+        try:
+            with timing() as times:
+                yield record
+        finally:
+            self._local.depth = depth
+            record["wall_time"] = round(times["wall_time"], 4)
+            record["cpu_time"] = round(times["cpu_time"], 4)
+            if throughput_of and record.get(throughput_of) is not None:
+                record[f"{throughput_of}_per_second"] = round(record[throughput_of] / max(times["wall_time"], 1e-9), 3)
+            record.update(self.get_memory_usage())
+            with self._lock:
+                self.records.append(record)
+                if self.trace_file:
+                    self.trace_events.append(
+                        {
+                            "name": name,
+                            "ph": "X",
+                            "ts": round((times["start_time"] - self._start_time) * 1e6),
+                            "dur": round(times["wall_time"] * 1e6),
+                            "pid": os.getpid(),
+                            "tid": threading.get_ident(),
+                            "args": {k: v for k, v in record.items() if k not in ["name", "depth"]},
+                        }
+                    )
+            # save after each top-level stage such that the metrics survive an interrupted run
+            if depth == 0:
+                self.save()
+
+    @staticmethod
+    def get_memory_usage():
+        """Get the peak resident set size of the process and the JVM heap usage (in MB) if available."""
+        usage = dict()
+        if resource is not None:
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # NOTE: `ru_maxrss` is in bytes on macOS and in kilobytes on Linux
+            usage["peak_rss_mb"] = round(peak_rss / (1 << 20 if os.uname().sysname == "Darwin" else 1 << 10), 2)
+        try:
+            import jpype
+
+            if jpype.isJVMStarted():
+                runtime = jpype.JClass("java.lang.Runtime").getRuntime()
+                usage["jvm_heap_used_mb"] = round((runtime.totalMemory() - runtime.freeMemory()) / (1 << 20), 2)
+                usage["jvm_heap_total_mb"] = round(runtime.totalMemory() / (1 << 20), 2)
+        except ImportError:
+            pass
+        return usage
+
+    def save(self):
+        """Save the stage records (and the Chrome trace if enabled)."""
+        with self._lock:
+            if self.metrics_file:
+                with open(self.metrics_file, "w") as f:
+                    json.dump({"stages": self.records}, f, indent=4)
+            if self.trace_file:
+                with open(self.trace_file, "w") as f:
+                    json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
+
+
+def profile_stage(stage_name: str | None = None):
+    """Profile the decorated method as a stage with the `profiler` ([`StageProfiler`][deeponto.utils.decorators.StageProfiler])
+    attribute of its instance; the method runs as is if the instance has no profiler.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper_profile_stage(self, *args, **kwargs):
+            profiler = getattr(self, "profiler", None)
+            if profiler is None:
+                return function(self, *args, **kwargs)
+            with profiler.stage(stage_name or function.__name__):
+                return function(self, *args, **kwargs)
+
+        return wrapper_profile_stage
+
+    return decorator
+
+
 def debug(function):
     """Print the function signature and return value."""
 
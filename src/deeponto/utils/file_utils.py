@@ -14,6 +14,7 @@
 from __future__ import annotations
 
 import json
+import os
 import shutil
 import subprocess
 import warnings
@@ -22,6 +23,9 @@ from pathlib import Path
 
 import dill as pickle
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import yaml
 
 
@@ -70,13 +74,66 @@ def copy2(source: str, destination: str):
 
 
 def read_table(table_file_path: str):
-    r"""Read `csv` or `tsv` file as pandas dataframe without treating `"NULL"`, `"null"`, and `"n/a"` as an empty string."""
+    r"""Read `csv`, `tsv` or `parquet` file as pandas dataframe without treating `"NULL"`, `"null"`, and `"n/a"` as an empty string."""
+    if table_file_path.endswith(".parquet"):
+        return pd.read_parquet(table_file_path)
     # TODO: this might change with the version of pandas
     na_vals = pd.io.parsers.readers.STR_NA_VALUES.difference({"NULL", "null", "n/a"})
     sep = "\t" if table_file_path.endswith(".tsv") else ","
     return pd.read_csv(table_file_path, sep=sep, na_values=na_vals, keep_default_na=False)
 
 
+def read_arrow_table(table_file_path: str, columns: list[str] | None = None, column_types: dict | None = None) -> pa.Table:
+    r"""Read `csv`, `tsv` or `parquet` file as a pyarrow table using the (multi-threaded) pyarrow readers.
+
+    The `csv` and `tsv` files are parsed with the same null values as [`read_table`][deeponto.utils.file_utils.read_table].
+
+    Args:
+        table_file_path (str): The path to the table file.
+        columns (list[str], optional): The columns to read (in this order). Defaults to `None` which means all the columns.
+        column_types (dict, optional): The pyarrow types of (some of) the columns, e.g., `{"Score": pa.float64()}`. Defaults to `None`.
+    """
+    if table_file_path.endswith(".parquet"):
+        table = pq.read_table(table_file_path, columns=columns)
+        for name, column_type in (column_types or dict()).items():
+            # NOTE: dictionary-encoded columns of the same value type are kept encoded
+            field_type = table.schema.field(name).type if name in table.column_names else column_type
+            if pa.types.is_dictionary(field_type):
+                field_type = field_type.value_type
+            if field_type != column_type:
+                table = table.set_column(table.schema.get_field_index(name), name, table[name].cast(column_type))
+        return table
+    na_vals = pd.io.parsers.readers.STR_NA_VALUES.difference({"NULL", "null", "n/a"})
+    return pa_csv.read_csv(
+        table_file_path,
+        parse_options=pa_csv.ParseOptions(delimiter="\t" if table_file_path.endswith(".tsv") else ","),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=columns,
+            null_values=sorted(na_vals),
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def save_arrow_file(batches, schema: pa.Schema, save_path: str):
+    r"""Stream record batches (or tables) into an Arrow (IPC stream) file that can be memory-mapped, e.g., by
+    `datasets.Dataset.from_file`, such that no more than a batch is held in memory while writing.
+
+    The file is written to a temporary path first and then renamed, so a partially written file never appears at `save_path`.
+    """
+    tmp_path = save_path + ".tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write(batch)
+    os.replace(tmp_path, save_path)
+
+
+def load_arrow_file(file_path: str) -> pa.Table:
+    """Load an Arrow (IPC stream) file as a memory-mapped (zero-copy) table."""
+    return pa.ipc.open_stream(pa.memory_map(file_path)).read_all()
+
+
 def read_jsonl(file_path: str):
     """Read `.jsonl` file (list of json) introduced in the BLINK project."""
     results = []
@@ -0,0 +1,249 @@
+# Copyright 2021 Yuan He. All rights reserved.
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import time
+
+import numpy as np
+import torch
+
+from .cache_utils import remove_path
+from .file_utils import create_path, load_file, save_file
+
+INFERENCE_BACKENDS = ["eager", "torchscript", "onnx"]
+MODEL_INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+class SequenceClassifierBackend:
+    r"""Class for running a fine-tuned sequence classifier (e.g., the BERT synonym classifier) with
+    an inference backend optimised for CPUs.
+
+    Supported backends are:
+
+    - `"eager"`: the plain PyTorch model (optionally with dynamic `int8` quantisation of linear layers);
+    - `"torchscript"`: the model traced by TorchScript on the first input batch;
+    - `"onnx"`: the model exported to ONNX and run by ONNX Runtime (optionally with dynamic `int8` quantisation).
+
+    !!! note
+
+        The `"onnx"` backend requires the optional dependencies `onnx` and `onnxruntime`.
+
+    Attributes:
+        model (torch.nn.Module): The eager model (kept as the reference for parity checking).
+        backend (str): The inference backend. Options are `["eager", "torchscript", "onnx"]`.
+        quantize (bool): Whether to apply dynamic `int8` quantisation.
+        export_path (str, optional): The directory for saving the exported ONNX model. Required for the `"onnx"` backend.
+    """
+
+    def __init__(
+        self, model: torch.nn.Module, backend: str = "eager", quantize: bool = False, export_path: str | None = None
+    ):
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend {backend}; options are {INFERENCE_BACKENDS}.")
+        if backend == "onnx" and not export_path:
+            raise ValueError("An export path is required for the ONNX inference backend.")
+        self.model = model
+        self.backend = backend
+        self.quantize = quantize
+        self.export_path = export_path
+        self._runner = None
+        # dynamically quantised modules run on CPUs only
+        self._device = torch.device("cpu") if self.quantize else next(self.model.parameters()).device
+
+        if self.backend in ["eager", "torchscript"]:
+            self._runner = self.model
+            if self.quantize:
+                # NOTE: quantise a copy such that the original model is preserved for parity checking
+                self._runner = torch.quantization.quantize_dynamic(
+                    copy.deepcopy(self.model).cpu(), {torch.nn.Linear}, dtype=torch.qint8
+                )
+            self._runner.eval()
+
+    def __call__(self, inputs: dict) -> torch.Tensor:
+        """Compute the classification logits of tokenised inputs."""
+        device = inputs["input_ids"].device
+        input_names = [name for name in MODEL_INPUT_NAMES if name in inputs]
+        if self.backend == "eager":
+            with torch.no_grad():
+                return self._runner(**self._to(inputs, self._device)).logits.to(device)
+        if self.backend == "torchscript":
+            if not isinstance(self._runner, torch.jit.ScriptModule):
+                self._runner = self.trace(self._runner, self._to(inputs, self._device), input_names)
+            with torch.no_grad():
+                outputs = self._runner(*[inputs[name].to(self._device) for name in input_names])
+            return self._get_logits(outputs).to(device)
+        if self._runner is None:
+            self._runner = self.export_onnx(self.model, inputs, input_names, self.export_path, self.quantize)
+        onnx_inputs = {name: inputs[name].cpu().numpy() for name in input_names}
+        logits = self._runner.run(["logits"], onnx_inputs)[0]
+        return torch.from_numpy(logits).to(device)
+
+    @staticmethod
+    def _to(inputs: dict, device: torch.device):
+        return {k: v.to(device) for k, v in inputs.items()}
+
+    @staticmethod
+    def _get_logits(outputs):
+        if isinstance(outputs, dict):
+            return outputs["logits"]
+        if isinstance(outputs, (tuple, list)):
+            return outputs[0]
+        return outputs
+
+    @staticmethod
+    def trace(model: torch.nn.Module, inputs: dict, input_names: list[str]):
+        """Trace the model into TorchScript with example inputs."""
+        with torch.no_grad():
+            return torch.jit.trace(
+                _PositionalLogitsModule(model, input_names), tuple(inputs[name] for name in input_names), strict=False
+            )
+
+    @staticmethod
+    def fingerprint_model(model: torch.nn.Module) -> str:
+        """Compute the `sha256` fingerprint of a model from its parameters and buffers."""
+        sha256 = hashlib.sha256()
+        for name, tensor in sorted(model.state_dict().items()):
+            sha256.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode())
+            sha256.update(tensor.detach().cpu().contiguous().view(-1).view(torch.uint8).numpy().tobytes())
+        return sha256.hexdigest()
+
+    @staticmethod
+    def export_onnx(model: torch.nn.Module, inputs: dict, input_names: list[str], export_path: str, quantize: bool):
+        """Export the model to ONNX (with optional dynamic `int8` quantisation) and load it with ONNX Runtime.
+
+        The exported files are reused only if they were exported from a model with the same weights (and inputs);
+        otherwise, e.g., after fine-tuning again into the same directory, the model is exported again.
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The ONNX inference backend requires `onnx` and `onnxruntime` to be installed.")
+
+        create_path(export_path)
+        onnx_file = os.path.join(export_path, "model.onnx")
+        quantized_onnx_file = os.path.join(export_path, "model.int8.onnx")
+        fingerprint_file = os.path.join(export_path, "fingerprint.json")
+        fingerprint = {"model": SequenceClassifierBackend.fingerprint_model(model), "input_names": input_names}
+        if not os.path.exists(fingerprint_file) or load_file(fingerprint_file) != fingerprint:
+            # NOTE: remove the stale exports (and their fingerprint) before exporting in case the export is interrupted
+            for stale_file in [fingerprint_file, onnx_file, quantized_onnx_file]:
+                remove_path(stale_file)
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["logits"] = {0: "batch"}
+            example_inputs = tuple(inputs[name].cpu() for name in input_names)
+            with torch.no_grad():
+                torch.onnx.export(
+                    copy.deepcopy(model).cpu().eval(),
+                    example_inputs,
+                    onnx_file,
+                    input_names=input_names,
+                    output_names=["logits"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14,
+                )
+            save_file(fingerprint, fingerprint_file)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            if not os.path.exists(quantized_onnx_file):
+                quantize_dynamic(onnx_file, quantized_onnx_file, weight_type=QuantType.QInt8)
+            onnx_file = quantized_onnx_file
+        return onnxruntime.InferenceSession(onnx_file, providers=["CPUExecutionProvider"])
+
+    def check_parity(self, batches: list[dict]):
+        r"""Compare the synonym (`index=1`) probabilities of the backend against the eager model.
+
+        Args:
+            batches (list[dict]): A list of tokenised input batches (e.g., from a validation set).
+
+        Returns:
+            (dict): The maximum and mean absolute differences of the probabilities, and the ratio
+                of predictions with the same label.
+        """
+        diffs, agreements = [], []
+        for inputs in batches:
+            with torch.no_grad():
+                eager_probs = torch.softmax(self.model(**inputs).logits, dim=1)
+            backend_probs = torch.softmax(self(inputs), dim=1)
+            diffs.append((eager_probs[:, 1] - backend_probs[:, 1]).abs().cpu().numpy())
+            agreements.append((eager_probs.argmax(-1) == backend_probs.argmax(-1)).cpu().numpy())
+        diffs = np.concatenate(diffs) if diffs else np.zeros(1)
+        agreements = np.concatenate(agreements) if agreements else np.ones(1)
+        return {
+            "max_abs_diff": float(diffs.max()),
+            "mean_abs_diff": float(diffs.mean()),
+            "label_agreement": float(agreements.mean()),
+        }
+
+    def benchmark(self, batches: list[dict], num_runs: int = 1):
+        r"""Measure the throughput (number of inputs per second) of the backend and the eager model.
+
+        Args:
+            batches (list[dict]): A list of tokenised input batches.
+            num_runs (int, optional): The number of passes over the batches. Defaults to `1`.
+
+        Returns:
+            (dict): The throughputs of the eager model and the backend, and the speed-up ratio.
+        """
+        num_inputs = num_runs * sum(len(inputs["input_ids"]) for inputs in batches)
+        # warm up (and trace or export the model if not done yet)
+        if batches:
+            self(batches[0])
+
+        def run(forward):
+            start_time = time.perf_counter()
+            for _ in range(num_runs):
+                for inputs in batches:
+                    with torch.no_grad():
+                        forward(inputs)
+            return num_inputs / max(time.perf_counter() - start_time, 1e-9)
+
+        eager_throughput = run(lambda inputs: self.model(**inputs).logits)
+        backend_throughput = run(self)
+        return {
+            "eager_inputs_per_second": round(eager_throughput, 3),
+            f"{self.backend}{'_int8' if self.quantize else ''}_inputs_per_second": round(backend_throughput, 3),
+            "speed_up": round(backend_throughput / eager_throughput, 3),
+        }
+
+    def validate(self, batches: list[dict], num_runs: int = 1):
+        r"""Check the score parity against the eager model and benchmark the throughput on (validation) input batches
+        before the backend is used for scoring.
+
+        Returns:
+            (dict): The backend settings with the results of [`check_parity`][deeponto.utils.inference_utils.SequenceClassifierBackend.check_parity]
+                and [`benchmark`][deeponto.utils.inference_utils.SequenceClassifierBackend.benchmark].
+        """
+        return {
+            "backend": self.backend,
+            "quantize": self.quantize,
+            "num_validation_inputs": sum(len(inputs["input_ids"]) for inputs in batches),
+            "parity": self.check_parity(batches),
+            "benchmark": self.benchmark(batches, num_runs),
+        }
+
+
+class _PositionalLogitsModule(torch.nn.Module):
+    """Wrap a Hugging Face model to take positional inputs and return logits only, as required for tracing."""
+
+    def __init__(self, model: torch.nn.Module, input_names: list[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs))).logits
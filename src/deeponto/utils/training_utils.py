@@ -0,0 +1,433 @@
+# Copyright 2021 Yuan He. All rights reserved.
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from typing import Iterator, Sequence
+
+import numpy as np
+from datasets import Dataset
+from torch.utils.data import DataLoader, Sampler
+from transformers import Trainer
+
+from .cache_utils import DEFAULT_CACHE_PATH, StageCache
+from .file_utils import create_path
+
+
+def fingerprint_tokenizer(tokenizer) -> str:
+    """Compute a fingerprint of a (Huggingface) tokenizer from its full serialisation (vocabulary, added tokens, normalisation, etc.)."""
+    if getattr(tokenizer, "is_fast", False):
+        serialised = tokenizer.backend_tokenizer.to_str()
+    else:
+        serialised = json.dumps(
+            [type(tokenizer).__name__, sorted(tokenizer.get_vocab().items()), tokenizer.init_kwargs], default=str
+        )
+    return hashlib.sha256(serialised.encode()).hexdigest()
+
+
+def fingerprint_data(data: list | Dataset) -> str:
+    """Compute a fingerprint of data samples, i.e., the content hash of a list of samples, or of the files
+    (and the selection) of a `datasets.Dataset`.
+    """
+    sha256 = hashlib.sha256()
+    if isinstance(data, Dataset):
+        # NOTE: the fingerprint of a dataset loaded from a file does not change with the file content
+        for cache_file in data.cache_files:
+            sha256.update(StageCache.hash_file(cache_file["filename"]).encode())
+        sha256.update(data._fingerprint.encode())
+    else:
+        for sample in data:
+            sha256.update("\x1f".join(map(str, sample)).encode() + b"\x1e")
+    return sha256.hexdigest()
+
+
+def get_longest_first_lengths(length1: int, length2: int, max_length: int):
+    """Get the lengths of two sequences truncated by the `longest_first` strategy of Huggingface tokenizers
+    such that their sum does not exceed `max_length`: only the longer one is truncated if possible; otherwise both are
+    truncated to about a half.
+
+    It is shared by the tokenisation of the training data and the assembly of the inputs for prediction
+    (see [`LabelTokenStore`][deeponto.align.bertmap.bert_classifier.LabelTokenStore]) such that they truncate alike.
+    """
+    swap = length1 > length2
+    if swap:
+        length1, length2 = length2, length1
+    if length1 > max_length:
+        length2 = length1
+    else:
+        length2 = min(length2, max(length1, max_length - length1))
+    if length1 + length2 > max_length:
+        length1 = max_length // 2
+        length2 = length1 + max_length % 2
+    return (length2, length1) if swap else (length1, length2)
+
+
+class _PairTokenizer:
+    """Batched tokenisation of text pairs that records the (untruncated) number of tokens in the same pass.
+
+    With a fast tokenizer, the pairs are tokenised once without truncation and then the (few) pairs longer than
+    `max_length` are truncated on the token level as the `longest_first` strategy does; otherwise, the pairs are
+    tokenised twice.
+    """
+
+    def __init__(self, tokenizer, max_length: int, text_columns: Sequence[str]):
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.text_columns = list(text_columns)
+        self.single_pass = getattr(tokenizer, "is_fast", False) and tokenizer.truncation_side == "right"
+        self.num_special_tokens = tokenizer.num_special_tokens_to_add(pair=True)
+
+    def __call__(self, examples: dict) -> dict:
+        texts1, texts2 = examples[self.text_columns[0]], examples[self.text_columns[1]]
+        if not self.single_pass:
+            num_tokens = [len(ids) for ids in self.tokenizer(texts1, texts2)["input_ids"]]
+            outputs = dict(self.tokenizer(texts1, texts2, max_length=self.max_length, truncation=True))
+        else:
+            encodings = self.tokenizer(texts1, texts2)
+            outputs = dict(encodings)
+            num_tokens = [len(ids) for ids in outputs["input_ids"]]
+            for i, length in enumerate(num_tokens):
+                if length > self.max_length:
+                    keep = self.get_truncation_mask(encodings.sequence_ids(i))
+                    for key in outputs:
+                        outputs[key][i] = [value for value, kept in zip(outputs[key][i], keep) if kept]
+        outputs["num_tokens"] = num_tokens
+        outputs["length"] = [len(ids) for ids in outputs["input_ids"]]
+        return outputs
+
+    def get_truncation_mask(self, sequence_ids: list) -> list:
+        """Get the mask of tokens kept after truncation given the sequence ids of the tokens (`None` for special tokens)."""
+        lengths = [sequence_ids.count(0), sequence_ids.count(1)]
+        truncated_lengths = get_longest_first_lengths(*lengths, self.max_length - self.num_special_tokens)
+        counts, keep = [0, 0], []
+        for sequence_id in sequence_ids:
+            if sequence_id is None:
+                keep.append(True)
+            else:
+                keep.append(counts[sequence_id] < truncated_lengths[sequence_id])
+                counts[sequence_id] += 1
+        return keep
+
+
+def tokenize_pair_dataset(
+    data: list | Dataset,
+    tokenizer,
+    max_length: int,
+    text_columns: Sequence[str] = ("annotation1", "annotation2"),
+    label_column: str = "labels",
+    cache_path: str | None = None,
+    num_proc: int = 1,
+    desc: str | None = None,
+) -> Dataset:
+    r"""Tokenise (labelled) text pairs into a `datasets.Dataset` cached on disk.
+
+    The tokenised dataset is fingerprinted by the data (see [`fingerprint_data`][deeponto.utils.training_utils.fingerprint_data]),
+    the tokenizer (see [`fingerprint_tokenizer`][deeponto.utils.training_utils.fingerprint_tokenizer]) and `max_length`, so it is
+    loaded from the cache instead of tokenised again whenever they are unchanged. Besides the tokenizer outputs, the dataset has
+    a `length` column (the truncated input length, e.g., for length-grouped sampling) and a `num_tokens` column (the input length
+    before truncation, see [`get_token_length_stats`][deeponto.utils.training_utils.get_token_length_stats]).
+
+    Args:
+        data (Union[list, Dataset]): A list of `(text1, text2, label)` samples or a `datasets.Dataset` with `text_columns`.
+        tokenizer (PreTrainedTokenizer): The Huggingface tokenizer.
+        max_length (int): The maximum length of a tokenised (truncated) pair.
+        text_columns (Sequence[str], optional): The names of the two text columns. Defaults to `("annotation1", "annotation2")`.
+        label_column (str, optional): The name of the label column for a list of samples. Defaults to `"labels"`.
+        cache_path (str, optional): The directory of the tokenised datasets. Defaults to `None` which means the directory of
+            the dataset's files if any, or `~/.cache/deeponto/tokenised-data`.
+        num_proc (int, optional): The number of processes for tokenisation. Defaults to `1`.
+        desc (str, optional): The description shown in the progress bar. Defaults to `None`.
+
+    Returns:
+        (Dataset): The tokenised dataset.
+    """
+    if isinstance(data, Dataset):
+        dataset = data
+        if cache_path is None and data.cache_files:
+            cache_path = os.path.dirname(data.cache_files[0]["filename"])
+    else:
+        columns = list(text_columns) + [label_column]
+        dataset = Dataset.from_dict({column: [sample[i] for sample in data] for i, column in enumerate(columns)})
+    cache_path = cache_path or os.path.join(DEFAULT_CACHE_PATH, "tokenised-data")
+    create_path(cache_path)
+
+    fingerprint = StageCache.hash_object(
+        {
+            "data": fingerprint_data(data),
+            "tokenizer": fingerprint_tokenizer(tokenizer),
+            "max_length": max_length,
+            "text_columns": list(text_columns),
+        }
+    )[:32]
+    # NOTE: no padding here because the Trainer class supports dynamic padding
+    return dataset.map(
+        _PairTokenizer(tokenizer, max_length, text_columns),
+        batched=True,
+        num_proc=num_proc if num_proc > 1 else None,
+        cache_file_name=os.path.join(cache_path, f"tokenised-{fingerprint}.arrow"),
+        new_fingerprint=fingerprint,
+        load_from_cache_file=True,
+        desc=desc,
+    )
+
+
+def get_token_length_stats(dataset: Dataset, max_length: int | None = None, thresholds: Sequence[int] = (128, 256, 512)) -> dict:
+    r"""Get the statistics of the input lengths (before truncation) of a dataset tokenised by
+    [`tokenize_pair_dataset`][deeponto.utils.training_utils.tokenize_pair_dataset] without tokenising it again.
+
+    Returns:
+        (dict): The average and the maximum number of tokens, the ratios of inputs with no more tokens than each threshold,
+            and the ratio of truncated inputs if `max_length` is given.
+    """
+    num_tokens = np.asarray(dataset.with_format("numpy")["num_tokens"])
+    if len(num_tokens) == 0:
+        return {"num_inputs": 0}
+    stats = {
+        "num_inputs": len(num_tokens),
+        "average_num_tokens": round(float(num_tokens.mean()), 2),
+        "max_num_tokens": int(num_tokens.max()),
+    }
+    for threshold in thresholds:
+        stats[f"ratio_num_tokens_<={threshold}"] = round(float((num_tokens <= threshold).mean()), 3)
+    if max_length is not None:
+        stats["ratio_truncated"] = round(float((num_tokens > max_length).mean()), 3)
+    return stats
+
+
+def get_dataset_lengths(dataset: Dataset, length_column: str = "length") -> np.ndarray:
+    """Get the (truncated) input lengths of a tokenised dataset from its `length` column if any, or from its `input_ids`."""
+    if length_column in dataset.column_names:
+        return np.asarray(dataset.with_format("numpy")[length_column], dtype=np.int64)
+    return np.array([len(input_ids) for input_ids in dataset["input_ids"]], dtype=np.int64)
+
+
+def split_by_token_budget(
+    sorted_idxs: np.ndarray, lengths: np.ndarray, max_tokens: int, batch_size: int | None = None
+) -> list[np.ndarray]:
+    r"""Split input indices sorted in descending order of lengths into consecutive batches that have at most `max_tokens`
+    tokens after padding, i.e., $\max(lengths) \times |batch| \leq max\_tokens$, and at most `batch_size` inputs
+    (an input longer than `max_tokens` forms a batch on its own).
+    """
+    batches, start = [], 0
+    while start < len(sorted_idxs):
+        # the first input of a batch is the longest one so it determines the padded length
+        size = max(1, max_tokens // max(1, int(lengths[sorted_idxs[start]])))
+        if batch_size:
+            size = min(size, batch_size)
+        batches.append(sorted_idxs[start : start + size])
+        start += size
+    return batches
+
+
+class LengthGroupedBatchSampler(Sampler):
+    r"""Batch sampler that groups inputs of similar lengths to reduce padding, with either a fixed batch size or a
+    token budget per batch.
+
+    In each epoch, the inputs are randomly permuted and split into **mega-batches** of `mega_batch_size` inputs; each
+    mega-batch is sorted by lengths (in descending order) and cut into batches that either have `batch_size` inputs or
+    have at most `max_tokens` tokens after padding, i.e., $\max(lengths) \times |batch| \leq max\_tokens$ (an input longer
+    than `max_tokens` forms a batch on its own). The order of the batches is then shuffled except that the batch of the
+    longest inputs comes first such that an out-of-memory error (if any) shows up at the first step.
+
+    !!! note
+
+        With a token budget, the number of batches can differ slightly between epochs; `len()` gives the number of
+        batches of the current epoch (see `set_epoch()`).
+
+    Attributes:
+        lengths (np.ndarray): The input lengths.
+        batch_size (int, optional): The (maximum) number of inputs in a batch.
+        max_tokens (int, optional): The maximum number of padded tokens in a batch.
+        mega_batch_size (int): The number of inputs in a mega-batch.
+        shuffle (bool): Whether to randomly permute the inputs (and the batches) in each epoch.
+        seed (int): The random seed, combined with the epoch number.
+        drop_last (bool): Whether to drop the last incomplete batch of each mega-batch (for a fixed batch size only).
+        epoch (int): The current epoch.
+    """
+
+    def __init__(
+        self,
+        lengths: Sequence[int],
+        batch_size: int | None = None,
+        max_tokens: int | None = None,
+        mega_batch_size: int | None = None,
+        shuffle: bool = True,
+        seed: int = 42,
+        drop_last: bool = False,
+    ):
+        if not batch_size and not max_tokens:
+            raise ValueError("Either `batch_size` or `max_tokens` should be specified.")
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        if not mega_batch_size:
+            # roughly 50 batches per mega-batch as the length-grouped sampler of Huggingface
+            typical_batch_size = batch_size
+            if max_tokens:
+                median_length = int(np.median(self.lengths)) if len(self.lengths) else 1
+                typical_batch_size = max(1, max_tokens // max(1, median_length))
+                typical_batch_size = min(typical_batch_size, batch_size or typical_batch_size)
+            mega_batch_size = 50 * typical_batch_size
+        self.mega_batch_size = mega_batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+        self._batches = (None, None)  # (epoch, batches)
+
+    def set_epoch(self, epoch: int):
+        """Set the epoch such that the batches are reproducible for a given seed and epoch."""
+        self.epoch = epoch
+
+    def get_batches(self, epoch: int) -> list[np.ndarray]:
+        """Get the batches of input indices of an epoch."""
+        if self._batches[0] == epoch:
+            return self._batches[1]
+        rng = np.random.default_rng([self.seed, epoch])
+        idxs = rng.permutation(len(self.lengths)) if self.shuffle else np.arange(len(self.lengths))
+        batches = []
+        for start in range(0, len(idxs), self.mega_batch_size):
+            mega_batch = idxs[start : start + self.mega_batch_size]
+            mega_batch = mega_batch[np.argsort(-self.lengths[mega_batch], kind="stable")]
+            batches += self.split_sorted(mega_batch)
+        if self.shuffle and len(batches) > 1:
+            longest = max(range(len(batches)), key=lambda i: self.lengths[batches[i][0]] * len(batches[i]))
+            rest = [batches[i] for i in rng.permutation(len(batches)) if i != longest]
+            batches = [batches[longest]] + rest
+        self._batches = (epoch, batches)
+        return batches
+
+    def split_sorted(self, idxs: np.ndarray) -> list[np.ndarray]:
+        """Split input indices sorted in descending order of lengths into batches."""
+        if not self.max_tokens:
+            batches = [idxs[i : i + self.batch_size] for i in range(0, len(idxs), self.batch_size)]
+            if self.drop_last and batches and len(batches[-1]) < self.batch_size:
+                batches.pop()
+            return batches
+        return split_by_token_budget(idxs, self.lengths, self.max_tokens, self.batch_size)
+
+    def __iter__(self) -> Iterator[list[int]]:
+        batches = self.get_batches(self.epoch)
+        # the next epoch if `set_epoch()` is not called
+        self.epoch += 1
+        for batch in batches:
+            yield batch.tolist()
+
+    def __len__(self) -> int:
+        return len(self.get_batches(self.epoch))
+
+
+class LengthGroupedTrainer(Trainer):
+    r"""Huggingface `Trainer` with length-grouped training batches (optionally under a token budget) and a report of
+    the training throughput.
+
+    The training throughput is measured over the training steps (forward and backward passes), i.e., excluding data
+    loading, evaluation and checkpointing. The padding ratio is the fraction of padding tokens in the training batches.
+
+    Attributes:
+        group_by_length (bool): Whether to group training inputs of similar lengths into batches
+            (see [`LengthGroupedBatchSampler`][deeponto.utils.training_utils.LengthGroupedBatchSampler]).
+        max_tokens_per_batch (int, optional): The maximum number of padded tokens in a training batch; if set, the batch size
+            of the training arguments is only an upper bound. Batches are always length-grouped with a token budget.
+        length_column (str): The column of the input lengths in the training dataset. Defaults to `"length"`.
+        throughput_stats (dict): The accumulated numbers of samples, tokens, padded tokens and the time of the training steps.
+    """
+
+    def __init__(
+        self,
+        *args,
+        group_by_length: bool = False,
+        max_tokens_per_batch: int | None = None,
+        length_column: str = "length",
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.group_by_length = group_by_length
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.length_column = length_column
+        self.throughput_stats = {"num_samples": 0, "num_tokens": 0, "num_padded_tokens": 0, "time": 0.0}
+
+    def get_train_dataloader(self) -> DataLoader:
+        if not (self.group_by_length or self.max_tokens_per_batch) or not isinstance(self.train_dataset, Dataset):
+            return super().get_train_dataloader()
+        batch_sampler = get_training_batch_sampler(
+            self.train_dataset,
+            self._train_batch_size,
+            self.max_tokens_per_batch,
+            seed=self.args.seed,
+            drop_last=self.args.dataloader_drop_last,
+            length_column=self.length_column,
+        )
+        dataloader = DataLoader(
+            self._remove_unused_columns(self.train_dataset, description="training"),
+            batch_sampler=batch_sampler,
+            collate_fn=self.data_collator,
+            num_workers=self.args.dataloader_num_workers,
+            pin_memory=self.args.dataloader_pin_memory,
+        )
+        return self.accelerator.prepare(dataloader)
+
+    def training_step(self, model, inputs, *args, **kwargs):
+        start_time = time.perf_counter()
+        loss = super().training_step(model, inputs, *args, **kwargs)
+        self.throughput_stats["time"] += time.perf_counter() - start_time
+        input_ids = inputs["input_ids"]
+        attention_mask = inputs.get("attention_mask")
+        self.throughput_stats["num_samples"] += input_ids.size(0)
+        self.throughput_stats["num_padded_tokens"] += input_ids.numel()
+        self.throughput_stats["num_tokens"] += int(attention_mask.sum()) if attention_mask is not None else input_ids.numel()
+        return loss
+
+    def get_throughput_report(self) -> dict:
+        """Get the training throughput (samples and tokens per second) and the padding ratio."""
+        stats = self.throughput_stats
+        step_time = max(stats["time"], 1e-9)
+        return {
+            "num_samples": stats["num_samples"],
+            "num_tokens": stats["num_tokens"],
+            "num_padded_tokens": stats["num_padded_tokens"],
+            "training_step_time": round(stats["time"], 3),
+            "samples_per_second": round(stats["num_samples"] / step_time, 2),
+            "tokens_per_second": round(stats["num_tokens"] / step_time, 2),
+            "padded_tokens_per_second": round(stats["num_padded_tokens"] / step_time, 2),
+            "padding_ratio": round(1 - stats["num_tokens"] / max(stats["num_padded_tokens"], 1), 4),
+        }
+
+
+def get_training_batch_sampler(
+    dataset: Dataset,
+    batch_size: int,
+    max_tokens: int | None = None,
+    seed: int = 42,
+    drop_last: bool = False,
+    length_column: str = "length",
+) -> LengthGroupedBatchSampler:
+    """Get the length-grouped batch sampler of a tokenised training dataset where `batch_size` is an upper bound if `max_tokens` is set."""
+    return LengthGroupedBatchSampler(
+        get_dataset_lengths(dataset, length_column),
+        batch_size=batch_size,
+        max_tokens=max_tokens,
+        seed=seed,
+        drop_last=drop_last and not max_tokens,
+    )
+
+
+def get_num_training_batches(dataset: Dataset, batch_size: int, max_tokens: int | None = None) -> int:
+    """Get the (estimated) number of training batches per epoch with a fixed batch size or a token budget."""
+    if not max_tokens:
+        return len(dataset) // batch_size
+    return len(get_training_batch_sampler(dataset, batch_size, max_tokens))
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import jpype
+
+from deeponto import init_jvm
+
+# start the JVM before any test module imports `deeponto.onto`, which would otherwise prompt for the JVM memory
+if not jpype.isJVMStarted():
+    init_jvm("2g")
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import os
+
+from deeponto.utils.cache_utils import StageCache
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_stage_key_depends_on_the_stage_and_its_inputs(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    key = cache.stage_key("corpora", {"onto": "abc", "config": {"x": 1}})
+    assert key == cache.stage_key("corpora", {"config": {"x": 1}, "onto": "abc"})
+    assert key != cache.stage_key("corpora", {"onto": "abc", "config": {"x": 2}})
+    assert key != cache.stage_key("fine_tuning", {"onto": "abc", "config": {"x": 1}})
+
+
+def test_hash_file_follows_the_content(tmp_path):
+    file_path = str(tmp_path / "onto.owl")
+    write(file_path, "one")
+    first_hash = StageCache.hash_file(file_path)
+    assert StageCache.hash_file(file_path) == first_hash
+    write(file_path, "two")
+    os.utime(file_path, ns=(0, 0))
+    assert StageCache.hash_file(file_path) != first_hash
+
+
+def test_store_and_restore(tmp_path):
+    cache = StageCache(str(tmp_path / "cache"))
+    output_path = str(tmp_path / "output")
+    write(os.path.join(output_path, "data", "corpora.json"), "corpora")
+    write(os.path.join(output_path, "bert", "checkpoint-10", "model.safetensors"), "weights")
+    artifact_paths = [os.path.join("data", "corpora.json"), os.path.join("bert", "checkpoint-10")]
+
+    key = cache.stage_key("fine_tuning", {"x": 1})
+    assert not cache.has("fine_tuning", key)
+    assert cache.restore("fine_tuning", key, output_path) is None
+    cache.store("fine_tuning", key, output_path, artifact_paths, {"x": 1})
+    assert cache.has("fine_tuning", key)
+    assert not cache.has("fine_tuning", cache.stage_key("fine_tuning", {"x": 2}))
+
+    # restore into a fresh output directory
+    new_output_path = str(tmp_path / "new-output")
+    assert cache.restore("fine_tuning", key, new_output_path) == artifact_paths
+    assert read(os.path.join(new_output_path, "data", "corpora.json")) == "corpora"
+    assert read(os.path.join(new_output_path, "bert", "checkpoint-10", "model.safetensors")) == "weights"
+
+    # restored artifacts overwrite the existing (e.g., partial) ones
+    write(os.path.join(output_path, "data", "corpora.json"), "partial")
+    write(os.path.join(output_path, "bert", "checkpoint-10", "optimizer.pt"), "partial")
+    cache.restore("fine_tuning", key, output_path)
+    assert read(os.path.join(output_path, "data", "corpora.json")) == "corpora"
+    assert os.listdir(os.path.join(output_path, "bert", "checkpoint-10")) == ["model.safetensors"]
+
+    # an entry is stored once
+    write(os.path.join(output_path, "data", "corpora.json"), "changed")
+    cache.store("fine_tuning", key, output_path, artifact_paths)
+    cache.restore("fine_tuning", key, new_output_path)
+    assert read(os.path.join(new_output_path, "data", "corpora.json")) == "corpora"
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import random
+
+import pandas as pd
+import pytest
+
+from deeponto.align.evaluation import AlignmentEvaluator
+from deeponto.align.mapping import EntityMapping, MappingSet, ReferenceMapping
+
+
+def random_mappings(num_mappings, num_entities=30, seed=0):
+    rng = random.Random(seed)
+    return [
+        EntityMapping(f"src:{rng.randrange(num_entities)}", f"tgt:{rng.randrange(num_entities)}", score=rng.random())
+        for _ in range(num_mappings)
+    ]
+
+
+def as_scored_tuples(mappings):
+    return [(m.head, m.tail, round(m.score, 5)) for m in mappings]
+
+
+def rounded(scored_tuples):
+    return [(head, tail, round(score, 5)) for head, tail, score in scored_tuples]
+
+
+def test_mapping_set_round_trip():
+    mappings = random_mappings(200)
+    mapping_set = MappingSet.from_entity_mappings(mappings)
+    assert len(mapping_set) == len(mappings)
+    assert mapping_set.to_tuples() == EntityMapping.as_tuples(mappings)
+    assert as_scored_tuples(mapping_set.to_entity_mappings()) == as_scored_tuples(mappings)
+
+
+def test_sort_and_threshold_match_the_list_versions():
+    mappings = random_mappings(200)
+    mapping_set = MappingSet.from_entity_mappings(mappings)
+    expected = EntityMapping.sort_entity_mappings_by_score(mappings, k=50)
+    assert as_scored_tuples(mapping_set.sort_by_score(k=50).to_entity_mappings()) == as_scored_tuples(expected)
+    expected = [m for m in mappings if m.score >= 0.5]
+    assert as_scored_tuples(mapping_set.threshold(0.5).to_entity_mappings()) == as_scored_tuples(expected)
+
+
+def test_set_operations_match_python_sets():
+    mappings, others = random_mappings(300, seed=1), random_mappings(300, seed=2)
+    mapping_set = MappingSet.from_entity_mappings(mappings)
+    pairs, other_pairs = set(EntityMapping.as_tuples(mappings)), set(EntityMapping.as_tuples(others))
+    assert len(mapping_set.deduplicate()) == len(pairs)
+    assert set(mapping_set.intersection(others).to_tuples()) == pairs & other_pairs
+    assert set(mapping_set.difference(others).to_tuples()) == pairs - other_pairs
+    assert set(mapping_set.union(others).to_tuples()) == pairs | other_pairs
+
+
+def test_deduplicate_strategies():
+    mapping_set = MappingSet(["a", "a", "b", "a"], ["x", "x", "y", "x"], scores=[0.2, 0.4, 0.5, 0.9])
+    assert rounded(mapping_set.deduplicate("kept_old").to_tuples(with_score=True)) == [("a", "x", 0.2), ("b", "y", 0.5)]
+    assert rounded(mapping_set.deduplicate("kept_new").to_tuples(with_score=True)) == [("b", "y", 0.5), ("a", "x", 0.9)]
+    assert rounded(mapping_set.deduplicate("average").to_tuples(with_score=True)) == [("a", "x", 0.5), ("b", "y", 0.5)]
+
+
+def test_evaluation_accepts_lists_and_mapping_sets():
+    preds, refs = random_mappings(300, seed=3), random_mappings(300, seed=4)
+    refs = [ReferenceMapping(m.head, m.tail) for m in refs]
+    pred_pairs, ref_pairs = set(EntityMapping.as_tuples(preds)), set(EntityMapping.as_tuples(refs))
+    precision = len(pred_pairs & ref_pairs) / len(pred_pairs)
+    recall = len(pred_pairs & ref_pairs) / len(ref_pairs)
+    assert AlignmentEvaluator.precision(preds, refs) == pytest.approx(precision)
+    assert AlignmentEvaluator.recall(preds, refs) == pytest.approx(recall)
+    pred_set, ref_set = MappingSet.from_entity_mappings(preds), MappingSet.from_entity_mappings(refs)
+    assert AlignmentEvaluator.f1(pred_set, ref_set) == pytest.approx(AlignmentEvaluator.f1(preds, refs))
+
+
+def test_null_entities_are_rejected():
+    with pytest.raises(ValueError):
+        MappingSet(["a", None, "b"], ["x", "y", "z"])
+    with pytest.raises(ValueError):
+        MappingSet(["a", "b", "c"], ["x", float("nan"), "z"])
+
+
+@pytest.fixture
+def mapping_table():
+    return pd.DataFrame(
+        {
+            "SrcEntity": ["a", None, "c", "c", "d"],
+            "TgtEntity": ["x", "y", None, "z", "w"],
+            "Score": [0.9, 0.99, 0.5, 0.7, 0.3],
+        }
+    )
+
+
+@pytest.mark.parametrize("suffix", [".tsv", ".csv", ".parquet"])
+def test_read_table_mappings(mapping_table, tmp_path, suffix):
+    table_file = str(tmp_path / f"mappings{suffix}")
+    if suffix == ".parquet":
+        mapping_table.to_parquet(table_file)
+    else:
+        mapping_table.to_csv(table_file, sep="\t" if suffix == ".tsv" else ",", index=False)
+
+    # rows with an empty entity cell are dropped in both forms
+    mappings = EntityMapping.read_table_mappings(table_file)
+    assert [(m.head, m.tail, m.score) for m in mappings] == [("a", "x", 0.9), ("c", "z", 0.7), ("d", "w", 0.3)]
+    mapping_set = EntityMapping.read_table_mappings(table_file, as_mapping_set=True)
+    assert rounded(mapping_set.to_tuples(with_score=True)) == [("a", "x", 0.9), ("c", "z", 0.7), ("d", "w", 0.3)]
+
+    # the threshold keeps the scores no less than it
+    mappings = EntityMapping.read_table_mappings(table_file, threshold=0.7)
+    assert EntityMapping.as_tuples(mappings) == [("a", "x"), ("c", "z")]
+    mapping_set = EntityMapping.read_table_mappings(table_file, threshold=0.7, as_mapping_set=True)
+    assert mapping_set.to_tuples() == [("a", "x"), ("c", "z")]
+
+    # reference mappings ignore the scores
+    references = ReferenceMapping.read_table_mappings(table_file)
+    assert [(m.head, m.tail, m.score) for m in references] == [("a", "x", 1.0), ("c", "z", 1.0), ("d", "w", 1.0)]
+
+
+def test_save_and_read_mapping_set(tmp_path):
+    mapping_set = MappingSet.from_entity_mappings(random_mappings(100))
+    for suffix in [".tsv", ".parquet"]:
+        table_file = str(tmp_path / f"mappings{suffix}")
+        mapping_set.save_table(table_file)
+        loaded = EntityMapping.read_table_mappings(table_file, as_mapping_set=True)
+        assert rounded(loaded.to_tuples(with_score=True)) == rounded(mapping_set.to_tuples(with_score=True))
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import random
+
+import networkx as nx
+import numpy as np
+
+from deeponto.align.bertmap.text_semantics import AnnotationThesaurus
+
+
+def connected_groups(synonym_groups):
+    """The previous graph-based merging of synonym groups by transitivity."""
+    graph = nx.Graph()
+    for group in synonym_groups:
+        group = list(group)
+        graph.add_nodes_from(group)
+        graph.add_edges_from((group[0], label) for label in group[1:])
+    return {frozenset(component) for component in nx.connected_components(graph)}
+
+
+def random_synonym_groups(num_groups, num_labels, seed=0):
+    rng = random.Random(seed)
+    return [{f"label{rng.randrange(num_labels)}" for _ in range(rng.randint(1, 4))} for _ in range(num_groups)]
+
+
+def test_merge_synonym_groups_matches_connected_components():
+    for seed in range(5):
+        synonym_groups = random_synonym_groups(200, 300, seed)
+        merged = AnnotationThesaurus.merge_synonym_groups_by_transitivity(synonym_groups)
+        assert {frozenset(group) for group in merged} == connected_groups(synonym_groups)
+        # every label appears in exactly one merged group
+        assert sum(len(group) for group in merged) == len(set().union(*synonym_groups))
+
+
+def test_merge_synonym_groups_with_chains_and_empty_groups():
+    synonym_groups = [{"a", "b"}, set(), {"c", "d"}, {"b", "c"}, {"e"}]
+    merged = AnnotationThesaurus.merge_synonym_groups_by_transitivity(synonym_groups)
+    assert {frozenset(group) for group in merged} == {frozenset("abcd"), frozenset("e")}
+    assert AnnotationThesaurus.merge_synonym_groups_by_transitivity([]) == []
+
+
+def test_merge_label_id_groups():
+    # groups {0, 1}, {2}, {1, 3} and {4, 2} over flattened label ids
+    label_ids, offsets, sizes = np.array([0, 1, 2, 1, 3, 4, 2]), np.array([0, 2, 3, 5]), np.array([2, 1, 2, 2])
+    merged_ids, merged_offsets, merged_sizes = AnnotationThesaurus.merge_label_id_groups_by_transitivity(
+        label_ids, offsets, sizes
+    )
+    assert merged_ids.tolist() == [0, 1, 3, 2, 4]
+    assert merged_offsets.tolist() == [0, 3]
+    assert merged_sizes.tolist() == [3, 2]